@@ -0,0 +1,47 @@
+"""Add transaction_monthly_totals aggregate table
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transaction_monthly_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('type', sa.String(50), nullable=False),
+        sa.Column('total_amount', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'month', 'type', name='uq_transaction_monthly_totals_bucket'),
+    )
+    op.create_index('ix_transaction_monthly_totals_id', 'transaction_monthly_totals', ['id'])
+    op.create_index('ix_transaction_monthly_totals_user_id', 'transaction_monthly_totals', ['user_id'])
+
+    # Backfill from existing bookings
+    op.execute(
+        """
+        INSERT INTO transaction_monthly_totals (user_id, month, type, total_amount, transaction_count)
+        SELECT user_id, date_trunc('month', transaction_date)::date, type, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY user_id, date_trunc('month', transaction_date), type
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transaction_monthly_totals_user_id', table_name='transaction_monthly_totals')
+    op.drop_index('ix_transaction_monthly_totals_id', table_name='transaction_monthly_totals')
+    op.drop_table('transaction_monthly_totals')
@@ -0,0 +1,24 @@
+"""Add composite index for keyset pagination of the Kassenbuch
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_transactions_user_date_id',
+        'transactions',
+        ['user_id', 'transaction_date', 'id'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_date_id', table_name='transactions')
@@ -0,0 +1,52 @@
+"""Add composite and partial indexes for tenant-scoped hot queries
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Kassenbuch: period queries per type (category breakdown, income-only lists)
+    op.create_index('ix_transactions_user_type_date', 'transactions', ['user_id', 'type', 'transaction_date'])
+    # Portal and Zuwendungsbestätigungen: bookings of one member
+    op.create_index(
+        'ix_transactions_member_date', 'transactions', ['member_id', 'transaction_date'],
+        postgresql_where=sa.text('member_id IS NOT NULL'),
+    )
+    # Member lists filtered by status and sorted by name
+    op.create_index('ix_members_user_status_name', 'members', ['user_id', 'status', 'last_name', 'first_name'])
+    # Bank import: IBAN lookup
+    op.create_index(
+        'ix_members_user_iban', 'members', ['user_id', 'iban'],
+        postgresql_where=sa.text('iban IS NOT NULL'),
+    )
+    # Reminders per member and status (payment_reminders.member_id had no index at all)
+    op.create_index('ix_payment_reminders_member_status_due', 'payment_reminders', ['member_id', 'status', 'due_date'])
+    # Overdue detection only ever looks at open reminders
+    op.create_index(
+        'ix_payment_reminders_open_due', 'payment_reminders', ['due_date'],
+        postgresql_where=sa.text("status IN ('pending', 'sent')"),
+    )
+    # Admin audit log filtered by resource, newest first
+    op.create_index('ix_audit_log_resource_created_at', 'audit_log', ['resource', 'created_at'])
+    # Event lists and portal: upcoming events per tenant
+    op.create_index('ix_events_user_date', 'events', ['user_id', 'event_date'])
+
+
+def downgrade():
+    op.drop_index('ix_events_user_date', table_name='events')
+    op.drop_index('ix_audit_log_resource_created_at', table_name='audit_log')
+    op.drop_index('ix_payment_reminders_open_due', table_name='payment_reminders')
+    op.drop_index('ix_payment_reminders_member_status_due', table_name='payment_reminders')
+    op.drop_index('ix_members_user_iban', table_name='members')
+    op.drop_index('ix_members_user_status_name', table_name='members')
+    op.drop_index('ix_transactions_member_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_date', table_name='transactions')
@@ -0,0 +1,24 @@
+"""Add revision counter to transaction_monthly_totals
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'transaction_monthly_totals',
+        sa.Column('revision', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column('transaction_monthly_totals', 'revision')
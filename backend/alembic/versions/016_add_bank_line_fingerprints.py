@@ -0,0 +1,38 @@
+"""Add bank_line_fingerprints for idempotent bank imports
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bank_line_fingerprints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(64), nullable=False),
+        sa.Column('booking_date', sa.Date(), nullable=False),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'fingerprint', name='uq_bank_line_fingerprints_user_fingerprint'),
+    )
+    op.create_index('ix_bank_line_fingerprints_id', 'bank_line_fingerprints', ['id'])
+    op.create_index('ix_bank_line_fingerprints_transaction_id', 'bank_line_fingerprints', ['transaction_id'])
+
+
+def downgrade():
+    op.drop_index('ix_bank_line_fingerprints_transaction_id', table_name='bank_line_fingerprints')
+    op.drop_index('ix_bank_line_fingerprints_id', table_name='bank_line_fingerprints')
+    op.drop_table('bank_line_fingerprints')
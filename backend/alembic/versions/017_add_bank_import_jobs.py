@@ -0,0 +1,59 @@
+"""Add bank_import_jobs and bank_import_job_lines for background imports
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bank_import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('filename', sa.String(255), nullable=False),
+        sa.Column('format', sa.String(20), nullable=True),
+        sa.Column('add_to_kassenbuch', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('file_path', sa.String(500), nullable=True),
+        sa.Column('total_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('processed_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('imported', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('member_matches', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('kassenbuch_added', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('skipped', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_bank_import_jobs_id', 'bank_import_jobs', ['id'])
+    op.create_index('ix_bank_import_jobs_user_id', 'bank_import_jobs', ['user_id'])
+
+    op.create_table(
+        'bank_import_job_lines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('line_no', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['bank_import_jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_bank_import_job_lines_job_line', 'bank_import_job_lines', ['job_id', 'line_no'])
+
+
+def downgrade():
+    op.drop_index('ix_bank_import_job_lines_job_line', table_name='bank_import_job_lines')
+    op.drop_table('bank_import_job_lines')
+    op.drop_index('ix_bank_import_jobs_user_id', table_name='bank_import_jobs')
+    op.drop_index('ix_bank_import_jobs_id', table_name='bank_import_jobs')
+    op.drop_table('bank_import_jobs')
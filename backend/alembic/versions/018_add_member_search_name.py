@@ -0,0 +1,46 @@
+"""Add members.search_name with a trigram index for fuzzy bank matching
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.member import normalize_member_name
+
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('members', sa.Column('search_name', sa.String(511), nullable=True))
+
+    # Backfill in Python: the transliteration (ä -> ae, accents) has no portable SQL equivalent
+    bind = op.get_bind()
+    members = sa.table(
+        'members',
+        sa.column('id', sa.Integer), sa.column('first_name', sa.String),
+        sa.column('last_name', sa.String), sa.column('search_name', sa.String),
+    )
+    rows = bind.execute(sa.select(members.c.id, members.c.first_name, members.c.last_name)).all()
+    if rows:
+        bind.execute(
+            members.update().where(members.c.id == sa.bindparam('_id')).values(search_name=sa.bindparam('_name')),
+            [{'_id': row.id, '_name': normalize_member_name(f"{row.first_name} {row.last_name}")} for row in rows],
+        )
+
+    # Without pg_trgm (e.g. a Postgres build without contrib) matching falls back to the
+    # in-process trigram index, see app/services/member_fuzzy.py
+    if bind.dialect.name == 'postgresql':
+        available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+        if available:
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            op.execute('CREATE INDEX ix_members_search_name_trgm ON members USING gin (search_name gin_trgm_ops)')
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_members_search_name_trgm')
+    op.drop_column('members', 'search_name')
@@ -0,0 +1,40 @@
+"""Add bank_format_profiles for per-tenant CSV bank formats
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bank_format_profiles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.String(64), nullable=False),
+        sa.Column('encoding', sa.String(20), nullable=False),
+        sa.Column('delimiter', sa.String(1), nullable=False),
+        sa.Column('header', sa.Text(), nullable=False),
+        sa.Column('columns', sa.JSON(), nullable=False),
+        sa.Column('date_format', sa.String(20), nullable=False),
+        sa.Column('decimal_style', sa.String(2), nullable=False),
+        sa.Column('use_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'signature', name='uq_bank_format_profiles_user_signature'),
+    )
+    op.create_index('ix_bank_format_profiles_id', 'bank_format_profiles', ['id'])
+
+
+def downgrade():
+    op.drop_index('ix_bank_format_profiles_id', table_name='bank_format_profiles')
+    op.drop_table('bank_format_profiles')
@@ -0,0 +1,26 @@
+"""Add members.sepa_first_collection_date for FRST/RCUR sequence types
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('members', sa.Column('sepa_first_collection_date', sa.Date(), nullable=True))
+    # Earlier exports sent every debit as RCUR, so existing mandates count as already used
+    op.execute(
+        "UPDATE members SET sepa_first_collection_date = CAST(created_at AS DATE) "
+        "WHERE iban IS NOT NULL AND iban <> ''"
+    )
+
+
+def downgrade():
+    op.drop_column('members', 'sepa_first_collection_date')
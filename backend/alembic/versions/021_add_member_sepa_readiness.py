@@ -0,0 +1,67 @@
+"""Add stored SEPA readiness (validated IBAN, effective fee) to members
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.member import normalize_iban
+
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('members', sa.Column('sepa_iban', sa.String(34), nullable=True))
+    op.add_column('members', sa.Column('beitrag_effective', sa.Numeric(10, 2), nullable=True))
+    op.add_column('members', sa.Column('sepa_ready', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+
+    # Backfill in Python: the mod-97 check has no portable SQL equivalent
+    bind = op.get_bind()
+    members = sa.table(
+        'members',
+        sa.column('id', sa.Integer), sa.column('status', sa.String), sa.column('iban', sa.String),
+        sa.column('beitrag_monthly', sa.Numeric), sa.column('group_id', sa.Integer),
+        sa.column('sepa_iban', sa.String), sa.column('beitrag_effective', sa.Numeric),
+        sa.column('sepa_ready', sa.Boolean),
+    )
+    groups = sa.table('member_groups', sa.column('id', sa.Integer), sa.column('beitrag_override', sa.Numeric))
+    rows = bind.execute(
+        sa.select(members.c.id, members.c.status, members.c.iban, members.c.beitrag_monthly, groups.c.beitrag_override)
+        .select_from(members.outerjoin(groups, groups.c.id == members.c.group_id))
+    ).all()
+    values = []
+    for row in rows:
+        sepa_iban = normalize_iban(row.iban)
+        fee = row.beitrag_override if row.beitrag_override is not None else row.beitrag_monthly
+        values.append({
+            '_id': row.id,
+            '_iban': sepa_iban,
+            '_fee': fee,
+            '_ready': row.status == 'active' and sepa_iban is not None and fee is not None and fee > 0,
+        })
+    if values:
+        bind.execute(
+            members.update().where(members.c.id == sa.bindparam('_id')).values(
+                sepa_iban=sa.bindparam('_iban'),
+                beitrag_effective=sa.bindparam('_fee'),
+                sepa_ready=sa.bindparam('_ready'),
+            ),
+            values,
+        )
+
+    op.create_index(
+        'ix_members_user_sepa_ready', 'members', ['user_id', 'last_name', 'id'],
+        postgresql_where=sa.text('sepa_ready'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_members_user_sepa_ready', table_name='members')
+    op.drop_column('members', 'sepa_ready')
+    op.drop_column('members', 'beitrag_effective')
+    op.drop_column('members', 'sepa_iban')
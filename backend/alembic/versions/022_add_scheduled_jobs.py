@@ -0,0 +1,46 @@
+"""Add scheduled_jobs and scheduled_job_runs for the periodic job runner
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '022'
+down_revision = '021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduled_jobs',
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('lease_owner', sa.String(255), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+        sa.Column('last_rows', sa.Integer(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_table(
+        'scheduled_job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_name', sa.String(100), nullable=False),
+        sa.Column('worker', sa.String(255), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('duration_ms', sa.Integer(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_scheduled_job_runs_job_started', 'scheduled_job_runs', ['job_name', 'started_at'])
+
+
+def downgrade():
+    op.drop_index('ix_scheduled_job_runs_job_started', table_name='scheduled_job_runs')
+    op.drop_table('scheduled_job_runs')
+    op.drop_table('scheduled_jobs')
@@ -0,0 +1,42 @@
+"""Turn email_log into an outbox: message content, attempts and retry time
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '023'
+down_revision = '022'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('email_log', sa.Column('html_body', sa.Text(), nullable=True))
+    op.add_column('email_log', sa.Column('text_body', sa.Text(), nullable=True))
+    op.add_column('email_log', sa.Column('attachment', sa.LargeBinary(), nullable=True))
+    op.add_column('email_log', sa.Column('attachment_filename', sa.String(255), nullable=True))
+    op.add_column('email_log', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('email_log', sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+
+    # Rows left pending by the old inline sender have no content to deliver
+    op.execute(
+        "UPDATE email_log SET status = 'failed', error = 'Versand vor Einführung des Postausgangs abgebrochen' "
+        "WHERE status = 'pending'"
+    )
+    op.create_index(
+        'ix_email_log_pending_next_attempt', 'email_log', ['next_attempt_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_email_log_pending_next_attempt', table_name='email_log')
+    op.drop_column('email_log', 'next_attempt_at')
+    op.drop_column('email_log', 'attempts')
+    op.drop_column('email_log', 'attachment_filename')
+    op.drop_column('email_log', 'attachment')
+    op.drop_column('email_log', 'text_body')
+    op.drop_column('email_log', 'html_body')
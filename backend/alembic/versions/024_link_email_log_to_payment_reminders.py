@@ -0,0 +1,30 @@
+"""Link outbox emails to the payment reminder they deliver
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '024'
+down_revision = '023'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('email_log', sa.Column('payment_reminder_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_email_log_payment_reminder_id',
+        'email_log', 'payment_reminders',
+        ['payment_reminder_id'], ['id'],
+        ondelete='SET NULL',
+    )
+    op.create_index('ix_email_log_payment_reminder_id', 'email_log', ['payment_reminder_id'])
+
+
+def downgrade():
+    op.drop_index('ix_email_log_payment_reminder_id', table_name='email_log')
+    op.drop_constraint('fk_email_log_payment_reminder_id', 'email_log', type_='foreignkey')
+    op.drop_column('email_log', 'payment_reminder_id')
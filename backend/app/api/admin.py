@@ -9,10 +9,13 @@ from app.models.user import User
 from app.models.member import Member
 from app.models.transaction import Transaction
 from app.models.feedback import Feedback
+from app.models.scheduled_job import ScheduledJob, ScheduledJobRun
 from app.schemas.user import UserRead, AdminUserUpdate
 from app.schemas.feedback import FeedbackRead, FeedbackUpdate
 from app.core.auth import get_admin_user
 from app.services.email_service import send_email, build_feedback_response_email
+from app.services.aggregate_service import verify_aggregates
+from app.services.pdf_executor import pdf_pool
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -37,6 +40,71 @@ async def get_system_stats(
     }
 
 
+@router.post("/aggregates/verify")
+async def verify_transaction_aggregates(
+    user_id: Optional[int] = Query(default=None),
+    repair: bool = Query(default=False),
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Recompute Kassenbuch totals from raw transactions and report (optionally repair) drift."""
+    drift = await verify_aggregates(db, user_id=user_id, repair=repair)
+    if repair and drift:
+        await db.commit()
+    return {
+        "drift_count": len(drift),
+        "repaired": repair and bool(drift),
+        "drift": drift,
+    }
+
+
+@router.get("/pdf-metrics")
+async def get_pdf_metrics(
+    admin: User = Depends(get_admin_user),
+):
+    """Queue depth and render times of the PDF worker pool."""
+    return pdf_pool.metrics()
+
+
+@router.get("/scheduled-jobs")
+async def get_scheduled_jobs(
+    runs: int = Query(default=20, ge=0, le=500),
+    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Schedule, lease and recent run timings of the periodic jobs."""
+    jobs = (await db.execute(select(ScheduledJob).order_by(ScheduledJob.name))).scalars().all()
+    recent = (
+        await db.execute(select(ScheduledJobRun).order_by(ScheduledJobRun.started_at.desc()).limit(runs))
+    ).scalars().all()
+    return {
+        "jobs": [
+            {
+                "name": job.name,
+                "next_run_at": job.next_run_at,
+                "lease_owner": job.lease_owner,
+                "lease_expires_at": job.lease_expires_at,
+                "last_started_at": job.last_started_at,
+                "last_duration_ms": job.last_duration_ms,
+                "last_rows": job.last_rows,
+                "last_error": job.last_error,
+            }
+            for job in jobs
+        ],
+        "runs": [
+            {
+                "job_name": run.job_name,
+                "worker": run.worker,
+                "started_at": run.started_at,
+                "duration_ms": run.duration_ms,
+                "rows": run.rows,
+                "error": run.error,
+            }
+            for run in recent
+        ],
+    }
+
+
 @router.get("/users", response_model=List[UserRead])
 async def list_users(
     search: Optional[str] = Query(default=None),
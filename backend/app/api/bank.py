@@ -1,22 +1,30 @@
 """
-Bankabgleich: Kontoauszug-Import (CSV) für VereinsKasse.
+Bankabgleich: Kontoauszug-Import (CSV, CAMT.053, MT940) für VereinsKasse.
 
 Importiert Bankbuchungen und:
 1. Erkennt Mitgliedsbeiträge anhand IBAN-Vergleich
 2. Ordnet Zahlungen automatisch Mitgliedern zu
 3. Kann importierte Buchungen als Kassenbuch-Transaktionen übernehmen
+4. Überspringt bereits übernommene Zeilen bei erneutem Upload (siehe bank_dedupe)
 
-Unterstützte CSV-Formate: DKB, Sparkasse, VR-Bank, Comdirect, generisch.
+CSV-Formate werden beim ersten Import einer Bank erkannt und pro Verein
+gespeichert (siehe bank_profiles, /bank/profiles).
+
+/bank/reconcile gleicht einen Auszug mit dem Kassenbuch ab, ohne zu buchen
+(siehe bank_reconcile).
+
+Große Auszüge können über /bank/import-jobs im Hintergrund importiert werden;
+Fortschritt und Ergebnis liefert /bank/jobs/{id} (siehe bank_import_jobs).
+
+Unterstützte Formate (siehe bank_statements): CSV von DKB, Sparkasse, VR-Bank,
+Comdirect oder generisch, ISO-20022-CAMT.053 und MT940.
 """
-import csv
-import io
-import re
-import uuid
-from datetime import date
-from decimal import Decimal, InvalidOperation
+import asyncio
+from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from pydantic import BaseModel
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -25,13 +33,30 @@ from app.database import get_db
 from app.models.user import User
 from app.models.member import Member
 from app.models.transaction import Transaction
+from app.models.bank_import_job import BankImportJob
+from app.models.bank_format_profile import BankFormatProfile
 from app.core.auth import get_current_user
+from app.config import settings
+from app.services import bank_import_jobs
+from app.services.aggregate_service import track_created
+from app.services.bank_import import import_statement
+from app.services.bank_profiles import load_profiles, remember_profile
+from app.services.bank_reconcile import reconcile_statement
+from app.services.bank_statements import (
+    SUPPORTED_EXTENSIONS, StatementFormatError, detect_parser, parse_booking_date,
+)
 
 router = APIRouter(prefix="/bank", tags=["bank"])
 
 
 # ── Pydantic ──────────────────────────────────────────────────────────────────
 
+class MatchCandidate(BaseModel):
+    member_id: int
+    member_name: str
+    score: float                # trigram similarity, 0.0 – 1.0
+
+
 class BankTxnOut(BaseModel):
     booking_date: str
     counterparty: Optional[str]
@@ -41,8 +66,11 @@ class BankTxnOut(BaseModel):
     currency: str
     matched_member_id: Optional[int]
     matched_member_name: Optional[str]
-    match_type: Optional[str]   # "iban" | "name" | None
+    match_type: Optional[str]   # "iban" | "name" | "fuzzy" | None
+    match_confidence: Optional[float] = None  # 1.0 for iban/name, similarity for fuzzy
+    match_candidates: list[MatchCandidate] = []  # ranked fuzzy candidates
     transaction_created: bool   # True if added to Kassenbuch already
+    duplicate: bool = False     # True if booked by an earlier import (skipped)
 
 
 class ImportResult(BaseModel):
@@ -51,6 +79,76 @@ class ImportResult(BaseModel):
     kassenbuch_added: int
     skipped: int
     transactions: list[BankTxnOut]
+    transactions_truncated: bool = False  # only the first BANK_IMPORT_MAX_REPORTED_LINES are listed
+
+
+class BankLineOut(BaseModel):
+    booking_date: str
+    counterparty: Optional[str]
+    iban: Optional[str]
+    purpose: Optional[str]
+    amount: float
+    currency: str
+
+
+class BookingOut(BaseModel):
+    id: int
+    transaction_date: str
+    type: str
+    amount: float
+    description: str
+    member_id: Optional[int]
+
+
+class ReconcileMatch(BaseModel):
+    bank_line: BankLineOut
+    booking: BookingOut
+    days_apart: int
+
+
+class ReconcileResult(BaseModel):
+    date_from: str
+    date_to: str
+    window_days: int
+    matched: list[ReconcileMatch]
+    bank_only: list[BankLineOut]        # on the statement, missing in the Kassenbuch
+    kassenbuch_only: list[BookingOut]   # booked in the period, not on the statement
+
+
+def _line_out(line: dict) -> BankLineOut:
+    return BankLineOut(
+        booking_date=str(line["booking_date"]),
+        counterparty=line["counterparty"],
+        iban=line["iban"],
+        purpose=line["purpose"],
+        amount=float(line["amount"]),
+        currency=line["currency"],
+    )
+
+
+def _booking_out(booking: dict) -> BookingOut:
+    return BookingOut(
+        id=booking["id"],
+        transaction_date=str(booking["transaction_date"]),
+        type=booking["type"],
+        amount=float(booking["amount"]),
+        description=booking["description"],
+        member_id=booking["member_id"],
+    )
+
+
+class BankFormatProfileOut(BaseModel):
+    id: int
+    header: str
+    encoding: str
+    delimiter: str
+    date_format: str
+    decimal_style: str
+    use_count: int
+    created_at: datetime
+    last_used_at: datetime
+
+    model_config = {"from_attributes": True}
 
 
 class AcceptRequest(BaseModel):
@@ -63,273 +161,207 @@ class AcceptRequest(BaseModel):
     txn_type: str = "income"  # "income" | "expense"
 
 
-# ── CSV Parsing (shared logic, same as HB version) ────────────────────────────
-
-def _parse_german_decimal(value: str) -> Optional[Decimal]:
-    if not value:
-        return None
-    v = value.strip().replace("\xa0", "").replace(" ", "")
-    v = re.sub(r"[€$£]", "", v)
-    if re.match(r"^-?\d{1,3}(\.\d{3})+(,\d{1,2})?$", v):
-        v = v.replace(".", "").replace(",", ".")
-    elif "," in v and "." not in v:
-        v = v.replace(",", ".")
-    elif "," in v and "." in v and v.index(",") > v.index("."):
-        v = v.replace(",", "")
-    elif "," in v:
-        v = v.replace(".", "").replace(",", ".")
-    try:
-        return Decimal(v)
-    except InvalidOperation:
-        return None
-
-
-def _parse_date(value: str) -> Optional[date]:
-    if not value:
-        return None
-    value = value.strip()
-    for fmt in ("%d.%m.%Y", "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y"):
-        try:
-            from datetime import datetime
-            return datetime.strptime(value, fmt).date()
-        except ValueError:
-            continue
-    return None
-
-
-def _detect_columns(header: list[str]) -> dict:
-    h = [c.lower().strip() for c in header]
-
-    def find(*candidates) -> Optional[int]:
-        for cand in candidates:
-            for i, col in enumerate(h):
-                if cand in col:
-                    return i
-        return None
-
-    return {
-        "date": find("buchungstag", "buchungsdatum", "datum", "date", "valuta"),
-        "value_date": find("wertstellung", "valutadatum"),
-        "counterparty": find("auftraggeber", "empfänger", "beguenstigter", "begünstigter", "name", "zahlungsempfänger"),
-        "iban": find("iban", "konto", "account"),
-        "purpose": find("verwendungszweck", "buchungstext", "purpose", "betreff", "reference"),
-        "amount": find("betrag", "amount", "umsatz"),
-        "currency": find("währung", "currency"),
-        "debit": find("soll", "debit", "ausgabe", "belastung"),
-        "credit": find("haben", "credit", "eingang", "gutschrift"),
-    }
-
-
-def _parse_csv(content: bytes) -> list[dict]:
-    text = None
-    for enc in ("utf-8-sig", "latin-1", "cp1252"):
-        try:
-            text = content.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-    if text is None:
-        raise ValueError("CSV-Datei konnte nicht gelesen werden.")
-
-    lines = text.splitlines()
-    start_idx = 0
-    for i, line in enumerate(lines):
-        if re.search(r"(buchungstag|datum|date|buchung)", line, re.IGNORECASE):
-            start_idx = i
-            break
-
-    try:
-        dialect = csv.Sniffer().sniff(lines[start_idx], delimiters=";,\t")
-    except csv.Error:
-        dialect = csv.excel
-        dialect.delimiter = ";"
-
-    reader = csv.reader(lines[start_idx:], dialect=dialect)
-    rows = list(reader)
-    if not rows:
-        return []
-
-    header = rows[0]
-    cols = _detect_columns(header)
-    transactions = []
-
-    for row in rows[1:]:
-        if not row or all(cell.strip() == "" for cell in row):
-            continue
-        max_idx = max((c for c in cols.values() if c is not None), default=0)
-        if len(row) <= max_idx:
-            continue
-
-        def get(idx: Optional[int]) -> str:
-            if idx is None or idx >= len(row):
-                return ""
-            return row[idx].strip()
-
-        booking_date = _parse_date(get(cols["date"]))
-        if booking_date is None:
-            continue
-
-        amount: Optional[Decimal] = None
-        if cols["amount"] is not None:
-            raw = get(cols["amount"]).replace("+", "").strip()
-            amount = _parse_german_decimal(raw)
-
-        if amount is None and cols["debit"] is not None and cols["credit"] is not None:
-            debit = _parse_german_decimal(get(cols["debit"]))
-            credit = _parse_german_decimal(get(cols["credit"]))
-            if credit and credit > 0:
-                amount = credit
-            elif debit and debit > 0:
-                amount = -debit
-
-        if amount is None:
-            continue
-
-        # Normalize IBAN
-        raw_iban = re.sub(r"\s", "", get(cols["iban"]))
-        iban = raw_iban if re.match(r"^[A-Z]{2}\d{2}", raw_iban) else None
-
-        transactions.append({
-            "booking_date": booking_date,
-            "counterparty": get(cols["counterparty"]) or None,
-            "iban": iban,
-            "purpose": get(cols["purpose"]) or None,
-            "amount": amount,
-            "currency": get(cols["currency"]) or "EUR",
-        })
-
-    return transactions
-
-
-# ── Auto-Match: Mitglied anhand IBAN oder Name ────────────────────────────────
-
-async def _match_member(
-    iban: Optional[str],
-    counterparty: Optional[str],
-    purpose: Optional[str],
-    user_id: int,
-    db: AsyncSession,
-) -> tuple[Optional[Member], str]:
-    """
-    Returns (member, match_type) or (None, "").
-    match_type: "iban" | "name" | "purpose"
-    """
-    if iban:
-        result = await db.execute(
-            select(Member).where(
-                and_(Member.user_id == user_id, Member.iban == iban)
-            )
-        )
-        m = result.scalar_one_or_none()
-        if m:
-            return m, "iban"
-
-    # Name match in counterparty or purpose
-    result = await db.execute(
-        select(Member).where(
-            and_(Member.user_id == user_id, Member.status == "active")
-        )
+class ImportJobOut(BaseModel):
+    id: int
+    status: str                 # "queued" | "running" | "completed" | "failed"
+    filename: str
+    format: Optional[str]
+    progress: float             # 0.0 – 1.0, share of the file already processed
+    imported: int
+    member_matches: int
+    kassenbuch_added: int
+    skipped: int
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+    transactions: list[BankTxnOut] = []  # per-line results from ?offset=, in file order
+
+
+def _job_out(job: BankImportJob, lines: list[dict]) -> ImportJobOut:
+    return ImportJobOut(
+        id=job.id,
+        status=job.status,
+        filename=job.filename,
+        format=job.format,
+        progress=job.processed_bytes / job.total_bytes if job.total_bytes else 0.0,
+        imported=job.imported,
+        member_matches=job.member_matches,
+        kassenbuch_added=job.kassenbuch_added,
+        skipped=job.skipped,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        transactions=lines,
     )
-    members = result.scalars().all()
 
-    search_text = " ".join(filter(None, [counterparty, purpose])).lower()
 
-    for member in members:
-        full = member.full_name.lower()
-        last = member.last_name.lower()
-        if len(last) >= 3 and (last in search_text or full in search_text):
-            return member, "name"
+# ── Routes ────────────────────────────────────────────────────────────────────
 
-    return None, ""
+def _check_upload(file: UploadFile) -> None:
+    if not (file.filename or "").lower().endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail="Nur CSV-, CAMT.053- (XML) und MT940-Dateien werden unterstützt.",
+        )
 
+    # The upload is spooled to disk by Starlette; it is parsed from there as a stream
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(0)
+    if size > settings.BANK_IMPORT_MAX_BYTES:
+        max_mb = settings.BANK_IMPORT_MAX_BYTES // (1024 * 1024)
+        raise HTTPException(status_code=413, detail=f"Datei zu groß. Maximum: {max_mb} MB")
 
-# ── Routes ────────────────────────────────────────────────────────────────────
 
 @router.post("/import", response_model=ImportResult)
-async def import_bank_csv(
+async def import_bank_statement(
     file: UploadFile = File(...),
     add_to_kassenbuch: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Import a bank statement CSV.
+    Import a bank statement (CSV, CAMT.053 XML or MT940).
     If add_to_kassenbuch=True, income transactions are auto-added to the Kassenbuch.
+    Lines booked by an earlier import are flagged as duplicate and skipped.
     """
-    if not ((file.filename or "").lower().endswith(".csv")):
-        raise HTTPException(status_code=400, detail="Nur CSV-Dateien werden unterstützt.")
+    _check_upload(file)
 
-    content = await file.read()
-    if len(content) > 5 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="Datei zu groß. Maximum: 5 MB")
+    reported: list[dict] = []
 
+    async def collect(summary: dict, lines: list[dict]) -> None:
+        reported.extend(lines[:settings.BANK_IMPORT_MAX_REPORTED_LINES - len(reported)])
+
+    parser = detect_parser(file.filename, file.file, await load_profiles(db, current_user.id))
     try:
-        raw_txns = _parse_csv(content)
-    except ValueError as e:
+        summary = await import_statement(
+            db,
+            current_user.id,
+            parser.iter_lines(file.file),
+            add_to_kassenbuch=add_to_kassenbuch,
+            chunk_size=settings.BANK_IMPORT_CHUNK_SIZE,
+            on_chunk=collect,
+        )
+    except StatementFormatError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-    if not raw_txns:
-        raise HTTPException(status_code=422, detail="Keine Buchungen in der CSV-Datei gefunden.")
+    if not summary["imported"]:
+        raise HTTPException(status_code=422, detail="Keine Buchungen in der Datei gefunden.")
+    await remember_profile(db, current_user.id, parser)
+    # One commit for the whole file: a format error halfway through books nothing
+    await db.commit()
+    return ImportResult(
+        **summary,
+        transactions=reported,
+        transactions_truncated=summary["imported"] > len(reported),
+    )
 
-    results: list[BankTxnOut] = []
-    member_matches = 0
-    kassenbuch_added = 0
-    skipped = 0
 
-    for raw in raw_txns:
-        member, match_type = await _match_member(
-            raw["iban"], raw["counterparty"], raw["purpose"],
-            current_user.id, db
-        )
-        if member:
-            member_matches += 1
-
-        txn_created = False
-        if add_to_kassenbuch and raw["amount"] > 0:
-            # Build description
-            parts = []
-            if raw["counterparty"]:
-                parts.append(raw["counterparty"])
-            if raw["purpose"]:
-                parts.append(raw["purpose"])
-            desc = " – ".join(parts) if parts else "Bankeingang"
-
-            kassenbuch_txn = Transaction(
-                user_id=current_user.id,
-                member_id=member.id if member else None,
-                type="income",
-                amount=raw["amount"],
-                description=desc[:500],
-                transaction_date=raw["booking_date"],
-            )
-            db.add(kassenbuch_txn)
-            kassenbuch_added += 1
-            txn_created = True
-
-        results.append(BankTxnOut(
-            booking_date=str(raw["booking_date"]),
-            counterparty=raw["counterparty"],
-            iban=raw["iban"],
-            purpose=raw["purpose"],
-            amount=float(raw["amount"]),
-            currency=raw["currency"],
-            matched_member_id=member.id if member else None,
-            matched_member_name=member.full_name if member else None,
-            match_type=match_type or None,
-            transaction_created=txn_created,
-        ))
+@router.post("/import-jobs", response_model=ImportJobOut, status_code=202)
+async def start_import_job(
+    file: UploadFile = File(...),
+    add_to_kassenbuch: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Start a bank statement import in the background and return the job right away.
+    Poll GET /bank/jobs/{id} for progress and results.
+    """
+    _check_upload(file)
+    job = await bank_import_jobs.create_job(db, current_user.id, file.filename, file.file, add_to_kassenbuch)
+    return _job_out(job, [])
+
 
+@router.get("/jobs/{job_id}", response_model=ImportJobOut)
+async def get_import_job(
+    job_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=0, le=5000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Status, counts and per-line results (from offset) of a background import."""
+    job = await bank_import_jobs.get_job(db, current_user.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import nicht gefunden.")
+    lines = await bank_import_jobs.get_job_lines(db, job.id, offset, limit) if limit else []
+    return _job_out(job, lines)
+
+
+@router.post("/reconcile", response_model=ReconcileResult)
+async def reconcile_bank_statement(
+    file: UploadFile = File(...),
+    window_days: int = Query(3, ge=0, le=31),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Compare a bank statement with the Kassenbuch without booking anything.
+    Lines and bookings pair up on signed amount within ±window_days.
+    """
+    _check_upload(file)
+    parser = detect_parser(file.filename, file.file, await load_profiles(db, current_user.id))
+    try:
+        lines = await asyncio.to_thread(lambda: list(parser.iter_lines(file.file)))
+    except StatementFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not lines:
+        raise HTTPException(status_code=422, detail="Keine Buchungen in der Datei gefunden.")
+    await remember_profile(db, current_user.id, parser)
     await db.commit()
 
-    return ImportResult(
-        imported=len(raw_txns),
-        member_matches=member_matches,
-        kassenbuch_added=kassenbuch_added,
-        skipped=skipped,
-        transactions=results,
+    result = await reconcile_statement(db, current_user.id, lines, window_days)
+    return ReconcileResult(
+        date_from=str(result["date_from"]),
+        date_to=str(result["date_to"]),
+        window_days=window_days,
+        matched=[
+            ReconcileMatch(
+                bank_line=_line_out(line),
+                booking=_booking_out(booking),
+                days_apart=abs((booking["transaction_date"] - line["booking_date"]).days),
+            )
+            for line, booking in result["matched"]
+        ],
+        bank_only=[_line_out(line) for line in result["bank_only"]],
+        kassenbuch_only=[_booking_out(booking) for booking in result["kassenbuch_only"]],
     )
 
 
+@router.get("/profiles", response_model=list[BankFormatProfileOut])
+async def list_format_profiles(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """CSV bank formats recognised by earlier imports."""
+    result = await db.execute(
+        select(BankFormatProfile)
+        .where(BankFormatProfile.user_id == current_user.id)
+        .order_by(BankFormatProfile.last_used_at.desc())
+    )
+    return result.scalars().all()
+
+
+@router.delete("/profiles/{profile_id}", status_code=204)
+async def delete_format_profile(
+    profile_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Forget a CSV bank format; the next import of that bank detects it again."""
+    result = await db.execute(
+        select(BankFormatProfile).where(
+            and_(BankFormatProfile.id == profile_id, BankFormatProfile.user_id == current_user.id)
+        )
+    )
+    profile = result.scalar_one_or_none()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Bankformat nicht gefunden.")
+    await db.delete(profile)
+    await db.commit()
+
+
 @router.post("/accept-transaction")
 async def accept_transaction(
     body: AcceptRequest,
@@ -337,7 +369,7 @@ async def accept_transaction(
     current_user: User = Depends(get_current_user),
 ):
     """Manually add a single bank transaction to the Kassenbuch."""
-    txn_date = _parse_date(body.booking_date)
+    txn_date = parse_booking_date(body.booking_date)
     if not txn_date:
         raise HTTPException(status_code=422, detail="Ungültiges Datum.")
 
@@ -358,6 +390,7 @@ async def accept_transaction(
         transaction_date=txn_date,
     )
     db.add(txn)
+    await track_created(db, txn)
     await db.commit()
     await db.refresh(txn)
     return {"ok": True, "transaction_id": txn.id}
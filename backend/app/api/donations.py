@@ -4,7 +4,7 @@ Ermöglicht das Ausstellen von steuerlich absetzbaren Zuwendungsbestätigungen
 für Mitgliedsbeiträge und Spenden an gemeinnützige Vereine.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
+from fastapi.responses import Response, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from typing import Optional
@@ -16,6 +16,8 @@ from app.models.member import Member
 from app.models.transaction import Transaction
 from app.core.auth import get_current_user
 from app.services.pdf_service import generate_zuwendungsbestaetigung_pdf
+from app.services.pdf_executor import render_pdf
+from app.services.pdf_cache import pdf_cache, transactions_fingerprint
 
 router = APIRouter(prefix="/donations", tags=["donations"])
 
@@ -45,16 +47,38 @@ async def generate_receipt(
     if not member.email and not member.first_name:
         raise HTTPException(status_code=400, detail="Mitglied hat keine vollständigen Angaben")
 
+    org_name = current_user.organization_name or current_user.name or "Unbekannter Verein"
+    filename = f"zuwendungsbestaetigung_{member.last_name}_{year}.pdf"
+    issue_date = date.today()
+    receipt_conditions = (
+        Transaction.user_id == current_user.id,
+        Transaction.member_id == member_id,
+        Transaction.type == "income",
+        Transaction.transaction_date >= date(year, 1, 1),
+        Transaction.transaction_date <= date(year, 12, 31),
+    )
+
+    # Cached receipt if neither the member's bookings nor the printed data changed
+    fingerprint = await transactions_fingerprint(db, *receipt_conditions)
+    cache_key = pdf_cache.key(
+        current_user.id,
+        "zuwendungsbestaetigung",
+        {
+            "member_id": member_id,
+            "member_name": member.full_name,
+            "organization": org_name,
+            "year": year,
+            "issue_date": issue_date,
+        },
+        fingerprint,
+    )
+    cached = pdf_cache.get(cache_key)
+    if cached:
+        return FileResponse(cached, media_type="application/pdf", filename=filename)
+
     # Load all income transactions for this member in the given year
     transactions_result = await db.execute(
-        select(Transaction).where(
-            and_(
-                Transaction.user_id == current_user.id,
-                Transaction.member_id == member_id,
-                Transaction.type == "income",
-                func.extract("year", Transaction.transaction_date) == year,
-            )
-        ).order_by(Transaction.transaction_date)
+        select(Transaction).where(*receipt_conditions).order_by(Transaction.transaction_date)
     )
     transactions = transactions_result.scalars().all()
 
@@ -77,18 +101,19 @@ async def generate_receipt(
     ]
 
     # Generate PDF
-    org_name = current_user.organization_name or current_user.name or "Unbekannter Verein"
-    pdf_bytes = generate_zuwendungsbestaetigung_pdf(
+    pdf_bytes = await render_pdf(
+        "zuwendungsbestaetigung",
+        generate_zuwendungsbestaetigung_pdf,
         organization_name=org_name,
         member_name=member.full_name,
         member_address=None,  # Address not stored — space left in PDF
         year=year,
         total_amount=float(total_amount),
         transactions=tx_list,
-        issue_date=date.today(),
+        issue_date=issue_date,
     )
+    pdf_cache.put(cache_key, pdf_bytes)
 
-    filename = f"zuwendungsbestaetigung_{member.last_name}_{year}.pdf"
     return Response(
         content=pdf_bytes,
         media_type="application/pdf",
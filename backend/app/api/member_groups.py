@@ -10,7 +10,7 @@ from decimal import Decimal
 from app.database import get_db
 from app.models.user import User
 from app.models.member_group import MemberGroup
-from app.models.member import Member
+from app.models.member import Member, group_fee_update
 from app.core.auth import get_current_user
 
 router = APIRouter(prefix="/member-groups", tags=["member-groups"])
@@ -114,6 +114,7 @@ async def update_group(
         group.description = data.description
     if data.beitrag_override is not None:
         group.beitrag_override = Decimal(str(data.beitrag_override))
+        await db.execute(group_fee_update(group.id, group.beitrag_override))
     if data.color is not None:
         group.color = data.color
 
@@ -138,6 +139,8 @@ async def delete_group(
     group = result.scalar_one_or_none()
     if not group:
         raise HTTPException(status_code=404, detail="Gruppe nicht gefunden")
+    # Members fall back to their own fee once group_id is set to NULL
+    await db.execute(group_fee_update(group.id, None))
     await db.delete(group)
     await db.commit()
 
@@ -1,19 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case
 from typing import List, Optional
-from datetime import datetime, timezone, date
+from datetime import date
 from decimal import Decimal
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.models.member import Member
 from app.models.payment_reminder import PaymentReminder
 from app.schemas.payment_reminder import (
     PaymentReminderCreate, PaymentReminderRead, PaymentReminderUpdate,
+    PaymentReminderBulkSend, PaymentReminderBulkSendResult,
 )
 from app.core.auth import get_current_user
-from app.services.email_service import send_email, build_payment_reminder_email
+from app.services.email_service import send_email, queue_emails, build_payment_reminder_email
+from app.services.pdf_service import generate_payment_reminder_pdf
+from app.services.pdf_executor import render_pdf
 
 router = APIRouter(tags=["payment-reminders"])
 
@@ -144,68 +149,175 @@ async def send_reminder(
         notes=reminder.notes,
     )
 
-    success = await send_email(
+    await send_email(
         db,
         recipient=member.email,
         subject=f"Zahlungserinnerung – {organization}",
         html_body=html,
         text_body=text,
+        payment_reminder_id=reminder.id,
     )
 
-    if not success:
-        raise HTTPException(status_code=500, detail="E-Mail konnte nicht gesendet werden")
-
-    reminder.sent_at = datetime.now(timezone.utc)
-    reminder.status = "sent"
-    await db.commit()
+    # The outbox marks the reminder as sent once the email is delivered
     await db.refresh(reminder)
     return reminder
 
 
+@router.post("/members/reminders/send", response_model=PaymentReminderBulkSendResult)
+async def send_reminders_bulk(
+    data: PaymentReminderBulkSend,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Queue several payment reminders at once with one outbox INSERT. The outbox
+    worker delivers them and marks each reminder as sent on delivery.
+    """
+    if len(data.reminder_ids) > settings.REMINDER_BULK_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximal {settings.REMINDER_BULK_MAX} Erinnerungen pro Versand.",
+        )
+
+    result = await db.execute(
+        select(
+            PaymentReminder.id,
+            PaymentReminder.amount,
+            PaymentReminder.due_date,
+            PaymentReminder.status,
+            PaymentReminder.notes,
+            Member.first_name,
+            Member.last_name,
+            Member.email,
+        )
+        .join(Member, Member.id == PaymentReminder.member_id)
+        .where(
+            PaymentReminder.id.in_(set(data.reminder_ids)),
+            Member.user_id == current_user.id,
+        )
+    )
+    reminders = {row.id: row for row in result}
+
+    organization = current_user.organization_name or current_user.name
+    subject = f"Zahlungserinnerung – {organization}"
+    requested = list(dict.fromkeys(data.reminder_ids))
+    results: dict[int, dict] = {}
+    to_send = []
+    for reminder_id in requested:
+        row = reminders.get(reminder_id)
+        if row is None:
+            results[reminder_id] = {"status": "skipped", "error": "Erinnerung nicht gefunden"}
+        elif row.status == "paid":
+            results[reminder_id] = {"status": "skipped", "error": "Bereits bezahlt"}
+        elif not row.email:
+            results[reminder_id] = {"status": "skipped", "error": "Mitglied hat keine E-Mail-Adresse hinterlegt"}
+        else:
+            to_send.append(row)
+
+    messages = []
+    for row in to_send:
+        html, text = build_payment_reminder_email(
+            member_name=f"{row.first_name} {row.last_name}",
+            organization=organization,
+            amount=float(row.amount),
+            due_date=row.due_date.strftime("%d.%m.%Y"),
+            notes=row.notes,
+        )
+        messages.append({
+            "recipient": row.email, "subject": subject, "html_body": html, "text_body": text,
+            "payment_reminder_id": row.id,
+        })
+        results[row.id] = {"status": "queued", "error": None}
+    await queue_emails(db, messages)
+
+    ordered = [{"reminder_id": reminder_id, **results[reminder_id]} for reminder_id in requested]
+    return {
+        "queued": len(to_send),
+        "skipped": len(ordered) - len(to_send),
+        "results": ordered,
+    }
+
+
+@router.get("/members/{member_id}/reminders/{reminder_id}/pdf")
+async def download_reminder_pdf(
+    member_id: int,
+    reminder_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Zahlungserinnerung als PDF (für den Postversand)."""
+    member = await _get_member_or_404(member_id, current_user.id, db)
+    result = await db.execute(
+        select(PaymentReminder).where(
+            PaymentReminder.id == reminder_id,
+            PaymentReminder.member_id == member_id,
+        )
+    )
+    reminder = result.scalar_one_or_none()
+    if not reminder:
+        raise HTTPException(status_code=404, detail="Erinnerung nicht gefunden")
+
+    pdf_bytes = await render_pdf(
+        "zahlungserinnerung",
+        generate_payment_reminder_pdf,
+        member_name=member.full_name,
+        organization_name=current_user.organization_name or current_user.name,
+        amount=float(reminder.amount),
+        due_date=reminder.due_date.strftime("%d.%m.%Y"),
+        notes=reminder.notes or "",
+    )
+
+    filename = f"zahlungserinnerung_{member.last_name}_{reminder.id}.pdf"
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/members/payment-overview", response_model=List[dict])
 async def payment_overview(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Returns all active members with their outstanding payment reminder counts and total due."""
-    members_result = await db.execute(
-        select(Member).where(
+    today = date.today()
+    # Statuses are moved to "overdue" by the scheduler (services/maintenance); counting
+    # by due date keeps overdue_count exact between sweeps.
+    # One pass: members joined to their open reminders, aggregated per member
+    result = await db.execute(
+        select(
+            Member.id,
+            Member.first_name,
+            Member.last_name,
+            Member.email,
+            Member.beitrag_monthly,
+            func.count(PaymentReminder.id).label("open_reminders"),
+            func.sum(case((PaymentReminder.due_date < today, 1), else_=0)).label("overdue_count"),
+            func.sum(PaymentReminder.amount).label("total_due"),
+        )
+        .outerjoin(
+            PaymentReminder,
+            (PaymentReminder.member_id == Member.id)
+            & PaymentReminder.status.in_(["pending", "sent", "overdue"]),
+        )
+        .where(
             Member.user_id == current_user.id,
             Member.status == "active",
-        ).order_by(Member.last_name, Member.first_name)
-    )
-    members = members_result.scalars().all()
-
-    today = date.today()
-    overview = []
-    for m in members:
-        reminders_result = await db.execute(
-            select(PaymentReminder).where(
-                PaymentReminder.member_id == m.id,
-                PaymentReminder.status.in_(["pending", "sent", "overdue"]),
-            )
         )
-        reminders = reminders_result.scalars().all()
-
-        # Mark overdue
-        for r in reminders:
-            if r.due_date < today and r.status != "overdue":
-                r.status = "overdue"
-
-        if any(r.status != "overdue" or r.due_date < today for r in reminders):
-            await db.commit()
-
-        total_due = sum(float(r.amount) for r in reminders)
-        overdue_count = sum(1 for r in reminders if r.due_date < today)
-
-        overview.append({
-            "member_id": m.id,
-            "member_name": m.full_name,
-            "email": m.email,
-            "beitrag_monthly": float(m.beitrag_monthly) if m.beitrag_monthly else None,
-            "open_reminders": len(reminders),
-            "overdue_count": overdue_count,
-            "total_due": total_due,
-        })
+        .group_by(Member.id)
+        .order_by(Member.last_name, Member.first_name)
+    )
 
-    return overview
+    return [
+        {
+            "member_id": row.id,
+            "member_name": f"{row.first_name} {row.last_name}",
+            "email": row.email,
+            "beitrag_monthly": float(row.beitrag_monthly) if row.beitrag_monthly else None,
+            "open_reminders": row.open_reminders or 0,
+            "overdue_count": row.overdue_count or 0,
+            "total_due": float(row.total_due or 0),
+        }
+        for row in result
+    ]
@@ -1,21 +1,40 @@
 """
 SEPA-Lastschrift XML Generator für Mitgliedsbeiträge
 Erzeugt SEPA Direct Debit (pain.008.003.02) XML für den Bankupload.
+
+Der Export wird gestreamt (siehe services/sepa_writer): erst der Kopf mit
+Anzahl und Summe aus einer Aggregat-Abfrage, dann die Transaktionen direkt aus
+dem Datenbank-Cursor. Auch bei 10.000+ Lastschriften bleibt der Speicherbedarf
+konstant.
+
+Der Export selbst ändert nichts: Mandate ohne Erstlastschrift-Datum gehen als
+FRST in die Datei, beliebig oft. Erst ``POST /sepa/submitted`` – aufgerufen,
+nachdem die Datei bei der Bank eingereicht wurde – vermerkt das Datum der
+Erstlastschrift; spätere Einzüge laufen dann als RCUR. Ein erneuter Export
+derselben Einziehung bleibt FRST.
+
+Passen nicht alle Lastschriften in eine Datei – Erst- und Folgelastschriften
+gemischt oder mehr als SEPA_MAX_TRANSACTIONS_PER_FILE bzw.
+SEPA_MAX_AMOUNT_PER_FILE –, wird ein ZIP mit einer Datei je Stapel geliefert
+(siehe services/sepa_batches).
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, update, case, or_
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date, datetime, timezone
-import xml.etree.ElementTree as ET
 from decimal import Decimal
+from functools import partial
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.models.member import Member
 from app.core.auth import get_current_user
+from app.services.sepa_batches import BatchPlanner, stream_zip
+from app.services.sepa_writer import Pain008Writer
 
 router = APIRouter(prefix="/sepa", tags=["sepa"])
 
@@ -26,134 +45,103 @@ class SepaExportRequest(BaseModel):
     creditor_bic: str
     creditor_id: str  # SEPA-Gläubiger-ID
     member_ids: Optional[List[int]] = None  # None = all active members with IBAN
+    first_collection_date: Optional[str] = None  # for FRST debits; default: collection_date
+    max_transactions_per_file: Optional[int] = Field(None, ge=1)  # default: SEPA_MAX_TRANSACTIONS_PER_FILE
+    max_amount_per_file: Optional[Decimal] = Field(None, gt=0)  # default: SEPA_MAX_AMOUNT_PER_FILE
+
+
+class SepaSubmitRequest(BaseModel):
+    collection_date: str  # ISO date: YYYY-MM-DD, as in the export
+    member_ids: Optional[List[int]] = None
+    first_collection_date: Optional[str] = None
+
+
+def _collection_dates(collection_date: str, first_collection_date: Optional[str]) -> tuple[date, date]:
+    try:
+        collection = date.fromisoformat(collection_date)
+        first = date.fromisoformat(first_collection_date) if first_collection_date else collection
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiges Datum. Format: YYYY-MM-DD")
+    return collection, first
 
 
-def clean_sepa_string(s: str) -> str:
-    """Remove characters not allowed in SEPA XML."""
-    allowed = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 /-?:().,'+")
-    return "".join(c for c in s if c in allowed or c in "äöüÄÖÜß").strip()[:140]
+SEPA_BATCH_SIZE = 1000
 
 
-def format_amount(amount: Decimal) -> str:
-    return f"{float(amount):.2f}"
+def _sepa_conditions(user_id: int, member_ids: Optional[List[int]]) -> list:
+    """Members marked ready on save: active, valid IBAN and a positive effective fee."""
+    conditions = [Member.user_id == user_id, Member.sepa_ready.is_(True)]
+    if member_ids:
+        conditions.append(Member.id.in_(member_ids))
+    return conditions
 
 
-def generate_sepa_xml(
+def _new_writer(
     user: User,
-    members: list,
     creditor_iban: str,
     creditor_bic: str,
     creditor_id: str,
     collection_date: date,
-) -> str:
-    """Generate SEPA Direct Debit XML (pain.008.003.02)."""
+    sequence_type: str = "RCUR",
+    msg_suffix: str = "",
+) -> Pain008Writer:
     now = datetime.now(timezone.utc)
-    msg_id = f"VK-{now.strftime('%Y%m%d%H%M%S')}"
-    creation_dt = now.strftime("%Y-%m-%dT%H:%M:%S")
-
-    # Filter members with IBAN and beitrag
-    valid_members = [
-        m for m in members
-        if m.iban and m.beitrag_monthly and m.beitrag_monthly > 0
-    ]
-
-    if not valid_members:
-        raise ValueError("Keine Mitglieder mit IBAN und Beitrag gefunden")
-
-    total_amount = sum(m.beitrag_monthly for m in valid_members)
-    nb_txs = len(valid_members)
-
-    creditor_name = clean_sepa_string(user.organization_name or user.name or "Verein")
-
-    # Build XML
-    ns = "urn:iso:std:iso:20022:tech:xsd:pain.008.003.02"
-    root = ET.Element("Document", xmlns=ns)
-    cdd = ET.SubElement(root, "CstmrDrctDbtInitn")
-
-    # Group Header
-    grp_hdr = ET.SubElement(cdd, "GrpHdr")
-    ET.SubElement(grp_hdr, "MsgId").text = msg_id
-    ET.SubElement(grp_hdr, "CreDtTm").text = creation_dt
-    ET.SubElement(grp_hdr, "NbOfTxs").text = str(nb_txs)
-    ET.SubElement(grp_hdr, "CtrlSum").text = format_amount(total_amount)
-    initg_pty = ET.SubElement(grp_hdr, "InitgPty")
-    ET.SubElement(initg_pty, "Nm").text = creditor_name
-
-    # Payment Info
-    pmt_inf = ET.SubElement(cdd, "PmtInf")
-    ET.SubElement(pmt_inf, "PmtInfId").text = f"{msg_id}-PMT"
-    ET.SubElement(pmt_inf, "PmtMtd").text = "DD"
-    ET.SubElement(pmt_inf, "NbOfTxs").text = str(nb_txs)
-    ET.SubElement(pmt_inf, "CtrlSum").text = format_amount(total_amount)
-
-    pmt_tp_inf = ET.SubElement(pmt_inf, "PmtTpInf")
-    svc_lvl = ET.SubElement(pmt_tp_inf, "SvcLvl")
-    ET.SubElement(svc_lvl, "Cd").text = "SEPA"
-    lcl_instrm = ET.SubElement(pmt_tp_inf, "LclInstrm")
-    ET.SubElement(lcl_instrm, "Cd").text = "CORE"
-    ET.SubElement(pmt_tp_inf, "SeqTp").text = "RCUR"
-
-    ET.SubElement(pmt_inf, "ReqdColltnDt").text = collection_date.isoformat()
-
-    # Creditor
-    cdtr = ET.SubElement(pmt_inf, "Cdtr")
-    ET.SubElement(cdtr, "Nm").text = creditor_name
-
-    cdtr_acct = ET.SubElement(pmt_inf, "CdtrAcct")
-    cdtr_id = ET.SubElement(cdtr_acct, "Id")
-    ET.SubElement(cdtr_id, "IBAN").text = creditor_iban.replace(" ", "")
-
-    cdtr_agt = ET.SubElement(pmt_inf, "CdtrAgt")
-    fin_instn_id = ET.SubElement(cdtr_agt, "FinInstnId")
-    ET.SubElement(fin_instn_id, "BIC").text = creditor_bic
-
-    # Transactions
-    for i, member in enumerate(valid_members, 1):
-        tx = ET.SubElement(pmt_inf, "DrctDbtTxInf")
-        pmt_id = ET.SubElement(tx, "PmtId")
-        ET.SubElement(pmt_id, "EndToEndId").text = f"BEITRAG-{member.id}-{collection_date.strftime('%Y%m')}"
-
-        amt = ET.SubElement(tx, "InstdAmt", Ccy="EUR")
-        amt.text = format_amount(member.beitrag_monthly)
-
-        drct_dbt_tx = ET.SubElement(tx, "DrctDbtTx")
-        mndt_rltd_inf = ET.SubElement(drct_dbt_tx, "MndtRltdInf")
-        ET.SubElement(mndt_rltd_inf, "MndtId").text = f"MANDAT-{member.id}"
-        ET.SubElement(mndt_rltd_inf, "DtOfSgntr").text = (member.member_since or collection_date).isoformat()
-
-        cdtr_scheme_id = ET.SubElement(drct_dbt_tx, "CdtrSchmeId")
-        cdtr_scheme_id_inner = ET.SubElement(cdtr_scheme_id, "Id")
-        prvt_id = ET.SubElement(cdtr_scheme_id_inner, "PrvtId")
-        othr = ET.SubElement(prvt_id, "Othr")
-        ET.SubElement(othr, "Id").text = creditor_id
-        schme_nm = ET.SubElement(othr, "SchmeNm")
-        ET.SubElement(schme_nm, "Prtry").text = "SEPA"
-
-        # Debtor Agent (no BIC needed for IBAN-only SEPA)
-        dbtr_agt = ET.SubElement(tx, "DbtrAgt")
-        dbtr_fin = ET.SubElement(dbtr_agt, "FinInstnId")
-        ET.SubElement(dbtr_fin, "Othr").text  # empty
-
-        # Debtor
-        dbtr = ET.SubElement(tx, "Dbtr")
-        ET.SubElement(dbtr, "Nm").text = clean_sepa_string(member.full_name)
-
-        dbtr_acct = ET.SubElement(tx, "DbtrAcct")
-        dbtr_acct_id = ET.SubElement(dbtr_acct, "Id")
-        ET.SubElement(dbtr_acct_id, "IBAN").text = member.iban.replace(" ", "")
-
-        # Purpose
-        purp = ET.SubElement(tx, "Purp")
-        ET.SubElement(purp, "Cd").text = "MSVC"
-
-        # Remittance
-        rmt_inf = ET.SubElement(tx, "RmtInf")
-        ET.SubElement(rmt_inf, "Ustrd").text = f"Mitgliedsbeitrag {collection_date.strftime('%B %Y')} {member.member_number or ''}"
-
-    # Convert to string
-    ET.indent(root, space="  ")
-    xml_str = '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding="unicode")
-    return xml_str
+    return Pain008Writer(
+        creditor_name=user.organization_name or user.name or "Verein",
+        creditor_iban=creditor_iban,
+        creditor_bic=creditor_bic,
+        creditor_id=creditor_id,
+        collection_date=collection_date,
+        msg_id=f"VK-{now.strftime('%Y%m%d%H%M%S')}{msg_suffix}",
+        creation_dt=now.strftime("%Y-%m-%dT%H:%M:%S"),
+        sequence_type=sequence_type,
+    )
+
+
+async def _stream_sepa_xml(db: AsyncSession, writer: Pain008Writer, query, nb_txs: int, ctrl_sum: Decimal):
+    """Yield the pain.008 document in chunks of SEPA_BATCH_SIZE transactions read through a server-side cursor."""
+    yield writer.start(nb_txs, ctrl_sum).encode("utf-8")
+
+    result = await db.stream(query.execution_options(yield_per=SEPA_BATCH_SIZE))
+    async for rows in result.partitions():
+        yield "".join(
+            writer.transaction(member_id, f"{first_name} {last_name}", iban, amount, member_since, member_number)
+            for member_id, first_name, last_name, iban, amount, member_since, member_number in rows
+        ).encode("utf-8")
+
+    yield writer.end().encode("utf-8")
+
+
+def _render_batch(writer: Pain008Writer, batch: dict) -> bytes:
+    """One complete pain.008 file for a planned batch (runs in a worker thread)."""
+    parts = [writer.start(batch["nb_txs"], batch["ctrl_sum"])]
+    parts.extend(
+        writer.transaction(member_id, f"{first_name} {last_name}", iban, amount, member_since, member_number)
+        for _, member_id, first_name, last_name, iban, amount, member_since, member_number in batch["items"]
+    )
+    parts.append(writer.end())
+    return "".join(parts).encode("utf-8")
+
+
+async def _batch_files(db: AsyncSession, query, planner: BatchPlanner, collection_dates: dict, new_writer):
+    """Plan batches while reading the cursor and yield (filename, render) for each completed one."""
+
+    def file_for(batch: dict) -> tuple[str, partial]:
+        sequence_type = batch["key"]
+        collection_date = collection_dates[sequence_type]
+        writer = new_writer(collection_date, sequence_type, f"-{sequence_type[0]}{batch['number']}")
+        name = f"SEPA-Lastschrift-{collection_date.isoformat()}-{sequence_type}-{batch['number']:03d}.xml"
+        return name, partial(_render_batch, writer, batch)
+
+    result = await db.stream(query.execution_options(yield_per=SEPA_BATCH_SIZE))
+    async for rows in result.partitions():
+        for row in rows:
+            completed = planner.add(row[0], row, row[5])
+            if completed:
+                yield file_for(completed)
+    last = planner.finish()
+    if last:
+        yield file_for(last)
 
 
 @router.post("/export")
@@ -162,52 +150,112 @@ async def export_sepa_xml(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Generate SEPA Direct Debit XML for membership fee collection."""
-    try:
-        collection_date = date.fromisoformat(data.collection_date)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Ungültiges Datum. Format: YYYY-MM-DD")
-
-    # Fetch members
-    query = select(Member).where(
-        Member.user_id == current_user.id,
-        Member.status == "active",
+    """
+    Generate SEPA Direct Debit XML for membership fee collection.
+    Returns a single XML file, or a ZIP with one file per batch if the debits need several.
+    Read-only: mandates not yet used are exported as FRST until POST /sepa/submitted marks them.
+    """
+    collection_date, first_collection_date = _collection_dates(data.collection_date, data.first_collection_date)
+
+    max_transactions = data.max_transactions_per_file or settings.SEPA_MAX_TRANSACTIONS_PER_FILE
+    max_amount = data.max_amount_per_file or (
+        Decimal(str(settings.SEPA_MAX_AMOUNT_PER_FILE)) if settings.SEPA_MAX_AMOUNT_PER_FILE else None
     )
-    if data.member_ids:
-        query = query.where(Member.id.in_(data.member_ids))
-
-    result = await db.execute(query.order_by(Member.last_name))
-    members = result.scalars().all()
-
-    valid_members = [m for m in members if m.iban and m.beitrag_monthly and m.beitrag_monthly > 0]
+    collection_dates = {"FRST": first_collection_date, "RCUR": collection_date}
+    conditions = _sepa_conditions(current_user.id, data.member_ids)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Header totals and streamed rows must come from the same snapshot,
+        # or a concurrent member edit yields a file the bank rejects
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    # Unused mandates are collected as FRST on first_collection_date; so are mandates
+    # submitted for this collection, which keeps a repeated export identical
+    sequence_type = case(
+        (
+            or_(
+                Member.sepa_first_collection_date.is_(None),
+                Member.sepa_first_collection_date >= first_collection_date,
+            ),
+            "FRST",
+        ),
+        else_="RCUR",
+    ).label("sequence_type")
+
+    # NbOfTxs/CtrlSum go into the header, before the first transaction
+    groups = (
+        await db.execute(
+            select(sequence_type, func.count(Member.id), func.sum(Member.beitrag_effective))
+            .where(*conditions)
+            .group_by(sequence_type)
+        )
+    ).all()
 
-    if not valid_members:
+    if not groups:
         raise HTTPException(
             status_code=400,
             detail="Keine aktiven Mitglieder mit IBAN und Monatsbeitrag gefunden. "
                    "Bitte hinterlegen Sie IBAN und Beitrag bei den Mitgliedern."
         )
 
-    try:
-        xml_content = generate_sepa_xml(
-            user=current_user,
-            members=valid_members,
-            creditor_iban=data.creditor_iban,
-            creditor_bic=data.creditor_bic,
-            creditor_id=data.creditor_id,
-            collection_date=collection_date,
+    columns = (
+        Member.id,
+        Member.first_name,
+        Member.last_name,
+        Member.sepa_iban,
+        Member.beitrag_effective,
+        Member.member_since,
+        Member.member_number,
+    )
+    new_writer = partial(_new_writer, current_user, data.creditor_iban, data.creditor_bic, data.creditor_id)
+
+    single_type, nb_txs, ctrl_sum = groups[0]
+    if len(groups) == 1 and nb_txs <= max_transactions and (max_amount is None or ctrl_sum <= max_amount):
+        writer = new_writer(collection_dates[single_type], single_type)
+        query = select(*columns).where(*conditions).order_by(Member.last_name, Member.id)
+        filename = f"SEPA-Lastschrift-{collection_date.strftime('%Y-%m')}.xml"
+        return StreamingResponse(
+            _stream_sepa_xml(db, writer, query, nb_txs, ctrl_sum),
+            media_type="application/xml",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
 
-    filename = f"SEPA-Lastschrift-{collection_date.strftime('%Y-%m')}.xml"
-    return Response(
-        content=xml_content,
-        media_type="application/xml",
+    # Several files: rows arrive grouped by sequence type so each batch is contiguous
+    query = (
+        select(sequence_type, *columns)
+        .where(*conditions)
+        .order_by(sequence_type, Member.last_name, Member.id)
+    )
+    files = _batch_files(db, query, BatchPlanner(max_transactions, max_amount), collection_dates, new_writer)
+    filename = f"SEPA-Lastschrift-{collection_date.strftime('%Y-%m')}.zip"
+    return StreamingResponse(
+        stream_zip(files, settings.SEPA_EXPORT_CONCURRENCY),
+        media_type="application/zip",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+@router.post("/submitted")
+async def mark_sepa_submitted(
+    data: SepaSubmitRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Record that the exported file was submitted to the bank: mandates without a
+    first debit get first_collection_date, so later collections are RCUR.
+    """
+    _, first_collection_date = _collection_dates(data.collection_date, data.first_collection_date)
+    result = await db.execute(
+        update(Member)
+        .where(*_sepa_conditions(current_user.id, data.member_ids), Member.sepa_first_collection_date.is_(None))
+        .values(sepa_first_collection_date=first_collection_date)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return {"marked": result.rowcount}
+
+
 @router.get("/preview")
 async def preview_sepa_members(
     current_user: User = Depends(get_current_user),
@@ -215,26 +263,37 @@ async def preview_sepa_members(
 ):
     """Preview which members would be included in SEPA export."""
     result = await db.execute(
-        select(Member).where(
+        select(
+            Member.id,
+            Member.first_name,
+            Member.last_name,
+            Member.member_number,
+            Member.iban,
+            Member.sepa_iban,
+            Member.beitrag_effective,
+            Member.sepa_ready,
+        ).where(
             Member.user_id == current_user.id,
             Member.status == "active",
         ).order_by(Member.last_name)
     )
-    members = result.scalars().all()
+    members = result.all()
 
     return {
         "total_members": len(members),
         "members_with_iban": [
             {
                 "id": m.id,
-                "name": m.full_name,
+                "name": f"{m.first_name} {m.last_name}",
                 "member_number": m.member_number,
                 "iban": f"****{m.iban[-4:]}" if m.iban else None,
-                "beitrag_monthly": float(m.beitrag_monthly) if m.beitrag_monthly else None,
+                "beitrag_monthly": float(m.beitrag_effective) if m.beitrag_effective else None,
                 "has_iban": bool(m.iban),
-                "has_beitrag": bool(m.beitrag_monthly and m.beitrag_monthly > 0),
+                "iban_valid": m.sepa_iban is not None,
+                "has_beitrag": bool(m.beitrag_effective and m.beitrag_effective > 0),
+                "ready": m.sepa_ready,
             }
             for m in members
         ],
-        "ready_for_sepa": sum(1 for m in members if m.iban and m.beitrag_monthly and m.beitrag_monthly > 0),
+        "ready_for_sepa": sum(1 for m in members if m.sepa_ready),
     }
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, case, tuple_
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from decimal import Decimal, InvalidOperation
-from datetime import date, timedelta
+from decimal import Decimal
+from datetime import date
+import base64
+import binascii
 import csv
 import io
 
@@ -14,26 +17,58 @@ from app.models.transaction import Transaction
 from app.schemas.transaction import (
     TransactionCreate, TransactionRead, TransactionUpdate,
     CategoryCreate, CategoryRead, CategoryUpdate, TransactionStats,
+    TransactionBatchRequest, TransactionBatchResult,
 )
 from app.models.category import Category
 from app.core.auth import get_current_user, get_premium_user
 from app.services.pdf_service import generate_jahresabschluss_pdf
+from app.services.pdf_executor import render_pdf
+from app.services.pdf_cache import pdf_cache, transactions_fingerprint
+from app.services.transaction_import import import_transactions, ImportFormatError
+from app.services.transaction_batch import apply_batch
+from app.services.category_breakdown import category_breakdown
+from app.config import settings
 from app.services.audit_service import audit
+from app.services.aggregate_service import (
+    AggregateDelta, track_created, track_deleted, monthly_totals, add_months,
+)
+from app.models.transaction_total import TransactionMonthlyTotal
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 
+def _encode_cursor(transaction: Transaction) -> str:
+    raw = f"{transaction.transaction_date.isoformat()}:{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+
+
 @router.get("", response_model=List[TransactionRead])
 async def list_transactions(
+    response: Response,
     type: Optional[str] = Query(default=None),
     category: Optional[str] = Query(default=None),
     date_from: Optional[date] = Query(default=None),
     date_to: Optional[date] = Query(default=None),
     limit: int = Query(default=100, le=500),
     offset: int = Query(default=0),
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor of the previous page"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Newest bookings first, ordered by (transaction_date, id) so the order is stable.
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one (keyset
+    pagination, constant cost at any depth); `offset` is kept for existing clients.
+    """
     query = select(Transaction).where(Transaction.user_id == current_user.id)
     if type:
         query = query.where(Transaction.type == type)
@@ -43,9 +78,21 @@ async def list_transactions(
         query = query.where(Transaction.transaction_date >= date_from)
     if date_to:
         query = query.where(Transaction.transaction_date <= date_to)
-    query = query.order_by(Transaction.transaction_date.desc()).limit(limit).offset(offset)
+    if cursor:
+        cursor_date, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(Transaction.transaction_date, Transaction.id) < tuple_(cursor_date, cursor_id)
+        )
+    else:
+        query = query.offset(offset)
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc()).limit(limit + 1)
     result = await db.execute(query)
-    return result.scalars().all()
+    transactions = result.scalars().all()
+
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(transactions[-1])
+    return transactions
 
 
 @router.post("", response_model=TransactionRead, status_code=status.HTTP_201_CREATED)
@@ -56,6 +103,7 @@ async def create_transaction(
 ):
     transaction = Transaction(user_id=current_user.id, **transaction_data.model_dump())
     db.add(transaction)
+    await track_created(db, transaction)
     await db.commit()
     await db.refresh(transaction)
     await audit(db, current_user.id, "create", "transaction", transaction.id, f"{transaction.description} ({transaction.amount}€)")
@@ -71,84 +119,95 @@ async def get_stats(
     today = date.today()
     month_start = date(today.year, today.month, 1)
 
-    # Total stats
-    income_result = await db.execute(
-        select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "income",
-        )
-    )
-    expense_result = await db.execute(
-        select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-        )
-    )
-    month_income_result = await db.execute(
-        select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "income",
-            Transaction.transaction_date >= month_start,
-        )
-    )
-    month_expense_result = await db.execute(
-        select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-            Transaction.transaction_date >= month_start,
+    # One grouped read over the pre-summed monthly buckets (see aggregate_service)
+    result = await db.execute(
+        select(
+            TransactionMonthlyTotal.type,
+            func.sum(TransactionMonthlyTotal.total_amount),
+            func.sum(TransactionMonthlyTotal.transaction_count),
+            func.sum(case(
+                (TransactionMonthlyTotal.month == month_start, TransactionMonthlyTotal.total_amount),
+                else_=0,
+            )),
         )
+        .where(TransactionMonthlyTotal.user_id == current_user.id)
+        .group_by(TransactionMonthlyTotal.type)
     )
-    count_result = await db.execute(
-        select(func.count(Transaction.id)).where(Transaction.user_id == current_user.id)
-    )
-
-    total_income = income_result.scalar() or Decimal("0")
-    total_expense = expense_result.scalar() or Decimal("0")
+    totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    month_totals = {"income": Decimal("0"), "expense": Decimal("0")}
+    transaction_count = 0
+    for type_, total, count, month_total in result.all():
+        totals[type_] = Decimal(str(total or 0))
+        month_totals[type_] = Decimal(str(month_total or 0))
+        transaction_count += count or 0
 
     return TransactionStats(
-        total_income=total_income,
-        total_expense=total_expense,
-        balance=total_income - total_expense,
-        month_income=month_income_result.scalar() or Decimal("0"),
-        month_expense=month_expense_result.scalar() or Decimal("0"),
-        transaction_count=count_result.scalar() or 0,
+        total_income=totals["income"],
+        total_expense=totals["expense"],
+        balance=totals["income"] - totals["expense"],
+        month_income=month_totals["income"],
+        month_expense=month_totals["expense"],
+        transaction_count=transaction_count,
     )
 
 
+DATEV_BATCH_SIZE = 1000
+DATEV_HEADER = ["Datum", "Belegnummer", "Buchungstext", "Betrag", "Soll/Haben", "Kategorie", "Notiz"]
+
+
+async def _stream_datev_csv(db: AsyncSession, query):
+    """Yield the DATEV CSV in chunks of DATEV_BATCH_SIZE rows read through a server-side cursor."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";", quoting=csv.QUOTE_ALL)
+
+    # BOM + header go out before the query runs, so the download starts immediately
+    writer.writerow(DATEV_HEADER)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    result = await db.stream(query.execution_options(yield_per=DATEV_BATCH_SIZE))
+    async for rows in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [
+                tx_date.strftime("%d.%m.%Y"),
+                receipt_number or "",
+                description,
+                str(amount).replace(".", ","),
+                "H" if type_ == "income" else "S",
+                category or "",
+                notes or "",
+            ]
+            for tx_date, receipt_number, description, amount, type_, category, notes in rows
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+
 @router.get("/export/datev")
 async def export_datev(
     year: int = Query(default=None),
     current_user: User = Depends(get_premium_user),
     db: AsyncSession = Depends(get_db),
 ):
-    query = select(Transaction).where(Transaction.user_id == current_user.id)
+    query = select(
+        Transaction.transaction_date,
+        Transaction.receipt_number,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.type,
+        Transaction.category,
+        Transaction.notes,
+    ).where(Transaction.user_id == current_user.id)
     if year:
         query = query.where(
             Transaction.transaction_date >= date(year, 1, 1),
             Transaction.transaction_date <= date(year, 12, 31),
         )
-    query = query.order_by(Transaction.transaction_date)
-    result = await db.execute(query)
-    transactions = result.scalars().all()
+    query = query.order_by(Transaction.transaction_date, Transaction.id)
 
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=";", quoting=csv.QUOTE_ALL)
-    writer.writerow(["Datum", "Belegnummer", "Buchungstext", "Betrag", "Soll/Haben", "Kategorie", "Notiz"])
-    for t in transactions:
-        writer.writerow([
-            t.transaction_date.strftime("%d.%m.%Y"),
-            t.receipt_number or "",
-            t.description,
-            str(t.amount).replace(".", ","),
-            "H" if t.type == "income" else "S",
-            t.category or "",
-            t.notes or "",
-        ])
-
-    csv_content = output.getvalue()
     filename = f"datev_export_{year or 'all'}.csv"
-    return Response(
-        content=csv_content.encode("utf-8-sig"),
+    return StreamingResponse(
+        _stream_datev_csv(db, query),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -160,33 +219,27 @@ async def export_jahresabschluss(
     current_user: User = Depends(get_premium_user),
     db: AsyncSession = Depends(get_db),
 ):
-    query = select(Transaction).where(
+    filename = f"jahresabschluss_{year}.pdf"
+    organization_name = current_user.organization_name or current_user.name
+    year_conditions = (
         Transaction.user_id == current_user.id,
         Transaction.transaction_date >= date(year, 1, 1),
         Transaction.transaction_date <= date(year, 12, 31),
-    ).order_by(Transaction.transaction_date)
+    )
+
+    fingerprint = await transactions_fingerprint(db, *year_conditions)
+    cache_key = pdf_cache.key(current_user.id, "jahresabschluss", {"year": year, "organization": organization_name}, fingerprint)
+    cached = pdf_cache.get(cache_key)
+    if cached:
+        return FileResponse(cached, media_type="application/pdf", filename=filename)
+
+    query = select(Transaction).where(*year_conditions).order_by(Transaction.transaction_date)
     result = await db.execute(query)
     transactions = result.scalars().all()
 
-    income_result = await db.execute(
-        select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "income",
-            Transaction.transaction_date >= date(year, 1, 1),
-            Transaction.transaction_date <= date(year, 12, 31),
-        )
-    )
-    expense_result = await db.execute(
-        select(func.sum(Transaction.amount)).where(
-            Transaction.user_id == current_user.id,
-            Transaction.type == "expense",
-            Transaction.transaction_date >= date(year, 1, 1),
-            Transaction.transaction_date <= date(year, 12, 31),
-        )
-    )
-
-    total_income = float(income_result.scalar() or 0)
-    total_expense = float(expense_result.scalar() or 0)
+    buckets = await monthly_totals(db, current_user.id, date(year, 1, 1), date(year, 12, 1))
+    total_income = float(sum(total for (_, type_), (total, _) in buckets.items() if type_ == "income"))
+    total_expense = float(sum(total for (_, type_), (total, _) in buckets.items() if type_ == "expense"))
 
     transaction_list = [
         {
@@ -199,8 +252,10 @@ async def export_jahresabschluss(
         for t in transactions
     ]
 
-    pdf_bytes = generate_jahresabschluss_pdf(
-        organization_name=current_user.organization_name or current_user.name,
+    pdf_bytes = await render_pdf(
+        "jahresabschluss",
+        generate_jahresabschluss_pdf,
+        organization_name=organization_name,
         year=year,
         transactions=transaction_list,
         summary={
@@ -210,11 +265,12 @@ async def export_jahresabschluss(
             "count": len(transactions),
         },
     )
+    pdf_cache.put(cache_key, pdf_bytes)
 
     return Response(
         content=pdf_bytes,
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="jahresabschluss_{year}.pdf"'},
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
@@ -244,152 +300,101 @@ async def import_transactions_csv(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Import transactions from a CSV file."""
+    """
+    Import transactions from a CSV file (streamed, written in bulk chunks).
+    All valid rows are committed together; if the import fails, none are.
+    """
     if not file.filename or not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Nur CSV-Dateien werden unterstützt.")
 
-    content = await file.read()
     try:
-        text = content.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        text = content.decode("latin-1")
-
-    reader = csv.DictReader(io.StringIO(text))
-    if not reader.fieldnames:
-        raise HTTPException(status_code=400, detail="CSV-Datei ist leer oder ungültig.")
-
-    required_fields = {"type", "amount", "description", "transaction_date"}
-    fieldnames_lower = {f.strip().lower() for f in reader.fieldnames}
-    missing = required_fields - fieldnames_lower
-    if missing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Pflichtfelder fehlen: {', '.join(missing)}",
+        return await import_transactions(
+            db,
+            current_user.id,
+            file.file,
+            chunk_size=settings.TRANSACTION_IMPORT_CHUNK_SIZE,
         )
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
-    created = 0
-    errors = []
-    rows = list(reader)
-
-    for row_num, row in enumerate(rows, start=2):
-        row = {k.strip().lower(): v.strip() for k, v in row.items() if k}
-
-        # Validate type
-        type_val = row.get("type", "").strip().lower()
-        if type_val not in ("income", "expense", "einnahme", "ausgabe"):
-            errors.append({"row": row_num, "error": f"Ungültiger Typ '{type_val}'. Erlaubt: income, expense."})
-            continue
-        if type_val == "einnahme":
-            type_val = "income"
-        elif type_val == "ausgabe":
-            type_val = "expense"
-
-        # Validate amount
-        raw_amount = row.get("amount", "").strip()
-        try:
-            amount = Decimal(raw_amount.replace(",", "."))
-            if amount <= 0:
-                raise ValueError
-        except (InvalidOperation, ValueError):
-            errors.append({"row": row_num, "error": f"Ungültiger Betrag '{raw_amount}'."})
-            continue
-
-        # Validate description
-        description = row.get("description", "").strip()
-        if not description:
-            errors.append({"row": row_num, "error": "Beschreibung ist ein Pflichtfeld."})
-            continue
-
-        # Parse date
-        raw_date = row.get("transaction_date", "").strip()
-        transaction_date: date | None = None
-        for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
-            try:
-                transaction_date = date.fromisoformat(raw_date) if fmt == "%Y-%m-%d" else date.strptime(raw_date, fmt).date()
-                break
-            except ValueError:
-                continue
-        if transaction_date is None:
-            errors.append({"row": row_num, "error": f"Ungültiges Datum '{raw_date}'. Verwenden Sie YYYY-MM-DD oder DD.MM.YYYY."})
-            continue
-
-        transaction = Transaction(
-            user_id=current_user.id,
-            type=type_val,
-            amount=amount,
-            description=description,
-            category=row.get("category") or None,
-            transaction_date=transaction_date,
-            receipt_number=row.get("receipt_number") or None,
-            notes=row.get("notes") or None,
+@router.post("/batch", response_model=TransactionBatchResult)
+async def batch_transactions(
+    batch: TransactionBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply many create/update/delete operations in one database transaction."""
+    if len(batch.operations) > settings.TRANSACTION_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Maximal {settings.TRANSACTION_BATCH_MAX_OPERATIONS} Operationen pro Anfrage.",
         )
-        db.add(transaction)
-        created += 1
+    return await apply_batch(db, current_user.id, batch.operations)
 
-    if created > 0:
-        await db.commit()
 
-    return {
-        "success": True,
-        "total": len(rows),
-        "created": created,
-        "skipped": len(errors),
-        "errors": errors,
-    }
+MONTH_NAMES = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun", "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
 
 
 @router.get("/monthly-chart")
 async def get_monthly_chart(
-    months: int = Query(default=6, le=12),
+    months: int = Query(default=6, ge=1, le=120),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Returns monthly income/expense totals for the last N months."""
-    today = date.today()
-    result = []
-
-    for i in range(months - 1, -1, -1):
-        # Calculate month start by going back i months
-        month = today.month - i
-        year = today.year
-        while month <= 0:
-            month += 12
-            year -= 1
-        month_start = date(year, month, 1)
-        # Month end: first day of next month minus one day
-        if month == 12:
-            month_end = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end = date(year, month + 1, 1) - timedelta(days=1)
-
-        income_result = await db.execute(
-            select(func.sum(Transaction.amount)).where(
-                Transaction.user_id == current_user.id,
-                Transaction.type == "income",
-                Transaction.transaction_date >= month_start,
-                Transaction.transaction_date <= month_end,
-            )
-        )
-        expense_result = await db.execute(
-            select(func.sum(Transaction.amount)).where(
-                Transaction.user_id == current_user.id,
-                Transaction.type == "expense",
-                Transaction.transaction_date >= month_start,
-                Transaction.transaction_date <= month_end,
-            )
-        )
+    current_month = date.today().replace(day=1)
+    first_month = add_months(current_month, -(months - 1))
+    buckets = await monthly_totals(db, current_user.id, first_month, current_month)
 
-        month_names = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun", "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
+    result = []
+    for i in range(months):
+        month = add_months(first_month, i)
         result.append({
-            "month": month_names[month - 1],
-            "year": year,
-            "income": float(income_result.scalar() or 0),
-            "expense": float(expense_result.scalar() or 0),
+            "month": MONTH_NAMES[month.month - 1],
+            "year": month.year,
+            "income": float(buckets.get((month, "income"), (0, 0))[0]),
+            "expense": float(buckets.get((month, "expense"), (0, 0))[0]),
         })
 
     return result
 
 
+@router.get("/yearly-chart")
+async def get_yearly_chart(
+    years: int = Query(default=5, ge=1, le=30),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Returns yearly income/expense totals for the last N years (Jahresvergleich)."""
+    this_year = date.today().year
+    first_year = this_year - years + 1
+    buckets = await monthly_totals(db, current_user.id, date(first_year, 1, 1), date(this_year, 12, 1))
+
+    per_year = {year: {"year": year, "income": 0.0, "expense": 0.0, "count": 0} for year in range(first_year, this_year + 1)}
+    for (month, type_), (total, count) in buckets.items():
+        entry = per_year[month.year]
+        if type_ in ("income", "expense"):
+            entry[type_] += float(total)
+        entry["count"] += count
+    for entry in per_year.values():
+        entry["balance"] = entry["income"] - entry["expense"]
+
+    return list(per_year.values())
+
+
+@router.get("/by-category")
+async def get_by_category(
+    type: Optional[str] = Query(default=None),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Returns sum and count per category and type, largest first."""
+    return await category_breakdown(db, current_user.id, type, date_from, date_to)
+
+
 # --- Single transaction routes MUST come after all static routes ---
 # (otherwise FastAPI matches e.g. "/monthly-chart" as transaction_id)
 
@@ -427,10 +432,17 @@ async def update_transaction(
     transaction = result.scalar_one_or_none()
     if not transaction:
         raise HTTPException(status_code=404, detail="Buchung nicht gefunden")
+    cleared = update_data.cleared_required_fields()
+    if cleared:
+        raise HTTPException(status_code=400, detail=f"Pflichtfeld darf nicht leer sein: {', '.join(cleared)}")
 
+    totals_delta = AggregateDelta(current_user.id)
+    totals_delta.remove_transaction(transaction)
     update_dict = update_data.model_dump(exclude_unset=True)
     for key, value in update_dict.items():
         setattr(transaction, key, value)
+    totals_delta.add_transaction(transaction)
+    await totals_delta.apply(db)
 
     await db.commit()
     await db.refresh(transaction)
@@ -456,6 +468,7 @@ async def delete_transaction(
         raise HTTPException(status_code=404, detail="Buchung nicht gefunden")
     tx_id = transaction.id
     tx_desc = transaction.description
+    await track_deleted(db, transaction)
     await db.delete(transaction)
     await db.commit()
     await audit(db, current_user.id, "delete", "transaction", tx_id, tx_desc)
@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM: str = "VereinsKasse <noreply@vereinskasse.de>"
     SMTP_TLS: bool = True
+    SMTP_POOL_SIZE: int = 3  # concurrent sessions per outbox batch
+    SMTP_BULK_SEND_INTERVAL: float = 0.1  # seconds between two messages on one session
+    REMINDER_BULK_MAX: int = 1000
+    EMAIL_TEMPLATE_CACHE_SIZE: int = 1024  # prerendered messages (per template and organization) per worker
 
     # App
     FRONTEND_URL: str = "http://localhost"
@@ -31,6 +35,50 @@ class Settings(BaseSettings):
     FREE_MEMBER_LIMIT: int = 50
     PREMIUM_PRICE: float = 0.99
 
+    # Imports
+    TRANSACTION_IMPORT_CHUNK_SIZE: int = 2000
+    TRANSACTION_BATCH_MAX_OPERATIONS: int = 1000
+    BANK_IMPORT_MAX_BYTES: int = 100 * 1024 * 1024
+    BANK_IMPORT_CHUNK_SIZE: int = 1000
+    BANK_IMPORT_MAX_REPORTED_LINES: int = 5000  # per-line details in the import response
+    BANK_IMPORT_DIR: str = "/tmp/vereinskasse-bank-imports"
+    BANK_IMPORT_JOB_CONCURRENCY: int = 2  # per worker process
+    BANK_IMPORT_JOB_STALE_SECONDS: int = 600
+    BANK_FUZZY_MATCH_THRESHOLD: float = 0.5  # trigram similarity needed for a "fuzzy" member match
+    BANK_FUZZY_MATCH_CANDIDATES: int = 3
+
+    # SEPA export
+    SEPA_MAX_TRANSACTIONS_PER_FILE: int = 5000
+    SEPA_MAX_AMOUNT_PER_FILE: float = 0  # EUR per file, 0 = no limit
+    SEPA_EXPORT_CONCURRENCY: int = 4  # files rendered in parallel per export
+
+    # Periodic jobs (see services/scheduler)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TICK_SECONDS: float = 30.0
+    SCHEDULER_LEASE_SECONDS: int = 600  # a crashed worker's lease is taken over after this
+    SCHEDULER_BATCH_SIZE: int = 1000  # rows per UPDATE
+    SCHEDULER_RUN_RETENTION_DAYS: int = 30
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 900
+    PREMIUM_EXPIRY_INTERVAL_SECONDS: int = 900
+
+    # Email outbox (see services/email_outbox)
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_POLL_SECONDS: float = 10.0  # new mail also wakes the worker right away
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50  # rows claimed per transaction
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: int = 60  # doubled after every failed attempt
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: int = 6 * 3600
+
+    # Dashboard
+    CATEGORY_BREAKDOWN_CACHE_SIZE: int = 4096  # entries per worker, 0 disables the cache
+
+    # PDF rendering (process pool)
+    PDF_RENDER_WORKERS: int = 2
+    PDF_RENDER_QUEUE_LIMIT: int = 16
+    PDF_RENDER_TIMEOUT: float = 60.0
+    PDF_CACHE_DIR: str = "/tmp/vereinskasse-pdf-cache"
+    PDF_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 0 disables the cache
+
     # Stripe
     STRIPE_SECRET_KEY: str = ""
     STRIPE_WEBHOOK_SECRET: str = ""
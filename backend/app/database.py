@@ -28,3 +28,16 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+def dialect_insert(session: AsyncSession, model):
+    """Return an INSERT construct that supports ON CONFLICT for the session's backend.
+
+    PostgreSQL is used in production, SQLite in the test suite; both dialects
+    offer ``on_conflict_do_update`` / ``on_conflict_do_nothing``.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
@@ -1,15 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
+from app.services.pdf_executor import pdf_pool, PdfRenderError
+from app.services import bank_import_jobs, email_outbox, scheduler
 from app.api import auth, users, members, transactions, categories, feedback, admin, gdpr
 from app.api import stripe_api, payment_reminders, events, sepa, member_groups, protocols, documents, donations, inventory, portal, bank
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    scheduler.start()
+    email_outbox.start()
     yield
+    await email_outbox.shutdown()
+    await scheduler.shutdown()
+    await bank_import_jobs.shutdown()
+    pdf_pool.shutdown()
 
 
 app = FastAPI(
@@ -29,11 +38,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+
+@app.exception_handler(PdfRenderError)
+async def pdf_render_error_handler(request: Request, exc: PdfRenderError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+
 # API Routes
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
+# Before members: /members/payment-overview would otherwise match /members/{member_id}
+app.include_router(payment_reminders.router, prefix="/api/v1")
 app.include_router(members.router, prefix="/api/v1")
 app.include_router(transactions.router, prefix="/api/v1")
 app.include_router(categories.router, prefix="/api/v1")
@@ -41,7 +59,6 @@ app.include_router(feedback.router, prefix="/api/v1")
 app.include_router(admin.router, prefix="/api/v1")
 app.include_router(gdpr.router, prefix="/api/v1")
 app.include_router(stripe_api.router, prefix="/api/v1")
-app.include_router(payment_reminders.router, prefix="/api/v1")
 app.include_router(events.router, prefix="/api/v1")
 app.include_router(sepa.router, prefix="/api/v1")
 app.include_router(member_groups.router, prefix="/api/v1")
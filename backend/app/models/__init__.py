@@ -1,6 +1,7 @@
 from app.models.user import User
 from app.models.member import Member
 from app.models.transaction import Transaction
+from app.models.transaction_total import TransactionMonthlyTotal
 from app.models.category import Category
 from app.models.payment_reminder import PaymentReminder
 from app.models.feedback import Feedback
@@ -11,11 +12,16 @@ from app.models.member_group import MemberGroup
 from app.models.protocol import Protocol
 from app.models.document import VereinsDocument
 from app.models.inventory import InventoryItem
+from app.models.bank_line import BankLineFingerprint
+from app.models.bank_import_job import BankImportJob, BankImportJobLine
+from app.models.bank_format_profile import BankFormatProfile
+from app.models.scheduled_job import ScheduledJob, ScheduledJobRun
 
 __all__ = [
     "User",
     "Member",
     "Transaction",
+    "TransactionMonthlyTotal",
     "Category",
     "PaymentReminder",
     "Feedback",
@@ -27,4 +33,10 @@ __all__ = [
     "Protocol",
     "VereinsDocument",
     "InventoryItem",
+    "BankLineFingerprint",
+    "BankImportJob",
+    "BankImportJobLine",
+    "BankFormatProfile",
+    "ScheduledJob",
+    "ScheduledJobRun",
 ]
@@ -0,0 +1,26 @@
+from sqlalchemy import String, Integer, ForeignKey, Text, DateTime, JSON, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from datetime import datetime
+from app.database import Base
+
+
+class BankFormatProfile(Base):
+    """Detected CSV layout of one bank export, reused by later imports (see bank_profiles)."""
+    __tablename__ = "bank_format_profiles"
+    __table_args__ = (
+        UniqueConstraint("user_id", "signature", name="uq_bank_format_profiles_user_signature"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    signature: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of encoding, delimiter, header
+    encoding: Mapped[str] = mapped_column(String(20), nullable=False)
+    delimiter: Mapped[str] = mapped_column(String(1), nullable=False)
+    header: Mapped[str] = mapped_column(Text, nullable=False)
+    columns: Mapped[dict] = mapped_column(JSON, nullable=False)  # field -> column index or null
+    date_format: Mapped[str] = mapped_column(String(20), nullable=False)
+    decimal_style: Mapped[str] = mapped_column(String(2), nullable=False)  # "de" (1.234,56) / "en" (1,234.56)
+    use_count: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,42 @@
+from sqlalchemy import String, Integer, ForeignKey, Boolean, BigInteger, Text, DateTime, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from datetime import datetime
+from typing import Optional
+from app.database import Base
+
+
+class BankImportJob(Base):
+    """A bank statement import running in the background (see bank_import_jobs)."""
+    __tablename__ = "bank_import_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(20), default="queued", nullable=False)  # queued/running/completed/failed
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    format: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # csv/camt053/mt940
+    add_to_kassenbuch: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    file_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)  # removed when done
+    total_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    processed_bytes: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    imported: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    member_matches: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    kassenbuch_added: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    skipped: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class BankImportJobLine(Base):
+    """Per-line result of a bank import job, in file order."""
+    __tablename__ = "bank_import_job_lines"
+    __table_args__ = (
+        Index("ix_bank_import_job_lines_job_line", "job_id", "line_no"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    job_id: Mapped[int] = mapped_column(Integer, ForeignKey("bank_import_jobs.id", ondelete="CASCADE"), nullable=False)
+    line_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False)  # same fields as BankTxnOut
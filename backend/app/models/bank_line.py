@@ -0,0 +1,23 @@
+from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, DateTime, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Optional
+from app.database import Base
+
+
+class BankLineFingerprint(Base):
+    """One bank statement line that was booked into the Kassenbuch (see bank_dedupe)."""
+    __tablename__ = "bank_line_fingerprints"
+    __table_args__ = (
+        UniqueConstraint("user_id", "fingerprint", name="uq_bank_line_fingerprints_user_fingerprint"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 hex
+    booking_date: Mapped[date] = mapped_column(Date, nullable=False)
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    transaction_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text, DateTime
+from sqlalchemy import String, Integer, ForeignKey, Text, DateTime, LargeBinary, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -7,12 +7,26 @@ from app.database import Base
 
 
 class EmailLog(Base):
+    """Outbox row of an email; pending rows are delivered by the outbox worker (see email_outbox)."""
     __tablename__ = "email_log"
+    __table_args__ = (
+        Index("ix_email_log_pending_next_attempt", "next_attempt_at", postgresql_where=text("status = 'pending'")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     recipient: Mapped[str] = mapped_column(String(255), nullable=False)
     subject: Mapped[str] = mapped_column(String(500), nullable=False)
     status: Mapped[str] = mapped_column(String(50), default="pending", nullable=False)  # pending/sent/failed
+    html_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # cleared once sent
+    text_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attachment: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    attachment_filename: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # The reminder is marked as sent once this email is delivered
+    payment_reminder_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("payment_reminders.id", ondelete="SET NULL"), nullable=True, index=True,
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,14 +1,53 @@
-from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Text, DateTime
+import re
+import unicodedata
+from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Text, DateTime, Boolean, Index, text, event, select, update, and_, literal
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime, date
 from typing import Optional, List
 from decimal import Decimal
 from app.database import Base
+from app.models.member_group import MemberGroup
+
+_TRANSLITERATION = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+
+
+def normalize_member_name(name: Optional[str]) -> str:
+    """Lower-case ASCII words: "Müller, Hans-Jürgen" -> "mueller hans juergen"."""
+    name = unicodedata.normalize("NFC", name or "").lower().translate(_TRANSLITERATION)
+    name = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", name))
+
+
+# IBAN lengths of the SEPA countries (ISO 13616 registry)
+IBAN_LENGTHS = {
+    "AD": 24, "AT": 20, "BE": 16, "BG": 22, "CH": 21, "CY": 28, "CZ": 24, "DE": 22, "DK": 18,
+    "EE": 20, "ES": 24, "FI": 18, "FR": 27, "GB": 22, "GI": 23, "GR": 27, "HR": 21, "HU": 28,
+    "IE": 22, "IS": 26, "IT": 27, "LI": 21, "LT": 20, "LU": 20, "LV": 21, "MC": 27, "MT": 31,
+    "NL": 18, "NO": 15, "PL": 28, "PT": 25, "RO": 24, "SE": 24, "SI": 19, "SK": 24, "SM": 27,
+    "VA": 22,
+}
+
+
+def normalize_iban(raw: Optional[str]) -> Optional[str]:
+    """Compact upper-case IBAN if it is a SEPA IBAN passing the mod-97 check, else None."""
+    iban = re.sub(r"\s", "", raw or "").upper()
+    if IBAN_LENGTHS.get(iban[:2]) != len(iban) or not re.fullmatch(r"[A-Z]{2}\d{2}[A-Z0-9]+", iban):
+        return None
+    digits = "".join(str(int(c, 36)) for c in iban[4:] + iban[:4])
+    return iban if int(digits) % 97 == 1 else None
 
 
 class Member(Base):
     __tablename__ = "members"
+    __table_args__ = (
+        Index("ix_members_user_status_name", "user_id", "status", "last_name", "first_name"),
+        Index("ix_members_user_iban", "user_id", "iban", postgresql_where=text("iban IS NOT NULL")),
+        # SEPA preview/export: ready members of a tenant in export order
+        Index("ix_members_user_sepa_ready", "user_id", "last_name", "id", postgresql_where=text("sepa_ready")),
+        # ix_members_search_name_trgm (GIN, gin_trgm_ops) is created by migration 018 only,
+        # because it needs the pg_trgm extension
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -21,7 +60,14 @@ class Member(Base):
     status: Mapped[str] = mapped_column(String(50), default="active", nullable=False)
     beitrag_monthly: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
     iban: Mapped[Optional[str]] = mapped_column(String(34), nullable=True)
+    # SEPA readiness, derived on every save (see _set_sepa_readiness)
+    sepa_iban: Mapped[Optional[str]] = mapped_column(String(34), nullable=True)  # normalize_iban(iban)
+    beitrag_effective: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)  # group override or own fee
+    sepa_ready: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"), nullable=False)
+    # Collection date of the first SEPA debit (FRST); later debits are RCUR
+    sepa_first_collection_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    search_name: Mapped[Optional[str]] = mapped_column(String(511), nullable=True)  # normalize_member_name(full_name)
     group_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("member_groups.id", ondelete="SET NULL"), nullable=True)
     portal_token: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, unique=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -36,3 +82,41 @@ class Member(Base):
     @property
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
+
+
+@event.listens_for(Member, "before_insert")
+@event.listens_for(Member, "before_update")
+def _set_search_name(mapper, connection, member: Member) -> None:
+    member.search_name = normalize_member_name(f"{member.first_name} {member.last_name}")
+
+
+def _is_sepa_ready(status: str, sepa_iban: Optional[str], fee: Optional[Decimal]) -> bool:
+    return status == "active" and sepa_iban is not None and fee is not None and fee > 0
+
+
+@event.listens_for(Member, "before_insert")
+@event.listens_for(Member, "before_update")
+def _set_sepa_readiness(mapper, connection, member: Member) -> None:
+    override = None
+    if member.group_id is not None:
+        override = connection.execute(
+            select(MemberGroup.beitrag_override).where(MemberGroup.id == member.group_id)
+        ).scalar()
+    member.sepa_iban = normalize_iban(member.iban)
+    member.beitrag_effective = override if override is not None else member.beitrag_monthly
+    member.sepa_ready = _is_sepa_ready(member.status or "active", member.sepa_iban, member.beitrag_effective)
+
+
+def group_fee_update(group_id: int, beitrag_override: Optional[Decimal]):
+    """UPDATE re-deriving beitrag_effective and sepa_ready for the members of a group after its override changed."""
+    fee = Member.beitrag_monthly if beitrag_override is None else literal(beitrag_override, Numeric(10, 2))
+    return (
+        update(Member)
+        .where(Member.group_id == group_id)
+        .values(
+            beitrag_effective=fee,
+            # "NULL > 0" is NULL; the IS NOT NULL check makes the AND false instead
+            sepa_ready=and_(Member.status == "active", Member.sepa_iban.is_not(None), fee.is_not(None), fee > 0),
+        )
+        .execution_options(synchronize_session=False)
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Text, DateTime
+from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Text, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime, date
@@ -9,6 +9,10 @@ from app.database import Base
 
 class PaymentReminder(Base):
     __tablename__ = "payment_reminders"
+    __table_args__ = (
+        Index("ix_payment_reminders_member_status_due", "member_id", "status", "due_date"),
+        Index("ix_payment_reminders_open_due", "due_date", postgresql_where=text("status IN ('pending', 'sent')")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     member_id: Mapped[int] = mapped_column(Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,36 @@
+from sqlalchemy import String, Integer, Text, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from datetime import datetime
+from typing import Optional
+from app.database import Base
+
+
+class ScheduledJob(Base):
+    """Schedule and lease of a periodic job; the lease keeps other workers from running it too (see scheduler)."""
+    __tablename__ = "scheduled_jobs"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    next_run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_rows: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+class ScheduledJobRun(Base):
+    """One run of a periodic job with its timing."""
+    __tablename__ = "scheduled_job_runs"
+    __table_args__ = (
+        Index("ix_scheduled_job_runs_job_started", "job_name", "started_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    job_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    worker: Mapped[str] = mapped_column(String(255), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    duration_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # rows changed
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
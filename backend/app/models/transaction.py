@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Text, DateTime
+from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Text, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime, date
@@ -9,6 +9,15 @@ from app.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Kassenbuch list: keyset pagination on (transaction_date, id) per tenant
+        Index("ix_transactions_user_date_id", "user_id", "transaction_date", "id"),
+        Index("ix_transactions_user_type_date", "user_id", "type", "transaction_date"),
+        Index(
+            "ix_transactions_member_date", "member_id", "transaction_date",
+            postgresql_where=text("member_id IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, DateTime, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from datetime import datetime, date
+from decimal import Decimal
+from app.database import Base
+
+
+class TransactionMonthlyTotal(Base):
+    """Pre-summed Kassenbuch totals per tenant, month and type (maintained by aggregate_service)."""
+    __tablename__ = "transaction_monthly_totals"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "type", name="uq_transaction_monthly_totals_bucket"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    month: Mapped[date] = mapped_column(Date, nullable=False)  # first day of the month
+    type: Mapped[str] = mapped_column(String(50), nullable=False)  # income/expense
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, nullable=False)
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)  # bumped on every write
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
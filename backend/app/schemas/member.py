@@ -37,6 +37,8 @@ class MemberUpdate(BaseModel):
 class MemberRead(MemberBase):
     id: int
     user_id: int
+    beitrag_effective: Optional[Decimal] = None
+    sepa_ready: bool = False
     created_at: datetime
     updated_at: datetime
 
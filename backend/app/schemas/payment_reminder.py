@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -28,3 +28,19 @@ class PaymentReminderRead(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class PaymentReminderBulkSend(BaseModel):
+    reminder_ids: List[int] = Field(min_length=1)
+
+
+class PaymentReminderSendResult(BaseModel):
+    reminder_id: int
+    status: str  # queued/skipped
+    error: Optional[str] = None
+
+
+class PaymentReminderBulkSendResult(BaseModel):
+    queued: int
+    skipped: int
+    results: List[PaymentReminderSendResult]
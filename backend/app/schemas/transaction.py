@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal, Union, Annotated
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -31,6 +31,11 @@ class TransactionUpdate(BaseModel):
     receipt_number: Optional[str] = None
     notes: Optional[str] = None
 
+    def cleared_required_fields(self) -> list[str]:
+        """Fields explicitly set to null that the transaction cannot do without."""
+        return [f for f in ("type", "amount", "description", "transaction_date")
+                if f in self.model_fields_set and getattr(self, f) is None]
+
 
 class TransactionRead(TransactionBase):
     id: int
@@ -41,6 +46,48 @@ class TransactionRead(TransactionBase):
     model_config = {"from_attributes": True}
 
 
+class TransactionBatchCreate(BaseModel):
+    op: Literal["create"]
+    data: TransactionCreate
+
+
+class TransactionBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: TransactionUpdate
+
+
+class TransactionBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+TransactionBatchOperation = Annotated[
+    Union[TransactionBatchCreate, TransactionBatchUpdate, TransactionBatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class TransactionBatchRequest(BaseModel):
+    operations: List[TransactionBatchOperation] = Field(min_length=1)
+
+
+class TransactionBatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    success: bool
+    error: Optional[str] = None
+
+
+class TransactionBatchResult(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+    results: List[TransactionBatchItemResult]
+
+
 class CategoryBase(BaseModel):
     name: str
     type: str  # income/expense
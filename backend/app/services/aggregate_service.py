@@ -0,0 +1,226 @@
+"""
+Vorberechnete Kassenbuch-Summen je Verein, Monat und Buchungstyp.
+
+Jede Änderung an einer Buchung wird als Delta in ``transaction_monthly_totals``
+fortgeschrieben. Dashboard-Statistiken lesen dadurch nur noch wenige
+vorsummierte Zeilen statt der kompletten Buchungstabelle.
+
+Abgleich / Neuaufbau (z.B. nach manuellen Datenbankeingriffen):
+
+    python -m app.services.aggregate_service            # nur prüfen
+    python -m app.services.aggregate_service --repair   # Abweichungen korrigieren
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select, func, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.transaction import Transaction
+from app.models.transaction_total import TransactionMonthlyTotal
+
+
+CENT = Decimal("0.01")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    """First day of the month `months` away from d (negative = backwards)."""
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def monthly_totals(
+    db: AsyncSession,
+    user_id: int,
+    first_month: date,
+    last_month: date,
+) -> dict[tuple[date, str], tuple[Decimal, int]]:
+    """Read the buckets of one tenant for an inclusive month range: {(month, type): (sum, count)}."""
+    result = await db.execute(
+        select(
+            TransactionMonthlyTotal.month,
+            TransactionMonthlyTotal.type,
+            TransactionMonthlyTotal.total_amount,
+            TransactionMonthlyTotal.transaction_count,
+        ).where(
+            TransactionMonthlyTotal.user_id == user_id,
+            TransactionMonthlyTotal.month >= month_start(first_month),
+            TransactionMonthlyTotal.month <= month_start(last_month),
+        )
+    )
+    return {
+        (month, type): (Decimal(str(total or 0)), count)
+        for month, type, total, count in result.all()
+    }
+
+
+class AggregateDelta:
+    """Collects amount/count changes per (month, type) for one tenant and writes them in one statement."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._buckets: dict[tuple[date, str], list] = defaultdict(lambda: [Decimal("0"), 0])
+
+    def add(self, transaction_date: date, type: str, amount, count: int = 1) -> None:
+        bucket = self._buckets[(month_start(transaction_date), type)]
+        bucket[0] += Decimal(str(amount))
+        bucket[1] += count
+
+    def add_transaction(self, transaction: Transaction) -> None:
+        self.add(transaction.transaction_date, transaction.type, transaction.amount)
+
+    def remove_transaction(self, transaction: Transaction) -> None:
+        self.add(transaction.transaction_date, transaction.type, -Decimal(str(transaction.amount)), count=-1)
+
+    async def apply(self, db: AsyncSession) -> None:
+        """
+        Upsert all touched buckets. Net-zero buckets are written too, so that the
+        revision counter moves on every booking change (see category_breakdown).
+        Caller must commit.
+        """
+        rows = [
+            {
+                "user_id": self.user_id,
+                "month": month,
+                "type": type,
+                "total_amount": amount,
+                "transaction_count": count,
+            }
+            for (month, type), (amount, count) in self._buckets.items()
+        ]
+        self._buckets.clear()
+        if not rows:
+            return
+
+        stmt = dialect_insert(db, TransactionMonthlyTotal).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "month", "type"],
+            set_={
+                "total_amount": TransactionMonthlyTotal.total_amount + stmt.excluded.total_amount,
+                "transaction_count": TransactionMonthlyTotal.transaction_count + stmt.excluded.transaction_count,
+                "revision": TransactionMonthlyTotal.revision + 1,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+
+async def track_created(db: AsyncSession, transaction: Transaction) -> None:
+    delta = AggregateDelta(transaction.user_id)
+    delta.add_transaction(transaction)
+    await delta.apply(db)
+
+
+async def track_deleted(db: AsyncSession, transaction: Transaction) -> None:
+    delta = AggregateDelta(transaction.user_id)
+    delta.remove_transaction(transaction)
+    await delta.apply(db)
+
+
+# ── Abgleich ──────────────────────────────────────────────────────────────────
+
+async def verify_aggregates(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    repair: bool = False,
+) -> list[dict]:
+    """
+    Recompute all buckets from the raw transactions and compare them with the stored totals.
+    Returns one entry per drifting bucket. With repair=True the stored rows of every
+    drifting tenant are replaced by the recomputed values (caller must commit).
+    """
+    year_col = func.extract("year", Transaction.transaction_date)
+    month_col = func.extract("month", Transaction.transaction_date)
+    expected_query = (
+        select(
+            Transaction.user_id,
+            year_col,
+            month_col,
+            Transaction.type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id),
+        )
+        .group_by(Transaction.user_id, year_col, month_col, Transaction.type)
+    )
+    stored_query = select(
+        TransactionMonthlyTotal.user_id,
+        TransactionMonthlyTotal.month,
+        TransactionMonthlyTotal.type,
+        TransactionMonthlyTotal.total_amount,
+        TransactionMonthlyTotal.transaction_count,
+    )
+    if user_id is not None:
+        expected_query = expected_query.where(Transaction.user_id == user_id)
+        stored_query = stored_query.where(TransactionMonthlyTotal.user_id == user_id)
+
+    expected: dict[tuple, tuple[Decimal, int]] = {}
+    for uid, year, month, type, total, count in (await db.execute(expected_query)).all():
+        key = (uid, date(int(year), int(month), 1), type)
+        expected[key] = (Decimal(str(total or 0)).quantize(CENT), count)
+
+    stored: dict[tuple, tuple[Decimal, int]] = {}
+    for uid, month, type, total, count in (await db.execute(stored_query)).all():
+        if total or count:
+            stored[(uid, month, type)] = (Decimal(str(total)).quantize(CENT), count)
+
+    zero = (Decimal("0"), 0)
+    drift = []
+    for key in sorted(expected.keys() | stored.keys(), key=lambda k: (k[0], k[1], k[2])):
+        exp, got = expected.get(key, zero), stored.get(key, zero)
+        if exp[0] != got[0] or exp[1] != got[1]:
+            drift.append({
+                "user_id": key[0],
+                "month": key[1].isoformat(),
+                "type": key[2],
+                "expected_total": float(exp[0]),
+                "stored_total": float(got[0]),
+                "expected_count": exp[1],
+                "stored_count": got[1],
+            })
+
+    if repair and drift:
+        for uid in sorted({d["user_id"] for d in drift}):
+            await db.execute(delete(TransactionMonthlyTotal).where(TransactionMonthlyTotal.user_id == uid))
+            delta = AggregateDelta(uid)
+            for (key_uid, month, type), (total, count) in expected.items():
+                if key_uid == uid:
+                    delta.add(month, type, total, count)
+            await delta.apply(db)
+
+    return drift
+
+
+async def _main(repair: bool, user_id: Optional[int]) -> int:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        drift = await verify_aggregates(db, user_id=user_id, repair=repair)
+        if repair:
+            await db.commit()
+
+    for d in drift:
+        print(
+            f"user={d['user_id']} month={d['month']} type={d['type']}: "
+            f"expected {d['expected_total']:.2f}/{d['expected_count']}, "
+            f"stored {d['stored_total']:.2f}/{d['stored_count']}"
+        )
+    status = "repaired" if repair else "found"
+    print(f"{len(drift)} drifting bucket(s) {status}.")
+    return 1 if drift and not repair else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify or rebuild transaction_monthly_totals.")
+    parser.add_argument("--repair", action="store_true", help="rewrite drifting tenants from raw transactions")
+    parser.add_argument("--user-id", type=int, default=None, help="limit the check to one tenant")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.repair, args.user_id)))
@@ -1,3 +1,4 @@
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.audit_log import AuditLog
 
@@ -23,3 +24,20 @@ async def audit(
         # Note: caller must commit
     except Exception:
         pass
+
+
+async def audit_many(
+    db: AsyncSession,
+    user_id: int,
+    entries: list[tuple[str, str, int | None, str | None]],
+) -> None:
+    """Write many (action, resource, resource_id, detail) entries in one INSERT. Caller must commit."""
+    if not entries:
+        return
+    await db.execute(
+        insert(AuditLog),
+        [
+            {"user_id": user_id, "action": action, "resource": resource, "resource_id": resource_id, "detail": detail}
+            for action, resource, resource_id, detail in entries
+        ],
+    )
@@ -0,0 +1,97 @@
+"""
+Doppelimport-Schutz für Kontoauszüge.
+
+Jede Bankzeile bekommt einen Fingerprint aus Buchungsdatum, Betrag, IBAN und
+normalisiertem Verwendungszweck. Identische Zeilen innerhalb einer Datei
+(z.B. zwei gleiche Beiträge am selben Tag) werden über ihre laufende Nummer
+unterschieden, sodass ein überlappender Auszug dieselben Fingerprints ergibt.
+
+Fingerprints werden nur für Zeilen gespeichert, die tatsächlich ins Kassenbuch
+übernommen wurden. Pro Import gibt es eine Abfrage für bereits bekannte Zeilen
+und ein ``INSERT ... ON CONFLICT DO NOTHING RETURNING``, das neue Zeilen
+reserviert – parallele Uploads derselben Datei buchen damit nichts doppelt.
+"""
+import hashlib
+from collections import Counter
+from decimal import Decimal
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.bank_line import BankLineFingerprint
+
+LOOKUP_CHUNK_SIZE = 5000  # keeps IN lists well below driver parameter limits
+
+
+def normalize_purpose(purpose: str | None) -> str:
+    return " ".join((purpose or "").lower().split())
+
+
+class LineFingerprinter:
+    """Fingerprints bank lines of one file in order; keeps the per-key occurrence count."""
+
+    def __init__(self):
+        self._occurrences: Counter = Counter()
+
+    def __call__(self, line: dict) -> str:
+        key = "|".join([
+            line["booking_date"].isoformat(),
+            str(Decimal(line["amount"]).quantize(Decimal("0.01"))),
+            line["iban"] or "",
+            normalize_purpose(line["purpose"]),
+        ])
+        self._occurrences[key] += 1
+        raw = f"{key}|{self._occurrences[key]}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def seen_fingerprints(db: AsyncSession, user_id: int, fingerprints: list[str]) -> set[str]:
+    seen: set[str] = set()
+    unique = list(dict.fromkeys(fingerprints))
+    for start in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+        result = await db.execute(
+            select(BankLineFingerprint.fingerprint).where(
+                BankLineFingerprint.user_id == user_id,
+                BankLineFingerprint.fingerprint.in_(unique[start:start + LOOKUP_CHUNK_SIZE]),
+            )
+        )
+        seen.update(result.scalars())
+    return seen
+
+
+async def claim_lines(db: AsyncSession, user_id: int, lines: list[tuple[str, dict]]) -> set[str]:
+    """Insert (fingerprint, line) pairs; returns the fingerprints this call actually inserted."""
+    if not lines:
+        return set()
+    stmt = (
+        dialect_insert(db, BankLineFingerprint)
+        .on_conflict_do_nothing(index_elements=["user_id", "fingerprint"])
+        .returning(BankLineFingerprint.fingerprint)
+    )
+    result = await db.execute(stmt, [
+        {
+            "user_id": user_id,
+            "fingerprint": fingerprint,
+            "booking_date": line["booking_date"],
+            "amount": line["amount"],
+        }
+        for fingerprint, line in lines
+    ])
+    return set(result.scalars())
+
+
+async def link_transactions(db: AsyncSession, user_id: int, links: dict[str, int]) -> None:
+    """Store the Kassenbuch booking created for each claimed fingerprint."""
+    if not links:
+        return
+    table = BankLineFingerprint.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.user_id == bindparam("_user_id"), table.c.fingerprint == bindparam("_fingerprint"))
+        .values(transaction_id=bindparam("_transaction_id")),
+        [
+            {"_user_id": user_id, "_fingerprint": fingerprint, "_transaction_id": transaction_id}
+            for fingerprint, transaction_id in links.items()
+        ],
+    )
@@ -0,0 +1,127 @@
+"""
+Verarbeitung eines Kontoauszugs: Mitglieder zuordnen, Doppelimporte erkennen
+und Eingänge optional ins Kassenbuch übernehmen.
+
+Die Bankzeilen kommen als Stream aus einem Parser (siehe bank_statements) und
+werden in Blöcken verarbeitet. Das Parsen läuft in einem Thread, damit große
+Dateien den Event-Loop nicht blockieren. Pro Block gibt es eine
+Duplikat-Abfrage, eine Abfrage für die unscharfe Namenssuche, ein
+Reservierungs-INSERT, einen Flush und den Aggregat-Upsert; danach wird
+``on_chunk`` mit den Zeilenergebnissen aufgerufen. Wann committet wird,
+entscheidet der Aufrufer: der direkte Import einmal am Ende, Hintergrund-Jobs
+(siehe bank_import_jobs) nach jedem Block.
+"""
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+from app.services.aggregate_service import AggregateDelta
+from app.services.bank_dedupe import (
+    LineFingerprinter, seen_fingerprints, claim_lines, link_transactions,
+)
+from app.services.member_matcher import MemberMatcher
+
+
+def _description(line: dict) -> str:
+    parts = [part for part in (line["counterparty"], line["purpose"]) if part]
+    return (" – ".join(parts) if parts else "Bankeingang")[:500]
+
+
+ChunkCallback = Callable[[dict, list[dict]], Awaitable[None]]
+
+
+async def import_statement(
+    db: AsyncSession,
+    user_id: int,
+    lines: Iterator[dict],
+    add_to_kassenbuch: bool,
+    chunk_size: int,
+    on_chunk: ChunkCallback,
+) -> dict:
+    """
+    Match and (optionally) book all lines. After every chunk, on_chunk(summary, line_results)
+    is awaited with the running counts and that chunk's per-line results. Caller must commit.
+    """
+    matcher = await MemberMatcher.load(db, user_id)
+    fingerprinter = LineFingerprinter()
+    summary = {"imported": 0, "member_matches": 0, "kassenbuch_added": 0, "skipped": 0}
+
+    while True:
+        chunk = await asyncio.to_thread(lambda: list(itertools.islice(lines, chunk_size)))
+        if not chunk:
+            break
+        summary["imported"] += len(chunk)
+
+        # Lines booked by an earlier import are reported but never booked again
+        fingerprints = [fingerprinter(line) for line in chunk]
+        seen = await seen_fingerprints(db, user_id, fingerprints)
+        claimed: set[str] = set()
+        if add_to_kassenbuch:
+            claimed = await claim_lines(db, user_id, [
+                (fp, line) for fp, line in zip(fingerprints, chunk)
+                if line["amount"] > 0 and fp not in seen
+            ])
+        created: dict[str, Transaction] = {}
+        totals_delta = AggregateDelta(user_id)
+        results: list[dict] = []
+
+        matches = await matcher.match_lines(db, chunk)
+
+        for fingerprint, line, match in zip(fingerprints, chunk, matches):
+            member, match_type, confidence, candidates = match
+            if member:
+                summary["member_matches"] += 1
+
+            duplicate = fingerprint in seen
+            if fingerprint in claimed:
+                transaction = Transaction(
+                    user_id=user_id,
+                    member_id=member.id if member else None,
+                    type="income",
+                    amount=line["amount"],
+                    description=_description(line),
+                    transaction_date=line["booking_date"],
+                )
+                db.add(transaction)
+                totals_delta.add_transaction(transaction)
+                created[fingerprint] = transaction
+            elif add_to_kassenbuch and line["amount"] > 0:
+                # Claimed by a concurrent import of the same statement
+                duplicate = True
+            if duplicate:
+                summary["skipped"] += 1
+
+            results.append({
+                "booking_date": str(line["booking_date"]),
+                "counterparty": line["counterparty"],
+                "iban": line["iban"],
+                "purpose": line["purpose"],
+                "amount": float(line["amount"]),
+                "currency": line["currency"],
+                "matched_member_id": member.id if member else None,
+                "matched_member_name": member.full_name if member else None,
+                "match_type": match_type or None,
+                "match_confidence": confidence,
+                "match_candidates": [
+                    {
+                        "member_id": member_id,
+                        "member_name": matcher.member_name(member_id),
+                        "score": score,
+                    }
+                    for member_id, score in candidates
+                ],
+                "transaction_created": fingerprint in created,
+                "duplicate": duplicate,
+            })
+
+        if created:
+            await db.flush()
+            await link_transactions(db, user_id, {fp: t.id for fp, t in created.items()})
+            summary["kassenbuch_added"] += len(created)
+        await totals_delta.apply(db)
+        await on_chunk(summary, results)
+
+    return summary
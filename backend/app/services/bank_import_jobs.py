@@ -0,0 +1,194 @@
+"""
+Kontoauszug-Import als Hintergrund-Job.
+
+Der Upload wird nur auf die Platte kopiert und als ``bank_import_jobs``-Zeile
+angelegt; der Request kehrt sofort mit der Job-ID zurück. Ein asyncio-Task im
+selben Prozess verarbeitet die Datei blockweise über ``import_statement`` und
+committet nach jedem Block Buchungen, Zeilenergebnisse und Fortschritt.
+Bricht ein Job ab, bleiben die bereits gebuchten Blöcke erhalten; ein erneuter
+Upload überspringt sie über die Zeilen-Fingerprints (siehe bank_dedupe).
+
+Jobs, deren Fortschritt länger als BANK_IMPORT_JOB_STALE_SECONDS steht (z.B.
+nach einem Neustart des Workers), werden beim nächsten Abruf als fehlgeschlagen
+gemeldet.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.bank_import_job import BankImportJob, BankImportJobLine
+from app.services.bank_import import import_statement
+from app.services.bank_profiles import load_profiles, remember_profile
+from app.services.bank_statements import StatementFormatError, detect_parser
+
+logger = logging.getLogger(__name__)
+
+_tasks: set[asyncio.Task] = set()
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _store_upload(fileobj: BinaryIO) -> tuple[str, int]:
+    directory = Path(settings.BANK_IMPORT_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}.upload"
+    fileobj.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(fileobj, f, length=1024 * 1024)
+    return str(path), path.stat().st_size
+
+
+async def create_job(
+    db: AsyncSession,
+    user_id: int,
+    filename: str,
+    fileobj: BinaryIO,
+    add_to_kassenbuch: bool,
+) -> BankImportJob:
+    """Persist the upload and the job row, then start processing in the background."""
+    file_path, size = await asyncio.to_thread(_store_upload, fileobj)
+    job = BankImportJob(
+        user_id=user_id,
+        filename=filename[:255],
+        add_to_kassenbuch=add_to_kassenbuch,
+        file_path=file_path,
+        total_bytes=size,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    # The job outlives the request, so it gets its own sessions on the same engine
+    sessions = async_sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False)
+    task = asyncio.create_task(run_job(job.id, sessions))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+async def run_job(job_id: int, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.BANK_IMPORT_JOB_CONCURRENCY)
+    async with _slots:
+        async with session_factory() as db:
+            job = await db.get(BankImportJob, job_id)
+            if job is None or job.status != "queued":
+                return
+            file_path = job.file_path
+            try:
+                await _process(db, job)
+            except StatementFormatError as e:
+                await _fail(db, job_id, str(e))
+            except asyncio.CancelledError:
+                await _fail(db, job_id, "Import wurde abgebrochen.")
+                raise
+            except Exception:
+                logger.exception(f"Bank import job {job_id} failed")
+                await _fail(db, job_id, "Import fehlgeschlagen.")
+            finally:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+
+
+async def _process(db: AsyncSession, job: BankImportJob) -> None:
+    job.status = "running"
+    await db.commit()
+
+    with open(job.file_path, "rb") as f:
+        parser = detect_parser(job.filename, f, await load_profiles(db, job.user_id))
+        job.format = parser.name
+        line_no = 0
+
+        async def save_chunk(summary: dict, lines: list[dict]) -> None:
+            nonlocal line_no
+            await db.execute(insert(BankImportJobLine), [
+                {"job_id": job.id, "line_no": line_no + i, "data": line}
+                for i, line in enumerate(lines)
+            ])
+            line_no += len(lines)
+            for key, value in summary.items():
+                setattr(job, key, value)
+            job.processed_bytes = min(f.tell(), job.total_bytes)
+            await db.commit()
+
+        summary = await import_statement(
+            db,
+            job.user_id,
+            parser.iter_lines(f),
+            add_to_kassenbuch=job.add_to_kassenbuch,
+            chunk_size=settings.BANK_IMPORT_CHUNK_SIZE,
+            on_chunk=save_chunk,
+        )
+
+    if not summary["imported"]:
+        raise StatementFormatError("Keine Buchungen in der Datei gefunden.")
+    await remember_profile(db, job.user_id, parser)
+    job.status = "completed"
+    job.processed_bytes = job.total_bytes
+    job.file_path = None
+    job.finished_at = datetime.now(timezone.utc)
+    await db.commit()
+
+
+async def _fail(db: AsyncSession, job_id: int, message: str) -> None:
+    await db.rollback()
+    job = await db.get(BankImportJob, job_id)
+    if job is None:
+        return
+    job.status = "failed"
+    job.error = message
+    job.file_path = None
+    job.finished_at = datetime.now(timezone.utc)
+    await db.commit()
+
+
+async def get_job(db: AsyncSession, user_id: int, job_id: int) -> Optional[BankImportJob]:
+    result = await db.execute(
+        select(BankImportJob).where(BankImportJob.id == job_id, BankImportJob.user_id == user_id)
+    )
+    job = result.scalar_one_or_none()
+    if job is None or job.status not in ("queued", "running"):
+        return job
+
+    updated_at = job.updated_at
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - updated_at > timedelta(seconds=settings.BANK_IMPORT_JOB_STALE_SECONDS):
+        job.status = "failed"
+        job.error = "Import wurde unterbrochen. Bitte die Datei erneut hochladen."
+        job.finished_at = datetime.now(timezone.utc)
+        await db.commit()
+    return job
+
+
+async def get_job_lines(db: AsyncSession, job_id: int, offset: int, limit: int) -> list[dict]:
+    result = await db.execute(
+        select(BankImportJobLine.data)
+        .where(BankImportJobLine.job_id == job_id, BankImportJobLine.line_no >= offset)
+        .order_by(BankImportJobLine.line_no)
+        .limit(limit)
+    )
+    return list(result.scalars())
+
+
+async def wait_for_jobs() -> None:
+    """Wait until all jobs started by this process have finished."""
+    while _tasks:
+        await asyncio.gather(*list(_tasks), return_exceptions=True)
+
+
+async def shutdown() -> None:
+    for task in list(_tasks):
+        task.cancel()
+    await wait_for_jobs()
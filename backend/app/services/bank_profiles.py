@@ -0,0 +1,38 @@
+"""
+Gespeicherte CSV-Formate der Banken eines Vereins.
+
+Der CSV-Parser (siehe bank_statements) erkennt beim ersten Import einer Bank
+das Format und liefert es als Profil; ``remember_profile`` legt es hier ab.
+Folgeimporte laden die Profile des Vereins mit ``load_profiles`` und lesen
+Dateien mit bekannter Kopfzeile ohne erneute Formaterkennung.
+"""
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models.bank_format_profile import BankFormatProfile
+from app.services.bank_statements import StatementParser
+
+PROFILE_FIELDS = ("signature", "encoding", "delimiter", "header", "columns", "date_format", "decimal_style")
+
+
+async def load_profiles(db: AsyncSession, user_id: int) -> list[dict]:
+    result = await db.execute(select(BankFormatProfile).where(BankFormatProfile.user_id == user_id))
+    return [{field: getattr(p, field) for field in PROFILE_FIELDS} for p in result.scalars()]
+
+
+async def remember_profile(db: AsyncSession, user_id: int, parser: StatementParser) -> None:
+    """Store a newly detected CSV profile, or count another use of a stored one. Caller commits."""
+    profile = getattr(parser, "profile", None)
+    if profile is None or profile["decimal_style"] is None:
+        # Without a decimal amount in the sample the style is a guess; detect again next time
+        return
+    stmt = dialect_insert(db, BankFormatProfile).values(
+        user_id=user_id, **{field: profile[field] for field in PROFILE_FIELDS}
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "signature"],
+            set_={"use_count": BankFormatProfile.use_count + 1, "last_used_at": func.now()},
+        )
+    )
@@ -0,0 +1,121 @@
+"""
+Abgleich eines Kontoauszugs mit dem Kassenbuch.
+
+Bankzeilen und Buchungen werden über den vorzeichenbehafteten Betrag
+(Einnahme positiv, Ausgabe negativ) und ein Datumsfenster von ±N Tagen
+zugeordnet. Beide Seiten werden nach (Betrag, Datum) sortiert und in einem
+gemeinsamen Durchlauf verschmolzen (Sort-Merge-Join) – O(n log n) statt eines
+Vergleichs jeder Bankzeile mit jeder Buchung.
+
+Innerhalb eines Betrags wird jede Bankzeile (nach Datum) der frühesten noch
+freien Buchung im Fenster zugeordnet. Bei gleich breiten Fenstern ergibt diese
+Reihenfolge die größtmögliche Zahl an Paaren.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+
+
+def _cents(amount: Decimal) -> int:
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+async def load_bookings(db: AsyncSession, user_id: int, date_from: date, date_to: date) -> list[dict]:
+    """All Kassenbuch bookings of the tenant in [date_from, date_to], in one query."""
+    result = await db.execute(
+        select(
+            Transaction.id,
+            Transaction.type,
+            Transaction.amount,
+            Transaction.transaction_date,
+            Transaction.description,
+            Transaction.member_id,
+        ).where(
+            Transaction.user_id == user_id,
+            Transaction.transaction_date >= date_from,
+            Transaction.transaction_date <= date_to,
+        )
+    )
+    return [
+        {
+            "id": row.id,
+            "type": row.type,
+            "amount": row.amount,
+            "transaction_date": row.transaction_date,
+            "description": row.description,
+            "member_id": row.member_id,
+        }
+        for row in result
+    ]
+
+
+def reconcile(lines: list[dict], bookings: list[dict], window_days: int) -> dict:
+    """
+    Pair bank lines with bookings of the same signed amount at most window_days apart.
+    Returns {"matched": [(line, booking)], "bank_only": [line], "kassenbuch_only": [booking]}.
+    """
+    window = timedelta(days=window_days)
+    bank = sorted(
+        ((_cents(line["amount"]), line["booking_date"], i) for i, line in enumerate(lines)),
+    )
+    book = sorted(
+        (
+            (_cents(abs(b["amount"])) * (-1 if b["type"] == "expense" else 1), b["transaction_date"], b["id"], j)
+            for j, b in enumerate(bookings)
+        ),
+    )
+
+    matched: list[tuple[dict, dict]] = []
+    bank_only: list[dict] = []
+    kassenbuch_only: list[dict] = []
+    i = j = 0
+    while i < len(bank) or j < len(book):
+        if j == len(book) or (i < len(bank) and bank[i][0] < book[j][0]):
+            bank_only.append(lines[bank[i][2]])
+            i += 1
+            continue
+        if i == len(bank) or book[j][0] < bank[i][0]:
+            kassenbuch_only.append(bookings[book[j][3]])
+            j += 1
+            continue
+
+        # Same amount on both sides: sweep both runs by date
+        amount = bank[i][0]
+        while i < len(bank) and bank[i][0] == amount:
+            _, booking_date, line_index = bank[i]
+            while j < len(book) and book[j][0] == amount and book[j][1] < booking_date - window:
+                kassenbuch_only.append(bookings[book[j][3]])
+                j += 1
+            if j < len(book) and book[j][0] == amount and book[j][1] <= booking_date + window:
+                matched.append((lines[line_index], bookings[book[j][3]]))
+                j += 1
+            else:
+                bank_only.append(lines[line_index])
+            i += 1
+        while j < len(book) and book[j][0] == amount:
+            kassenbuch_only.append(bookings[book[j][3]])
+            j += 1
+
+    return {"matched": matched, "bank_only": bank_only, "kassenbuch_only": kassenbuch_only}
+
+
+async def reconcile_statement(db: AsyncSession, user_id: int, lines: list[dict], window_days: int) -> dict:
+    """
+    Reconcile parsed bank lines with the Kassenbuch. Bookings are loaded for the statement period
+    widened by the window; unmatched ones are reported only if they fall inside the period itself.
+    """
+    date_from = min(line["booking_date"] for line in lines)
+    date_to = max(line["booking_date"] for line in lines)
+    window = timedelta(days=window_days)
+    bookings = await load_bookings(db, user_id, date_from - window, date_to + window)
+    result = reconcile(lines, bookings, window_days)
+    result["kassenbuch_only"] = [
+        b for b in result["kassenbuch_only"] if date_from <= b["transaction_date"] <= date_to
+    ]
+    result["date_from"] = date_from
+    result["date_to"] = date_to
+    return result
@@ -0,0 +1,563 @@
+"""
+Kontoauszug-Parser: CSV, CAMT.053 (ISO 20022 XML) und MT940.
+
+Alle Parser lesen die Datei als Stream und liefern normalisierte Bankzeilen
+einzeln aus, der Speicherbedarf hängt damit nicht von der Dateigröße ab:
+
+    {"booking_date": date, "counterparty": str | None, "iban": str | None,
+     "purpose": str | None, "amount": Decimal, "currency": str}
+
+Beträge sind vorzeichenbehaftet (Eingang positiv, Ausgang negativ).
+"""
+import csv
+import hashlib
+import io
+import itertools
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from app.services.transaction_import import detect_encoding
+
+HEADER_SEARCH_LINES = 50
+DATE_FORMATS = ("%d.%m.%Y", "%d.%m.%y", "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y")  # Sparkasse: two-digit year
+
+
+class StatementFormatError(ValueError):
+    """The file cannot be read as a bank statement of the detected format."""
+
+
+def parse_german_decimal(value: str) -> Optional[Decimal]:
+    if not value:
+        return None
+    v = value.strip().replace("\xa0", "").replace(" ", "")
+    v = re.sub(r"[€$£]", "", v)
+    if re.match(r"^-?\d{1,3}(\.\d{3})+(,\d{1,2})?$", v):
+        v = v.replace(".", "").replace(",", ".")
+    elif "," in v and "." not in v:
+        v = v.replace(",", ".")
+    elif "," in v and "." in v and v.index(",") > v.index("."):
+        v = v.replace(",", "")
+    elif "," in v:
+        v = v.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(v)
+    except InvalidOperation:
+        return None
+
+
+def parse_booking_date(value: str) -> Optional[date]:
+    if not value:
+        return None
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _normalize_iban(raw: str) -> Optional[str]:
+    iban = re.sub(r"\s", "", raw or "")
+    return iban if re.match(r"^[A-Z]{2}\d{2}", iban) else None
+
+
+class StatementParser(ABC):
+    """Base class: iter_lines() yields normalized bank lines from a binary file object."""
+
+    name = ""
+
+    @abstractmethod
+    def iter_lines(self, fileobj: BinaryIO) -> Iterator[dict]:
+        ...
+
+    def _text(self, fileobj: BinaryIO) -> io.TextIOWrapper:
+        return io.TextIOWrapper(fileobj, encoding=detect_encoding(fileobj), newline="")
+
+
+# ── CSV (DKB, Sparkasse, VR-Bank, Comdirect, generisch) ──────────────────────
+#
+# Beim ersten Import einer Bank wird das Format einmal erkannt (Kopfzeile,
+# Trennzeichen, Spalten, Datumsformat, Dezimalschreibweise) und als Profil
+# zurückgegeben; bank_profiles speichert es pro Verein. Folgeimporte erkennen
+# die Kopfzeile wieder und lesen mit dem Profil direkt, ohne Sniffer und
+# Spaltensuche. In beiden Fällen parst dieselbe vorkompilierte Zeilenfunktion;
+# nur Zellen, die nicht ins Profil passen, gehen durch die allgemeinen Parser.
+
+PROFILE_SAMPLE_ROWS = 20
+
+
+class _SemicolonDialect(csv.excel):
+    delimiter = ";"
+
+
+def _detect_columns(header: list[str]) -> dict:
+    h = [c.lower().strip() for c in header]
+
+    def find(*candidates) -> Optional[int]:
+        for cand in candidates:
+            for i, col in enumerate(h):
+                if cand in col:
+                    return i
+        return None
+
+    return {
+        "date": find("buchungstag", "buchungsdatum", "datum", "date", "valuta"),
+        "value_date": find("wertstellung", "valutadatum"),
+        "counterparty": find("auftraggeber", "empfänger", "beguenstigter", "begünstigter", "name", "zahlungsempfänger", "payee"),
+        "iban": find("iban", "konto", "account"),
+        "purpose": find("verwendungszweck", "buchungstext", "purpose", "betreff", "reference"),
+        "amount": find("betrag", "amount", "umsatz"),
+        "currency": find("währung", "currency"),
+        "debit": find("soll", "debit", "ausgabe", "belastung"),
+        "credit": find("haben", "credit", "eingang", "gutschrift"),
+    }
+
+
+def _detect_date_format(values: list[str]) -> str:
+    values = [v.strip() for v in values if v.strip()]
+    for fmt in DATE_FORMATS:
+        try:
+            for value in values:
+                datetime.strptime(value, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return DATE_FORMATS[0]
+
+
+def _detect_decimal_style(values: list[str]) -> Optional[str]:
+    """ "de" for 1.234,56, "en" for 1,234.56; None if no sample has decimals."""
+    for value in values:
+        value = value.strip()
+        if re.search(r",\d{1,2}$", value):
+            return "de"
+        if re.search(r"\.\d{1,2}$", value):
+            return "en"
+    return None
+
+
+def _compile_date_parser(fmt: str) -> Callable[[str], Optional[date]]:
+    if fmt == "%d.%m.%Y":
+        def parse(value: str) -> Optional[date]:
+            if len(value) == 10 and value[2] == "." and value[5] == ".":
+                try:
+                    return date(int(value[6:]), int(value[3:5]), int(value[:2]))
+                except ValueError:
+                    pass
+            return parse_booking_date(value)
+    elif fmt == "%d.%m.%y":
+        def parse(value: str) -> Optional[date]:
+            if len(value) == 8 and value[2] == "." and value[5] == ".":
+                try:
+                    year = int(value[6:])
+                    # Same pivot as strptime's %y
+                    return date(year + (2000 if year < 69 else 1900), int(value[3:5]), int(value[:2]))
+                except ValueError:
+                    pass
+            return parse_booking_date(value)
+    elif fmt == "%Y-%m-%d":
+        def parse(value: str) -> Optional[date]:
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                return parse_booking_date(value)
+    else:
+        def parse(value: str) -> Optional[date]:
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                return parse_booking_date(value)
+    return parse
+
+
+_DE_AMOUNT = re.compile(r"^[+-]?(\d{1,3}(\.\d{3})+|\d+)(,\d+)?$")
+_EN_AMOUNT = re.compile(r"^[+-]?(\d{1,3}(,\d{3})+|\d+)(\.\d+)?$")
+
+
+def _compile_amount_parser(style: Optional[str]) -> Callable[[str], Optional[Decimal]]:
+    if style is None:
+        return lambda value: parse_german_decimal(value.replace("+", ""))
+    pattern = _DE_AMOUNT if style == "de" else _EN_AMOUNT
+    table = str.maketrans({".": None, ",": "."}) if style == "de" else str.maketrans({",": None})
+
+    def parse(value: str) -> Optional[Decimal]:
+        # Only cells written in the profile's style take the fast path; "12.50" in a
+        # "de" file must not lose its decimal point
+        if pattern.match(value):
+            return Decimal(value.translate(table))
+        # Currency signs, blanks, unusual grouping, the other decimal style
+        return parse_german_decimal(value.replace("+", ""))
+    return parse
+
+
+def compile_row_parser(profile: dict) -> Callable[[list[str]], Optional[dict]]:
+    """Row -> bank line (or None) for one profile; all lookups are resolved up front."""
+    cols = profile["columns"]
+    parse_date = _compile_date_parser(profile["date_format"])
+    parse_amount = _compile_amount_parser(profile["decimal_style"])
+    c_date, c_amount = cols["date"], cols["amount"]
+    c_debit, c_credit = cols["debit"], cols["credit"]
+    c_counterparty, c_iban, c_purpose, c_currency = cols["counterparty"], cols["iban"], cols["purpose"], cols["currency"]
+    use_debit_credit = c_debit is not None and c_credit is not None
+    width = max((c for c in cols.values() if c is not None), default=0) + 1
+
+    def parse(row: list[str]) -> Optional[dict]:
+        if len(row) < width or c_date is None:
+            return None
+        booking_date = parse_date(row[c_date].strip())
+        if booking_date is None:
+            return None
+
+        amount: Optional[Decimal] = None
+        if c_amount is not None:
+            raw = row[c_amount].strip()
+            if raw:
+                amount = parse_amount(raw)
+        if amount is None and use_debit_credit:
+            raw_debit, raw_credit = row[c_debit].strip(), row[c_credit].strip()
+            credit = parse_amount(raw_credit) if raw_credit else None
+            debit = parse_amount(raw_debit) if raw_debit else None
+            if credit and credit > 0:
+                amount = credit
+            elif debit and debit > 0:
+                amount = -debit
+        if amount is None:
+            return None
+
+        iban = row[c_iban].replace(" ", "") if c_iban is not None else ""
+        return {
+            "booking_date": booking_date,
+            "counterparty": row[c_counterparty].strip() or None if c_counterparty is not None else None,
+            "iban": _normalize_iban(iban) if iban else None,
+            "purpose": row[c_purpose].strip() or None if c_purpose is not None else None,
+            "amount": amount,
+            "currency": (row[c_currency].strip() if c_currency is not None else "") or "EUR",
+        }
+    return parse
+
+
+def profile_signature(encoding: str, delimiter: str, header: str) -> str:
+    return hashlib.sha256(f"{encoding}|{delimiter}|{header}".encode("utf-8")).hexdigest()
+
+
+class CsvStatementParser(StatementParser):
+    """
+    CSV parser for one import. Pass the tenant's stored profiles; after iteration has started,
+    ``profile`` holds the profile in use and ``profile_is_new`` tells whether it was just detected.
+    """
+
+    name = "csv"
+
+    def __init__(self, profiles: Iterable[dict] = ()):
+        self._profiles = {(p["encoding"], p["header"]): p for p in profiles}
+        self.profile: Optional[dict] = None
+        self.profile_is_new = False
+
+    def iter_lines(self, fileobj: BinaryIO) -> Iterator[dict]:
+        text = self._text(fileobj)
+        try:
+            yield from self._iter_rows(text)
+        finally:
+            # Don't let the wrapper close the underlying upload file
+            text.detach()
+
+    def _iter_rows(self, text: io.TextIOWrapper) -> Iterator[dict]:
+        # Banks put a few lines of account info above the header; only those are buffered
+        buffered: list[str] = []
+        header_idx = 0
+        profile: Optional[dict] = None
+        for line in text:
+            buffered.append(line)
+            profile = self._profiles.get((text.encoding, line.rstrip("\r\n")))
+            if profile is not None or re.search(r"(buchungstag|datum|date|buchung)", line, re.IGNORECASE):
+                header_idx = len(buffered) - 1
+                break
+            if len(buffered) >= HEADER_SEARCH_LINES:
+                break
+        if not buffered:
+            return
+
+        if profile is not None:
+            reader = csv.reader(itertools.chain(buffered[header_idx + 1:], text), delimiter=profile["delimiter"])
+        else:
+            profile, reader = self._detect_profile(text.encoding, buffered[header_idx], itertools.chain(buffered[header_idx + 1:], text))
+            if profile is None:
+                return
+            self.profile_is_new = True
+        self.profile = profile
+
+        parse = compile_row_parser(profile)
+        for row in reader:
+            line = parse(row)
+            if line is not None:
+                yield line
+
+    def _detect_profile(self, encoding: str, header_line: str, rest: Iterator[str]) -> tuple[Optional[dict], Iterator[list[str]]]:
+        try:
+            dialect = csv.Sniffer().sniff(header_line, delimiters=";,\t")
+        except csv.Error:
+            dialect = _SemicolonDialect
+        header = next(csv.reader([header_line], dialect=dialect), None)
+        if not header:
+            return None, iter(())
+        cols = _detect_columns(header)
+
+        reader = csv.reader(rest, dialect=dialect)
+        sample = list(itertools.islice(reader, PROFILE_SAMPLE_ROWS))
+
+        def cells(idx: Optional[int]) -> list[str]:
+            return [row[idx] for row in sample if idx is not None and idx < len(row)]
+
+        header_text = header_line.rstrip("\r\n")
+        profile = {
+            "signature": profile_signature(encoding, dialect.delimiter, header_text),
+            "encoding": encoding,
+            "delimiter": dialect.delimiter,
+            "header": header_text,
+            "columns": cols,
+            "date_format": _detect_date_format(cells(cols["date"])),
+            "decimal_style": _detect_decimal_style(
+                cells(cols["amount"]) + cells(cols["debit"]) + cells(cols["credit"])
+            ),
+        }
+        return profile, itertools.chain(sample, reader)
+
+
+# ── MT940 (SWIFT, von den meisten deutschen Banken angeboten) ────────────────
+
+_MT940_TAG = re.compile(r"^:(\d{2}[A-Z]?):(.*)$")
+_MT940_61 = re.compile(r"^(\d{6})(\d{4})?(R?[DC])[A-Z]?(\d+,\d{0,2})")
+_MT940_BALANCE = re.compile(r"^[CD]\d{6}([A-Z]{3})")
+_MT940_SUBFIELD = re.compile(r"\?(\d{2})")
+
+
+def _parse_mt940_86(text: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """(counterparty, iban, purpose) from a :86: field, structured (?20, ?32 ...) or free text."""
+    if "?" not in text:
+        return None, None, " ".join(text.split()) or None
+    parts = _MT940_SUBFIELD.split(text)
+    fields: dict[int, str] = {}
+    for code, value in zip(parts[1::2], parts[2::2]):
+        fields.setdefault(int(code), "")
+        fields[int(code)] += value
+    purpose = "".join(fields.get(code, "") for code in itertools.chain(range(20, 30), range(60, 64)))
+    counterparty = (fields.get(32, "") + fields.get(33, "")).strip()
+    return counterparty or None, _normalize_iban(fields.get(31, "")), purpose.strip() or None
+
+
+class Mt940StatementParser(StatementParser):
+    name = "mt940"
+
+    def iter_lines(self, fileobj: BinaryIO) -> Iterator[dict]:
+        text = self._text(fileobj)
+        try:
+            yield from self._iter_entries(text)
+        finally:
+            text.detach()
+
+    def _iter_fields(self, text: io.TextIOWrapper) -> Iterator[tuple[str, str]]:
+        """(tag, value) pairs; continuation lines are joined, "-" ends a statement."""
+        tag, value = None, ""
+        for raw_line in text:
+            line = raw_line.rstrip("\r\n")
+            match = _MT940_TAG.match(line)
+            if match or line.strip() in ("-", "-}"):
+                if tag:
+                    yield tag, value
+                tag, value = (match.group(1), match.group(2)) if match else (None, "")
+            elif tag:
+                value += line
+        if tag:
+            yield tag, value
+
+    def _iter_entries(self, text: io.TextIOWrapper) -> Iterator[dict]:
+        currency = "EUR"
+        pending: Optional[dict] = None
+        for tag, value in self._iter_fields(text):
+            if tag in ("60F", "60M"):
+                balance = _MT940_BALANCE.match(value)
+                if balance:
+                    currency = balance.group(1)
+            elif tag == "61":
+                if pending:
+                    yield pending
+                pending = self._parse_61(value, currency)
+            elif tag == "86" and pending:
+                pending["counterparty"], pending["iban"], pending["purpose"] = _parse_mt940_86(value)
+                yield pending
+                pending = None
+        if pending:
+            yield pending
+
+    def _parse_61(self, value: str, currency: str) -> Optional[dict]:
+        match = _MT940_61.match(value)
+        if not match:
+            raise StatementFormatError("MT940-Umsatzzeile (:61:) konnte nicht gelesen werden.")
+        raw_value_date, raw_entry_date, mark, raw_amount = match.groups()
+        try:
+            booking_date = datetime.strptime(raw_value_date, "%y%m%d").date()
+            if raw_entry_date:
+                # The optional MMDD entry (booking) date has no year; it may cross New Year
+                entry_month, entry_day = int(raw_entry_date[:2]), int(raw_entry_date[2:])
+                year = booking_date.year
+                if entry_month == 12 and booking_date.month == 1:
+                    year -= 1
+                elif entry_month == 1 and booking_date.month == 12:
+                    year += 1
+                booking_date = date(year, entry_month, entry_day)
+        except ValueError:
+            raise StatementFormatError(f"Ungültiges Datum in MT940-Umsatzzeile: {value[:10]}")
+        amount = Decimal(raw_amount.replace(",", "."))
+        # D = Lastschrift, C = Gutschrift, RD/RC = Storno der jeweiligen Buchung
+        if mark in ("D", "RC"):
+            amount = -amount
+        return {
+            "booking_date": booking_date,
+            "counterparty": None,
+            "iban": None,
+            "purpose": None,
+            "amount": amount,
+            "currency": currency,
+        }
+
+
+# ── CAMT.053 (ISO 20022 XML) ─────────────────────────────────────────────────
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(elem: Optional[ET.Element], *path: str) -> Optional[ET.Element]:
+    """Namespace-agnostic child lookup along a path of local names."""
+    for name in path:
+        if elem is None:
+            return None
+        elem = next((child for child in elem if _local(child.tag) == name), None)
+    return elem
+
+
+def _find_text(elem: Optional[ET.Element], *path: str) -> Optional[str]:
+    found = _find(elem, *path)
+    if found is None or found.text is None:
+        return None
+    return found.text.strip() or None
+
+
+def _camt_date(elem: ET.Element, name: str) -> Optional[date]:
+    raw = _find_text(elem, name, "Dt") or _find_text(elem, name, "DtTm")
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw[:10])
+    except ValueError:
+        return None
+
+
+def _camt_party(details: Optional[ET.Element], role: str) -> tuple[Optional[str], Optional[str]]:
+    parties = _find(details, "RltdPties")
+    name = _find_text(parties, role, "Nm") or _find_text(parties, role, "Pty", "Nm")
+    iban = _find_text(parties, f"{role}Acct", "Id", "IBAN")
+    return name, _normalize_iban(iban or "")
+
+
+class Camt053StatementParser(StatementParser):
+    name = "camt053"
+
+    def iter_lines(self, fileobj: BinaryIO) -> Iterator[dict]:
+        stack: list[ET.Element] = []
+        try:
+            for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+                if event == "start":
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                if _local(elem.tag) != "Ntry":
+                    continue
+                yield from self._parse_entry(elem)
+                # Drop the processed entry so memory stays flat for large statements
+                if stack:
+                    stack[-1].remove(elem)
+        except ET.ParseError as e:
+            raise StatementFormatError(f"CAMT-Datei ist kein gültiges XML: {e}")
+
+    def _parse_entry(self, entry: ET.Element) -> Iterator[dict]:
+        amount_elem = _find(entry, "Amt")
+        if amount_elem is None or amount_elem.text is None:
+            return
+        credit = _find_text(entry, "CdtDbtInd") == "CRDT"
+        booking_date = _camt_date(entry, "BookgDt") or _camt_date(entry, "ValDt")
+        if booking_date is None:
+            return
+
+        entry_details = _find(entry, "NtryDtls")
+        details = [] if entry_details is None else [
+            tx for tx in entry_details if _local(tx.tag) == "TxDtls"
+        ]
+        # Batch bookings (Sammler) list each payment with its own amount
+        if len(details) > 1 and all(_find(tx, "AmtDtls", "TxAmt", "Amt") is not None for tx in details):
+            for tx in details:
+                tx_amount = _find(tx, "AmtDtls", "TxAmt", "Amt")
+                yield self._line(entry, tx, booking_date, credit, tx_amount)
+            return
+        yield self._line(entry, details[0] if details else None, booking_date, credit, amount_elem)
+
+    def _line(
+        self,
+        entry: ET.Element,
+        details: Optional[ET.Element],
+        booking_date: date,
+        credit: bool,
+        amount_elem: ET.Element,
+    ) -> dict:
+        try:
+            amount = Decimal(amount_elem.text.strip())
+        except InvalidOperation:
+            raise StatementFormatError(f"Ungültiger Betrag in CAMT-Datei: {amount_elem.text}")
+        counterparty, iban = _camt_party(details, "Dbtr" if credit else "Cdtr")
+        remittance = _find(details, "RmtInf")
+        purpose_parts = [
+            child.text.strip() for child in (remittance if remittance is not None else [])
+            if _local(child.tag) == "Ustrd" and child.text
+        ]
+        purpose = " ".join(purpose_parts) or _find_text(entry, "AddtlNtryInf")
+        return {
+            "booking_date": booking_date,
+            "counterparty": counterparty,
+            "iban": iban,
+            "purpose": purpose,
+            "amount": amount if credit else -amount,
+            "currency": amount_elem.get("Ccy") or "EUR",
+        }
+
+
+# ── Formaterkennung ───────────────────────────────────────────────────────────
+
+PARSERS: dict[str, type[StatementParser]] = {
+    parser.name: parser for parser in (CsvStatementParser, Mt940StatementParser, Camt053StatementParser)
+}
+SUPPORTED_EXTENSIONS = (".csv", ".xml", ".sta", ".mt940", ".940", ".txt")
+
+
+def detect_parser(filename: str, fileobj: BinaryIO, csv_profiles: Iterable[dict] = ()) -> StatementParser:
+    """
+    A new parser for this file, picked by content (XML / MT940 tags) with the file extension as
+    fallback. CSV parsers get the tenant's stored format profiles.
+    """
+    head = fileobj.read(4096)
+    fileobj.seek(0)
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    name = filename.lower()
+    if stripped.startswith(b"<"):
+        return Camt053StatementParser()
+    if re.search(rb"^:20:", head, re.MULTILINE) or re.search(rb"^\{1:", stripped):
+        return Mt940StatementParser()
+    if name.endswith(".xml"):
+        return Camt053StatementParser()
+    if name.endswith((".sta", ".mt940", ".940")):
+        return Mt940StatementParser()
+    return CsvStatementParser(csv_profiles)
@@ -0,0 +1,137 @@
+"""
+Einnahmen/Ausgaben je Kategorie für das Dashboard.
+
+Gruppiert wird in SQL nach ``category_id``, Freitext-``category`` und Typ. Das
+Ergebnis wird pro Verein und Zeitraum im Prozess zwischengespeichert. Gültig
+ist ein Eintrag, solange sich die Version der Buchungen nicht ändert; die
+Version stammt aus ``transaction_monthly_totals``, deren ``revision`` bei jeder
+Buchungsänderung hochgezählt wird (siehe aggregate_service). Damit greift die
+Invalidierung auch über mehrere Worker-Prozesse hinweg. Kategorienamen und
+-farben werden bei jedem Abruf frisch aufgelöst, Umbenennungen wirken sofort.
+"""
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.transaction_total import TransactionMonthlyTotal
+
+FALLBACK_NAME = "Sonstiges"
+
+
+async def bookings_version(db: AsyncSession, user_id: int) -> str:
+    """Changes whenever any booking of the tenant is created, changed or deleted."""
+    result = await db.execute(
+        select(
+            func.count(TransactionMonthlyTotal.id),
+            func.sum(TransactionMonthlyTotal.revision),
+            func.sum(TransactionMonthlyTotal.transaction_count),
+            func.sum(TransactionMonthlyTotal.total_amount),
+        ).where(TransactionMonthlyTotal.user_id == user_id)
+    )
+    return "|".join(str(value) for value in result.one())
+
+
+class CategoryBreakdownCache:
+    """Small in-process LRU of grouped sums, keyed by tenant and period."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[str, list]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, version: str) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple, version: str, groups: list) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (version, groups)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+breakdown_cache = CategoryBreakdownCache(settings.CATEGORY_BREAKDOWN_CACHE_SIZE)
+
+
+async def _grouped_sums(
+    db: AsyncSession,
+    user_id: int,
+    type: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+) -> list[tuple]:
+    query = select(
+        Transaction.category_id,
+        Transaction.category,
+        Transaction.type,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id),
+    ).where(Transaction.user_id == user_id)
+    if type:
+        query = query.where(Transaction.type == type)
+    if date_from:
+        query = query.where(Transaction.transaction_date >= date_from)
+    if date_to:
+        query = query.where(Transaction.transaction_date <= date_to)
+    query = query.group_by(Transaction.category_id, Transaction.category, Transaction.type)
+    return [tuple(row) for row in (await db.execute(query)).all()]
+
+
+async def category_breakdown(
+    db: AsyncSession,
+    user_id: int,
+    type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> list[dict]:
+    """Sums and counts per category and type, largest first."""
+    key = (user_id, type, date_from, date_to)
+    version = await bookings_version(db, user_id)
+    groups = breakdown_cache.get(key, version)
+    if groups is None:
+        groups = await _grouped_sums(db, user_id, type, date_from, date_to)
+        breakdown_cache.put(key, version, groups)
+
+    categories = {
+        c.id: c for c in (await db.execute(select(Category).where(Category.user_id == user_id))).scalars()
+    }
+
+    merged: dict[tuple, dict] = {}
+    for category_id, category_name, type_, total, count in groups:
+        category = categories.get(category_id)
+        # Unknown ids (deleted categories) fall back to the free-text category
+        name = category.name if category else (category_name or FALLBACK_NAME)
+        merge_key = (category.id if category else None, name, type_)
+        entry = merged.setdefault(merge_key, {
+            "category_id": category.id if category else None,
+            "name": name,
+            "color": category.color if category else None,
+            "type": type_,
+            "total": Decimal("0"),
+            "count": 0,
+        })
+        entry["total"] += Decimal(str(total or 0))
+        entry["count"] += count
+
+    return sorted(
+        ({**entry, "total": float(entry["total"])} for entry in merged.values()),
+        key=lambda e: (-e["total"], e["name"]),
+    )
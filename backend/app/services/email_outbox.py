@@ -0,0 +1,166 @@
+"""
+Postausgang für E-Mails.
+
+Requests verschicken keine Mails mehr selbst: ``send_email`` legt nur eine
+``email_log``-Zeile mit Status ``pending`` an. Jeder uvicorn-Worker startet im
+Lifespan eine Schleife, die fällige Zeilen blockweise per
+``SELECT ... FOR UPDATE SKIP LOCKED`` holt und über wenige gepoolte
+SMTP-Sitzungen versendet. Mehrere Worker teilen sich so den Postausgang, ohne
+eine Mail doppelt zu greifen; stirbt ein Worker, gibt die Datenbank seine
+Sperren mit dem Abbruch der Transaktion wieder frei.
+
+Vorübergehende Fehler (Verbindung, 4xx) werden mit exponentiell wachsendem
+Abstand erneut versucht, bis EMAIL_OUTBOX_MAX_ATTEMPTS erreicht ist; dauerhafte
+Ablehnungen (5xx) schlagen sofort fehl. Wird ein Block mitten im Versand
+abgebrochen, können einzelne Mails erneut zugestellt werden.
+
+Gehört eine Mail zu einer Zahlungserinnerung (``payment_reminder_id``), wird
+die Erinnerung erst mit der Zustellung auf ``sent`` gesetzt.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import aiosmtplib
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.email_log import EmailLog
+from app.models.payment_reminder import PaymentReminder
+from app.services.email_service import SmtpPool, build_message, smtp_configured
+
+logger = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+_wakeup = asyncio.Event()
+
+
+def notify() -> None:
+    """Wake this process's worker after new mail was committed."""
+    _wakeup.set()
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether the server rejected the message for good (5xx) rather than for now."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(refused.code >= 500 for refused in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+    return False
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS))
+
+
+async def deliver_batch(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Claim due pending mails, send them and record the outcome; returns the number claimed."""
+    now = now or datetime.now(timezone.utc)
+    rows = (await db.execute(
+        select(EmailLog)
+        .where(EmailLog.status == "pending", EmailLog.next_attempt_at <= now)
+        .order_by(EmailLog.next_attempt_at, EmailLog.id)
+        .limit(settings.EMAIL_OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+    if not rows:
+        return 0
+
+    if not smtp_configured():
+        logger.warning(f"SMTP not configured, would send {len(rows)} emails")
+        errors: list[Optional[Exception]] = [None] * len(rows)
+    else:
+        pool = SmtpPool(settings.SMTP_POOL_SIZE, settings.SMTP_BULK_SEND_INTERVAL)
+
+        async def send_one(row: EmailLog) -> Optional[Exception]:
+            try:
+                await pool.send(build_message(
+                    row.recipient, row.subject, row.html_body or "", row.text_body,
+                    row.attachment, row.attachment_filename,
+                ))
+            except Exception as e:
+                return e
+            return None
+
+        try:
+            errors = await asyncio.gather(*(send_one(row) for row in rows))
+        finally:
+            await pool.close()
+
+    sent_at = datetime.now(timezone.utc)
+    for row, error in zip(rows, errors):
+        row.attempts += 1
+        if error is None:
+            row.status = "sent"
+            row.sent_at = sent_at
+            row.error = None
+            row.html_body = row.text_body = row.attachment = None
+            continue
+        row.error = f"{type(error).__name__}: {error}"[:2000]
+        if is_permanent(error) or row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            logger.error(f"Giving up on email {row.id} to {row.recipient}: {error}")
+            row.status = "failed"
+        else:
+            logger.warning(f"Email {row.id} to {row.recipient} failed, retrying: {error}")
+            row.next_attempt_at = sent_at + retry_delay(row.attempts)
+
+    delivered_reminders = [
+        row.payment_reminder_id for row in rows if row.status == "sent" and row.payment_reminder_id
+    ]
+    if delivered_reminders:
+        # The overdue sweep may have run since queueing; a reminder paid in the
+        # meantime records the delivery but keeps its status
+        await db.execute(
+            update(PaymentReminder)
+            .where(PaymentReminder.id.in_(delivered_reminders))
+            .values(
+                sent_at=sent_at,
+                status=case(
+                    (PaymentReminder.status.in_(["pending", "overdue"]), "sent"),
+                    else_=PaymentReminder.status,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    return len(rows)
+
+
+async def _loop(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    while True:
+        _wakeup.clear()
+        claimed = 0
+        try:
+            async with session_factory() as db:
+                claimed = await deliver_batch(db)
+        except Exception:
+            logger.exception("Email outbox batch failed")
+        if claimed >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+            continue  # a full batch: more may be due
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.EMAIL_OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start(session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal) -> None:
+    global _task
+    if settings.EMAIL_OUTBOX_ENABLED and _task is None:
+        _task = asyncio.create_task(_loop(session_factory))
+
+
+async def shutdown() -> None:
+    """Stop the loop; a batch cancelled mid-send is rolled back and stays pending."""
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
@@ -1,9 +1,16 @@
+import asyncio
+import uuid
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
 from typing import Optional
 from datetime import datetime, timezone
+from functools import lru_cache
+from jinja2 import DictLoader, Environment
+from html import escape as html_escape
+from markupsafe import Markup
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.models.email_log import EmailLog
@@ -27,29 +34,35 @@ WARNING_TEXT   = "#92400e"
 FONT           = "-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif"
 
 
-def _email_wrapper(content: str, app_name: str = "VereinsKasse", tagline: str = "Kassenverwaltung für Ihren Verein") -> str:
-    year = datetime.now().year
-    return f"""<!DOCTYPE html>
+# ─────────────────────────────────────────────
+# Templates: compiled once at import. A message is rendered once per template,
+# sender and fixed values, with placeholders for the per-recipient fields; that
+# result is cached and every further message only fills in its escaped fields.
+# ─────────────────────────────────────────────
+_FIELD = f"@@{uuid.uuid4().hex}@@"  # survives autoescaping, never part of real input
+
+_TEMPLATES = {
+    "layout.html": """<!DOCTYPE html>
 <html lang="de">
 <head>
   <meta charset="utf-8">
   <meta name="viewport" content="width=device-width,initial-scale=1.0">
-  <title>{app_name}</title>
+  <title>{{ app_name }}</title>
 </head>
-<body style="margin:0;padding:0;background-color:{BG};font-family:{FONT};-webkit-font-smoothing:antialiased;">
-<table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background-color:{BG};min-height:100vh;">
+<body style="margin:0;padding:0;background-color:{{ BG }};font-family:{{ FONT }};-webkit-font-smoothing:antialiased;">
+<table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="background-color:{{ BG }};min-height:100vh;">
   <tr><td align="center" style="padding:40px 16px;">
     <table role="presentation" width="100%" cellpadding="0" cellspacing="0" style="max-width:580px;">
 
       <!-- HEADER -->
       <tr>
-        <td style="background:linear-gradient(135deg,{PRIMARY} 0%,{PRIMARY_DARK} 100%);border-radius:16px 16px 0 0;padding:28px 36px;">
+        <td style="background:linear-gradient(135deg,{{ PRIMARY }} 0%,{{ PRIMARY_DARK }} 100%);border-radius:16px 16px 0 0;padding:28px 36px;">
           <table role="presentation" cellpadding="0" cellspacing="0">
             <tr>
               <td style="background:rgba(255,255,255,0.18);border-radius:10px;width:42px;height:42px;text-align:center;vertical-align:middle;font-size:20px;">📊</td>
               <td style="padding-left:12px;vertical-align:middle;">
-                <p style="margin:0;color:#fff;font-size:18px;font-weight:700;letter-spacing:-0.2px;">{app_name}</p>
-                <p style="margin:0;color:rgba(255,255,255,0.72);font-size:12px;">{tagline}</p>
+                <p style="margin:0;color:#fff;font-size:18px;font-weight:700;letter-spacing:-0.2px;">{{ app_name }}</p>
+                <p style="margin:0;color:rgba(255,255,255,0.72);font-size:12px;">{{ tagline }}</p>
               </td>
             </tr>
           </table>
@@ -58,19 +71,19 @@ def _email_wrapper(content: str, app_name: str = "VereinsKasse", tagline: str =
 
       <!-- BODY -->
       <tr>
-        <td style="background:{CARD};padding:36px;border-left:1px solid {BORDER};border-right:1px solid {BORDER};">
-          {content}
+        <td style="background:{{ CARD }};padding:36px;border-left:1px solid {{ BORDER }};border-right:1px solid {{ BORDER }};">
+          {{ content }}
         </td>
       </tr>
 
       <!-- FOOTER -->
       <tr>
-        <td style="background:#f8fafc;border:1px solid {BORDER};border-top:none;border-radius:0 0 16px 16px;padding:20px 36px;">
-          <p style="margin:0 0 6px;color:{TEXT_MUTED};font-size:12px;">Diese E-Mail wurde von <strong>{app_name}</strong> automatisch versandt.</p>
-          <p style="margin:0;color:{TEXT_MUTED};font-size:12px;">
-            &copy; {year} {app_name}&nbsp;&middot;&nbsp;
-            <a href="{settings.FRONTEND_URL}/impressum" style="color:{PRIMARY};text-decoration:none;">Impressum</a>&nbsp;&middot;&nbsp;
-            <a href="{settings.FRONTEND_URL}/datenschutz" style="color:{PRIMARY};text-decoration:none;">Datenschutz</a>
+        <td style="background:#f8fafc;border:1px solid {{ BORDER }};border-top:none;border-radius:0 0 16px 16px;padding:20px 36px;">
+          <p style="margin:0 0 6px;color:{{ TEXT_MUTED }};font-size:12px;">Diese E-Mail wurde von <strong>{{ app_name }}</strong> automatisch versandt.</p>
+          <p style="margin:0;color:{{ TEXT_MUTED }};font-size:12px;">
+            &copy; {{ year }} {{ app_name }}&nbsp;&middot;&nbsp;
+            <a href="{{ FRONTEND_URL }}/impressum" style="color:{{ PRIMARY }};text-decoration:none;">Impressum</a>&nbsp;&middot;&nbsp;
+            <a href="{{ FRONTEND_URL }}/datenschutz" style="color:{{ PRIMARY }};text-decoration:none;">Datenschutz</a>
           </p>
         </td>
       </tr>
@@ -79,359 +92,496 @@ def _email_wrapper(content: str, app_name: str = "VereinsKasse", tagline: str =
   </td></tr>
 </table>
 </body>
-</html>"""
+</html>""",
 
-
-def _btn(url: str, label: str) -> str:
-    return f"""<table role="presentation" cellpadding="0" cellspacing="0" style="margin:28px auto;">
+    "macros.html": """{% macro btn(url, label) -%}
+<table role="presentation" cellpadding="0" cellspacing="0" style="margin:28px auto;">
   <tr>
-    <td style="border-radius:10px;background:linear-gradient(135deg,{PRIMARY} 0%,{PRIMARY_DARK} 100%);">
-      <a href="{url}" style="display:inline-block;padding:13px 30px;color:#fff;font-size:15px;font-weight:600;text-decoration:none;border-radius:10px;">{label}</a>
+    <td style="border-radius:10px;background:linear-gradient(135deg,{{ PRIMARY }} 0%,{{ PRIMARY_DARK }} 100%);">
+      <a href="{{ url }}" style="display:inline-block;padding:13px 30px;color:#fff;font-size:15px;font-weight:600;text-decoration:none;border-radius:10px;">{{ label }}</a>
     </td>
   </tr>
-</table>"""
-
-
-def _divider() -> str:
-    return f'<div style="height:1px;background:{BORDER};margin:28px 0;"></div>'
-
-
-# ─────────────────────────────────────────────
-async def send_email(
-    db: AsyncSession,
-    recipient: str,
-    subject: str,
-    html_body: str,
-    text_body: Optional[str] = None,
-    attachment: Optional[bytes] = None,
-    attachment_filename: Optional[str] = None,
-) -> bool:
-    log_entry = EmailLog(recipient=recipient, subject=subject, status="pending")
-    db.add(log_entry)
-    await db.flush()
-
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = settings.SMTP_FROM
-        msg["To"] = recipient
-
-        if text_body:
-            msg.attach(MIMEText(text_body, "plain", "utf-8"))
-        msg.attach(MIMEText(html_body, "html", "utf-8"))
-
-        if attachment and attachment_filename:
-            part = MIMEApplication(attachment, Name=attachment_filename)
-            part["Content-Disposition"] = f'attachment; filename="{attachment_filename}"'
-            msg.attach(part)
-
-        if not settings.SMTP_HOST or settings.SMTP_HOST == "localhost":
-            logger.warning(f"SMTP not configured, would send to {recipient}: {subject}")
-            log_entry.status = "sent"
-            log_entry.sent_at = datetime.now(timezone.utc)
-            await db.commit()
-            return True
-
-        await aiosmtplib.send(
-            msg,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            username=settings.SMTP_USER if settings.SMTP_USER else None,
-            password=settings.SMTP_PASSWORD if settings.SMTP_PASSWORD else None,
-            use_tls=False,
-            start_tls=settings.SMTP_TLS,
-        )
-
-        log_entry.status = "sent"
-        log_entry.sent_at = datetime.now(timezone.utc)
-        await db.commit()
-        return True
+</table>
+{%- endmacro %}
+{% macro divider() -%}
+<div style="height:1px;background:{{ BORDER }};margin:28px 0;"></div>
+{%- endmacro %}""",
 
-    except Exception as e:
-        logger.error(f"Failed to send email to {recipient}: {e}")
-        log_entry.status = "failed"
-        log_entry.error = str(e)
-        await db.commit()
-        return False
+    "welcome.html": """{% from "macros.html" import btn, divider %}
+<h1 style="margin:0 0 6px;font-size:26px;font-weight:700;color:{{ TEXT }};letter-spacing:-0.5px;">Herzlich willkommen, {{ name }}! 👋</h1>
+<p style="margin:0 0 28px;color:{{ TEXT_MUTED }};font-size:15px;">Ihr Konto für <strong style="color:{{ TEXT }};">{{ organization }}</strong> ist bereit.</p>
 
+<p style="margin:0 0 20px;color:{{ TEXT }};font-size:15px;line-height:1.7;">
+  Schön, dass Sie sich für <strong>VereinsKasse</strong> entschieden haben!
+  Sie können jetzt sofort loslegen und Ihre Vereinsfinanzen verwalten.
+</p>
 
-# ─────────────────────────────────────────────
-# Template: Willkommen
-# ─────────────────────────────────────────────
-def build_welcome_email(name: str, organization: str) -> tuple[str, str]:
-    features = [
-        ("Kassenbuch", "Einnahmen &amp; Ausgaben erfassen, kategorisieren, exportieren"),
-        ("Mitglieder", "Bis zu 50 Mitglieder kostenlos verwalten"),
-        ("Statistiken", "Dashboard mit Finanzen &amp; Aktivitäten"),
-        ("Premium", "Unlimitierte Mitglieder &amp; PDF-Export ab 0,99&nbsp;€/Monat"),
-    ]
-
-    rows = ""
-    for title, desc in features:
-        rows += f"""
+<div style="background:#f8fafc;border:1px solid {{ BORDER }};border-radius:12px;padding:18px 22px;margin:0 0 8px;">
+  <p style="margin:0 0 14px;color:{{ TEXT_MUTED }};font-size:11px;font-weight:600;text-transform:uppercase;letter-spacing:0.7px;">Was Sie jetzt tun können</p>
+  <table role="presentation" width="100%" cellpadding="0" cellspacing="0">
+    {% for title, desc in features %}
         <tr>
           <td style="padding:8px 0;vertical-align:top;">
             <table role="presentation" cellpadding="0" cellspacing="0">
               <tr>
                 <td style="vertical-align:top;padding-top:2px;">
-                  <span style="display:inline-block;width:18px;height:18px;background:#dbeafe;border-radius:50%;text-align:center;font-size:10px;line-height:18px;color:{PRIMARY};font-weight:700;">✓</span>
+                  <span style="display:inline-block;width:18px;height:18px;background:#dbeafe;border-radius:50%;text-align:center;font-size:10px;line-height:18px;color:{{ PRIMARY }};font-weight:700;">✓</span>
                 </td>
                 <td style="padding-left:10px;">
-                  <p style="margin:0;font-size:14px;font-weight:600;color:{TEXT};">{title}</p>
-                  <p style="margin:2px 0 0;font-size:13px;color:{TEXT_MUTED};">{desc}</p>
+                  <p style="margin:0;font-size:14px;font-weight:600;color:{{ TEXT }};">{{ title }}</p>
+                  <p style="margin:2px 0 0;font-size:13px;color:{{ TEXT_MUTED }};">{{ desc }}</p>
                 </td>
               </tr>
             </table>
           </td>
-        </tr>"""
-
-    content = f"""
-<h1 style="margin:0 0 6px;font-size:26px;font-weight:700;color:{TEXT};letter-spacing:-0.5px;">Herzlich willkommen, {name}! 👋</h1>
-<p style="margin:0 0 28px;color:{TEXT_MUTED};font-size:15px;">Ihr Konto für <strong style="color:{TEXT};">{organization}</strong> ist bereit.</p>
-
-<p style="margin:0 0 20px;color:{TEXT};font-size:15px;line-height:1.7;">
-  Schön, dass Sie sich für <strong>VereinsKasse</strong> entschieden haben!
-  Sie können jetzt sofort loslegen und Ihre Vereinsfinanzen verwalten.
-</p>
-
-<div style="background:#f8fafc;border:1px solid {BORDER};border-radius:12px;padding:18px 22px;margin:0 0 8px;">
-  <p style="margin:0 0 14px;color:{TEXT_MUTED};font-size:11px;font-weight:600;text-transform:uppercase;letter-spacing:0.7px;">Was Sie jetzt tun können</p>
-  <table role="presentation" width="100%" cellpadding="0" cellspacing="0">
-    {rows}
+        </tr>
+    {%- endfor %}
   </table>
 </div>
 
-{_btn(f"{settings.FRONTEND_URL}/dashboard", "Zum Dashboard →")}
+{{ btn(FRONTEND_URL ~ "/dashboard", "Zum Dashboard →") }}
 
-{_divider()}
+{{ divider() }}
 
-<p style="margin:0;color:{TEXT_MUTED};font-size:13px;line-height:1.6;">
+<p style="margin:0;color:{{ TEXT_MUTED }};font-size:13px;line-height:1.6;">
   Fragen oder Feedback? Nutzen Sie die <strong>Feedback-Funktion</strong> direkt in der App –
   wir helfen Ihnen gerne weiter.
-</p>"""
+</p>""",
 
-    html = _email_wrapper(content)
-    text = f"Willkommen bei VereinsKasse, {name}! Ihr Konto fuer {organization} ist bereit. Login: {settings.FRONTEND_URL}/dashboard"
-    return html, text
-
-
-# ─────────────────────────────────────────────
-# Template: E-Mail verifizieren
-# ─────────────────────────────────────────────
-def build_verification_email(name: str, verify_url: str) -> tuple[str, str]:
-    content = f"""
+    "verification.html": """{% from "macros.html" import btn, divider %}
 <div style="text-align:center;margin-bottom:24px;">
   <div style="display:inline-block;background:#eff6ff;border-radius:50%;width:60px;height:60px;line-height:60px;font-size:26px;">✉️</div>
 </div>
 
-<h1 style="margin:0 0 6px;font-size:24px;font-weight:700;color:{TEXT};text-align:center;letter-spacing:-0.3px;">E-Mail bestätigen</h1>
-<p style="margin:0 0 28px;color:{TEXT_MUTED};font-size:13px;text-align:center;">VereinsKasse &middot; Kontoaktivierung</p>
+<h1 style="margin:0 0 6px;font-size:24px;font-weight:700;color:{{ TEXT }};text-align:center;letter-spacing:-0.3px;">E-Mail bestätigen</h1>
+<p style="margin:0 0 28px;color:{{ TEXT_MUTED }};font-size:13px;text-align:center;">VereinsKasse &middot; Kontoaktivierung</p>
 
-<p style="margin:0 0 16px;color:{TEXT};font-size:15px;line-height:1.7;">Hallo <strong>{name}</strong>,</p>
-<p style="margin:0 0 24px;color:{TEXT_MUTED};font-size:15px;line-height:1.7;">
+<p style="margin:0 0 16px;color:{{ TEXT }};font-size:15px;line-height:1.7;">Hallo <strong>{{ name }}</strong>,</p>
+<p style="margin:0 0 24px;color:{{ TEXT_MUTED }};font-size:15px;line-height:1.7;">
   vielen Dank fuer Ihre Registrierung bei VereinsKasse! Bitte bestaetigen Sie Ihre E-Mail-Adresse,
   um Ihr Konto zu aktivieren:
 </p>
 
-{_btn(verify_url, "E-Mail bestaetigen →")}
+{{ btn(verify_url, "E-Mail bestaetigen →") }}
 
-<div style="background:{WARNING_BG};border:1px solid {WARNING_BORDER};border-radius:10px;padding:14px 18px;margin:0 0 24px;">
-  <p style="margin:0;color:{WARNING_TEXT};font-size:13px;line-height:1.6;">
+<div style="background:{{ WARNING_BG }};border:1px solid {{ WARNING_BORDER }};border-radius:10px;padding:14px 18px;margin:0 0 24px;">
+  <p style="margin:0;color:{{ WARNING_TEXT }};font-size:13px;line-height:1.6;">
     ⏱&nbsp; <strong>Dieser Link ist 48 Stunden gueltig.</strong><br>
     Falls Sie sich nicht registriert haben, koennen Sie diese E-Mail ignorieren.
   </p>
 </div>
 
-{_divider()}
+{{ divider() }}
 
-<p style="margin:0;color:{TEXT_MUTED};font-size:12px;line-height:1.6;">
+<p style="margin:0;color:{{ TEXT_MUTED }};font-size:12px;line-height:1.6;">
   Wenn der Button nicht funktioniert, kopieren Sie diesen Link in Ihren Browser:<br>
-  <a href="{verify_url}" style="color:{PRIMARY};word-break:break-all;">{verify_url}</a>
-</p>"""
-
-    html = _email_wrapper(content)
-    text = f"Hallo {name}, bitte bestaetigen Sie Ihre E-Mail: {verify_url} (gueltig fuer 48 Stunden)."
-    return html, text
-
+  <a href="{{ verify_url }}" style="color:{{ PRIMARY }};word-break:break-all;">{{ verify_url }}</a>
+</p>""",
 
-# ─────────────────────────────────────────────
-# Template: Passwort zurücksetzen
-# ─────────────────────────────────────────────
-def build_password_reset_email(name: str, reset_url: str) -> tuple[str, str]:
-    content = f"""
+    "password_reset.html": """{% from "macros.html" import btn, divider %}
 <div style="text-align:center;margin-bottom:24px;">
   <div style="display:inline-block;background:#eff6ff;border-radius:50%;width:60px;height:60px;line-height:60px;font-size:26px;">🔐</div>
 </div>
 
-<h1 style="margin:0 0 6px;font-size:24px;font-weight:700;color:{TEXT};text-align:center;letter-spacing:-0.3px;">Passwort zurücksetzen</h1>
-<p style="margin:0 0 28px;color:{TEXT_MUTED};font-size:13px;text-align:center;">VereinsKasse &middot; Sicherheitsanfrage</p>
+<h1 style="margin:0 0 6px;font-size:24px;font-weight:700;color:{{ TEXT }};text-align:center;letter-spacing:-0.3px;">Passwort zurücksetzen</h1>
+<p style="margin:0 0 28px;color:{{ TEXT_MUTED }};font-size:13px;text-align:center;">VereinsKasse &middot; Sicherheitsanfrage</p>
 
-<p style="margin:0 0 16px;color:{TEXT};font-size:15px;line-height:1.7;">Hallo <strong>{name}</strong>,</p>
-<p style="margin:0 0 24px;color:{TEXT_MUTED};font-size:15px;line-height:1.7;">
+<p style="margin:0 0 16px;color:{{ TEXT }};font-size:15px;line-height:1.7;">Hallo <strong>{{ name }}</strong>,</p>
+<p style="margin:0 0 24px;color:{{ TEXT_MUTED }};font-size:15px;line-height:1.7;">
   wir haben eine Anfrage erhalten, das Passwort für Ihr VereinsKasse-Konto zurückzusetzen.
   Klicken Sie auf den Button, um ein neues Passwort zu vergeben:
 </p>
 
-{_btn(reset_url, "Passwort zurücksetzen →")}
+{{ btn(reset_url, "Passwort zurücksetzen →") }}
 
-<div style="background:{WARNING_BG};border:1px solid {WARNING_BORDER};border-radius:10px;padding:14px 18px;margin:0 0 24px;">
-  <p style="margin:0;color:{WARNING_TEXT};font-size:13px;line-height:1.6;">
+<div style="background:{{ WARNING_BG }};border:1px solid {{ WARNING_BORDER }};border-radius:10px;padding:14px 18px;margin:0 0 24px;">
+  <p style="margin:0;color:{{ WARNING_TEXT }};font-size:13px;line-height:1.6;">
     ⏱&nbsp; <strong>Dieser Link ist nur 1 Stunde gültig.</strong><br>
     Falls Sie diese Anfrage nicht gestellt haben, können Sie diese E-Mail einfach ignorieren – Ihr Passwort bleibt unverändert.
   </p>
 </div>
 
-{_divider()}
+{{ divider() }}
 
-<p style="margin:0;color:{TEXT_MUTED};font-size:12px;line-height:1.6;">
+<p style="margin:0;color:{{ TEXT_MUTED }};font-size:12px;line-height:1.6;">
   Wenn der Button nicht funktioniert, kopieren Sie diesen Link in Ihren Browser:<br>
-  <a href="{reset_url}" style="color:{PRIMARY};word-break:break-all;">{reset_url}</a>
-</p>"""
-
-    html = _email_wrapper(content)
-    text = f"Hallo {name}, setzen Sie Ihr Passwort zurueck: {reset_url} (gueltig fuer 1 Stunde). Falls Sie diese Anfrage nicht gestellt haben, ignorieren Sie diese E-Mail."
-    return html, text
-
-
-# ─────────────────────────────────────────────
-# Template: Zahlungserinnerung
-# ─────────────────────────────────────────────
-def build_payment_reminder_email(
-    member_name: str,
-    organization: str,
-    amount: float,
-    due_date: str,
-    notes: Optional[str] = None,
-) -> tuple[str, str]:
-    notes_block = ""
-    if notes:
-        notes_block = f"""
-        <tr>
-          <td colspan="2" style="padding-top:14px;border-top:1px solid {WARNING_BORDER};">
-            <p style="margin:0;color:{WARNING_TEXT};font-size:13px;">{notes}</p>
-          </td>
-        </tr>"""
+  <a href="{{ reset_url }}" style="color:{{ PRIMARY }};word-break:break-all;">{{ reset_url }}</a>
+</p>""",
 
-    content = f"""
+    "payment_reminder.html": """{% from "macros.html" import divider %}
 <div style="text-align:center;margin-bottom:24px;">
-  <div style="display:inline-block;background:{WARNING_BG};border-radius:50%;width:60px;height:60px;line-height:60px;font-size:26px;">💰</div>
+  <div style="display:inline-block;background:{{ WARNING_BG }};border-radius:50%;width:60px;height:60px;line-height:60px;font-size:26px;">💰</div>
 </div>
 
-<h1 style="margin:0 0 4px;font-size:24px;font-weight:700;color:{TEXT};text-align:center;letter-spacing:-0.3px;">Zahlungserinnerung</h1>
-<p style="margin:0 0 28px;color:{TEXT_MUTED};font-size:13px;text-align:center;">von <strong style="color:{TEXT};">{organization}</strong></p>
+<h1 style="margin:0 0 4px;font-size:24px;font-weight:700;color:{{ TEXT }};text-align:center;letter-spacing:-0.3px;">Zahlungserinnerung</h1>
+<p style="margin:0 0 28px;color:{{ TEXT_MUTED }};font-size:13px;text-align:center;">von <strong style="color:{{ TEXT }};">{{ organization }}</strong></p>
 
-<p style="margin:0 0 16px;color:{TEXT};font-size:15px;line-height:1.7;">Sehr geehrte/r <strong>{member_name}</strong>,</p>
-<p style="margin:0 0 22px;color:{TEXT_MUTED};font-size:15px;line-height:1.7;">
+<p style="margin:0 0 16px;color:{{ TEXT }};font-size:15px;line-height:1.7;">Sehr geehrte/r <strong>{{ member_name }}</strong>,</p>
+<p style="margin:0 0 22px;color:{{ TEXT_MUTED }};font-size:15px;line-height:1.7;">
   wir möchten Sie freundlich daran erinnern, dass folgender Mitgliedsbeitrag noch aussteht:
 </p>
 
-<div style="background:{WARNING_BG};border:1px solid {WARNING_BORDER};border-radius:14px;padding:22px 24px;margin:0 0 22px;">
+<div style="background:{{ WARNING_BG }};border:1px solid {{ WARNING_BORDER }};border-radius:14px;padding:22px 24px;margin:0 0 22px;">
   <table role="presentation" width="100%" cellpadding="0" cellspacing="0">
     <tr>
-      <td style="color:{WARNING_TEXT};font-size:12px;font-weight:600;text-transform:uppercase;letter-spacing:0.5px;padding-bottom:10px;">Offener Betrag</td>
+      <td style="color:{{ WARNING_TEXT }};font-size:12px;font-weight:600;text-transform:uppercase;letter-spacing:0.5px;padding-bottom:10px;">Offener Betrag</td>
       <td style="text-align:right;padding-bottom:10px;">
-        <span style="font-size:36px;font-weight:800;color:{TEXT};letter-spacing:-1px;">{amount:.2f}&nbsp;€</span>
+        <span style="font-size:36px;font-weight:800;color:{{ TEXT }};letter-spacing:-1px;">{{ amount }}&nbsp;€</span>
       </td>
     </tr>
     <tr>
-      <td colspan="2" style="height:1px;background:{WARNING_BORDER};padding:0;"></td>
+      <td colspan="2" style="height:1px;background:{{ WARNING_BORDER }};padding:0;"></td>
     </tr>
     <tr>
-      <td style="padding-top:10px;color:{TEXT_MUTED};font-size:13px;">Fälligkeitsdatum</td>
-      <td style="padding-top:10px;text-align:right;color:{TEXT};font-size:14px;font-weight:600;">{due_date}</td>
+      <td style="padding-top:10px;color:{{ TEXT_MUTED }};font-size:13px;">Fälligkeitsdatum</td>
+      <td style="padding-top:10px;text-align:right;color:{{ TEXT }};font-size:14px;font-weight:600;">{{ due_date }}</td>
     </tr>
-    {notes_block}
+    {%- if notes %}
+        <tr>
+          <td colspan="2" style="padding-top:14px;border-top:1px solid {{ WARNING_BORDER }};">
+            <p style="margin:0;color:{{ WARNING_TEXT }};font-size:13px;">{{ notes }}</p>
+          </td>
+        </tr>
+    {%- endif %}
   </table>
 </div>
 
-<p style="margin:0 0 14px;color:{TEXT_MUTED};font-size:14px;line-height:1.7;">
+<p style="margin:0 0 14px;color:{{ TEXT_MUTED }};font-size:14px;line-height:1.7;">
   Bitte überweisen Sie den ausstehenden Betrag auf das Vereinskonto.
   Falls Sie bereits gezahlt haben, bitten wir Sie, diese E-Mail zu ignorieren.
 </p>
 
-<p style="margin:0 0 28px;color:{TEXT};font-size:15px;line-height:1.7;">
+<p style="margin:0 0 28px;color:{{ TEXT }};font-size:15px;line-height:1.7;">
   Mit freundlichen Grüßen,<br>
-  <strong>{organization}</strong>
+  <strong>{{ organization }}</strong>
 </p>
 
-{_divider()}
+{{ divider() }}
 
-<p style="margin:0;color:{TEXT_MUTED};font-size:12px;">
-  Diese Erinnerung wurde von <strong>{organization}</strong> über VereinsKasse verschickt.
+<p style="margin:0;color:{{ TEXT_MUTED }};font-size:12px;">
+  Diese Erinnerung wurde von <strong>{{ organization }}</strong> über VereinsKasse verschickt.
   Bei Fragen wenden Sie sich bitte direkt an Ihren Verein.
-</p>"""
-
-    html = _email_wrapper(content, app_name=organization, tagline="Zahlungserinnerung")
-    text = f"Zahlungserinnerung von {organization} an {member_name}: {amount:.2f} EUR faellig am {due_date}."
-    return html, text
-
+</p>""",
 
-# ─────────────────────────────────────────────
-# Template: Feedback-Antwort
-# ─────────────────────────────────────────────
-def build_feedback_response_email(
-    user_name: str,
-    feedback_title: str,
-    feedback_type: str,
-    admin_response: str,
-    status: str,
-) -> tuple[str, str]:
-    status_cfg = {
-        "approved":  {"label": "Angenommen",     "color": "#16a34a", "bg": "#f0fdf4", "border": "#bbf7d0", "icon": "✅"},
-        "rejected":  {"label": "Abgelehnt",      "color": "#dc2626", "bg": "#fef2f2", "border": "#fecaca", "icon": "❌"},
-        "in_review": {"label": "In Bearbeitung", "color": "#d97706", "bg": "#fffbeb", "border": "#fde68a", "icon": "🔍"},
-    }
-    cfg = status_cfg.get(status, {"label": status, "color": TEXT_MUTED, "bg": "#f8fafc", "border": BORDER, "icon": "📋"})
-
-    type_labels = {"bug": "Fehlermeldung", "feature": "Feature-Wunsch", "general": "Allgemeines Feedback"}
-    type_label = type_labels.get(feedback_type, feedback_type)
-
-    content = f"""
+    "feedback_response.html": """{% from "macros.html" import divider %}
 <div style="text-align:center;margin-bottom:24px;">
   <div style="display:inline-block;background:#eff6ff;border-radius:50%;width:60px;height:60px;line-height:60px;font-size:26px;">💬</div>
 </div>
 
-<h1 style="margin:0 0 6px;font-size:24px;font-weight:700;color:{TEXT};text-align:center;letter-spacing:-0.3px;">Antwort auf Ihr Feedback</h1>
-<p style="margin:0 0 28px;color:{TEXT_MUTED};font-size:13px;text-align:center;">Das VereinsKasse-Team hat Ihre Nachricht bearbeitet</p>
+<h1 style="margin:0 0 6px;font-size:24px;font-weight:700;color:{{ TEXT }};text-align:center;letter-spacing:-0.3px;">Antwort auf Ihr Feedback</h1>
+<p style="margin:0 0 28px;color:{{ TEXT_MUTED }};font-size:13px;text-align:center;">Das VereinsKasse-Team hat Ihre Nachricht bearbeitet</p>
 
-<p style="margin:0 0 20px;color:{TEXT};font-size:15px;line-height:1.7;">Hallo <strong>{user_name}</strong>,</p>
-<p style="margin:0 0 22px;color:{TEXT_MUTED};font-size:15px;line-height:1.7;">
+<p style="margin:0 0 20px;color:{{ TEXT }};font-size:15px;line-height:1.7;">Hallo <strong>{{ user_name }}</strong>,</p>
+<p style="margin:0 0 22px;color:{{ TEXT_MUTED }};font-size:15px;line-height:1.7;">
   vielen Dank für Ihr Feedback! Hier ist die Rückmeldung unseres Teams:
 </p>
 
-<div style="background:#f8fafc;border:1px solid {BORDER};border-radius:12px;padding:18px 22px;margin:0 0 18px;">
+<div style="background:#f8fafc;border:1px solid {{ BORDER }};border-radius:12px;padding:18px 22px;margin:0 0 18px;">
   <table role="presentation" width="100%" cellpadding="0" cellspacing="0">
     <tr>
-      <td style="padding:4px 0;color:{TEXT_MUTED};font-size:13px;width:90px;">Betreff</td>
-      <td style="padding:4px 0;color:{TEXT};font-size:13px;font-weight:600;">{feedback_title}</td>
+      <td style="padding:4px 0;color:{{ TEXT_MUTED }};font-size:13px;width:90px;">Betreff</td>
+      <td style="padding:4px 0;color:{{ TEXT }};font-size:13px;font-weight:600;">{{ feedback_title }}</td>
     </tr>
     <tr>
-      <td style="padding:4px 0;color:{TEXT_MUTED};font-size:13px;">Typ</td>
-      <td style="padding:4px 0;color:{TEXT};font-size:13px;">{type_label}</td>
+      <td style="padding:4px 0;color:{{ TEXT_MUTED }};font-size:13px;">Typ</td>
+      <td style="padding:4px 0;color:{{ TEXT }};font-size:13px;">{{ type_label }}</td>
     </tr>
     <tr>
-      <td style="padding:10px 0 0;color:{TEXT_MUTED};font-size:13px;vertical-align:top;">Status</td>
+      <td style="padding:10px 0 0;color:{{ TEXT_MUTED }};font-size:13px;vertical-align:top;">Status</td>
       <td style="padding:10px 0 0;">
-        <span style="display:inline-block;background:{cfg['bg']};color:{cfg['color']};border:1px solid {cfg['border']};border-radius:20px;padding:2px 12px;font-size:12px;font-weight:600;">
-          {cfg['icon']}&nbsp;{cfg['label']}
+        <span style="display:inline-block;background:{{ status_bg }};color:{{ status_color }};border:1px solid {{ status_border }};border-radius:20px;padding:2px 12px;font-size:12px;font-weight:600;">
+          {{ status_icon }}&nbsp;{{ status_label }}
         </span>
       </td>
     </tr>
   </table>
 </div>
 
-<div style="border-left:3px solid {PRIMARY};padding:14px 18px;background:#f8fafc;border-radius:0 10px 10px 0;margin:0 0 28px;">
-  <p style="margin:0 0 6px;color:{TEXT_MUTED};font-size:11px;font-weight:600;text-transform:uppercase;letter-spacing:0.5px;">Antwort des Teams</p>
-  <p style="margin:0;color:{TEXT};font-size:14px;line-height:1.7;">{admin_response}</p>
+<div style="border-left:3px solid {{ PRIMARY }};padding:14px 18px;background:#f8fafc;border-radius:0 10px 10px 0;margin:0 0 28px;">
+  <p style="margin:0 0 6px;color:{{ TEXT_MUTED }};font-size:11px;font-weight:600;text-transform:uppercase;letter-spacing:0.5px;">Antwort des Teams</p>
+  <p style="margin:0;color:{{ TEXT }};font-size:14px;line-height:1.7;">{{ admin_response }}</p>
 </div>
 
-{_divider()}
+{{ divider() }}
 
-<p style="margin:0;color:{TEXT_MUTED};font-size:13px;line-height:1.6;">
+<p style="margin:0;color:{{ TEXT_MUTED }};font-size:13px;line-height:1.6;">
   Haben Sie weiteres Feedback? Schreiben Sie uns über die <strong>Feedback-Funktion</strong> in der App.<br>
   Vielen Dank &ndash; Ihr VereinsKasse-Team 🙏
-</p>"""
+</p>""",
+}
+
+_env = Environment(loader=DictLoader(_TEMPLATES), autoescape=True)
+_env.globals.update({
+    name: Markup(value) for name, value in {
+        "PRIMARY": PRIMARY, "PRIMARY_DARK": PRIMARY_DARK, "BG": BG, "CARD": CARD, "TEXT": TEXT,
+        "TEXT_MUTED": TEXT_MUTED, "BORDER": BORDER, "WARNING_BG": WARNING_BG,
+        "WARNING_BORDER": WARNING_BORDER, "WARNING_TEXT": WARNING_TEXT, "FONT": FONT,
+        "FRONTEND_URL": settings.FRONTEND_URL,
+    }.items()
+})
+_env.globals["features"] = [
+    ("Kassenbuch", "Einnahmen & Ausgaben erfassen, kategorisieren, exportieren"),
+    ("Mitglieder", "Bis zu 50 Mitglieder kostenlos verwalten"),
+    ("Statistiken", "Dashboard mit Finanzen & Aktivitäten"),
+    ("Premium", "Unlimitierte Mitglieder & PDF-Export ab 0,99\u00a0€/Monat"),
+]
+_compiled = {name: _env.get_template(name) for name in _TEMPLATES}
+
+
+class _Prerendered:
+    """A rendered message cut at its per-recipient fields."""
+
+    def __init__(self, html: str):
+        self.parts = html.split(_FIELD)  # static text at even, field names at odd positions
+        self.slots = [(i, self.parts[i]) for i in range(1, len(self.parts), 2)]
+
+    def fill(self, values: dict) -> str:
+        out = self.parts.copy()
+        for i, name in self.slots:
+            out[i] = values[name]
+        return "".join(out)
+
+
+@lru_cache(maxsize=settings.EMAIL_TEMPLATE_CACHE_SIZE)
+def _prerender(
+    template: str, app_name: str, tagline: str, year: int, fixed: tuple, fields: tuple[str, ...],
+) -> _Prerendered:
+    placeholders = {field: Markup(f"{_FIELD}{field}{_FIELD}") for field in fields}
+    content = _compiled[template].render(**dict(fixed), **placeholders)
+    html = _compiled["layout.html"].render(app_name=app_name, tagline=tagline, year=year, content=Markup(content))
+    return _Prerendered(html)
+
+
+def _render(
+    template: str,
+    fields: dict,
+    fixed: Optional[dict] = None,
+    app_name: str = "VereinsKasse",
+    tagline: str = "Kassenverwaltung für Ihren Verein",
+) -> str:
+    """
+    Render `template` in the layout. `fixed` values are part of the cache key and
+    should repeat across messages; `fields` change per recipient. Empty fields count
+    as fixed so that conditional blocks are decided when prerendering.
+    """
+    fixed = dict(fixed) if fixed else {}
+    values = {}
+    for name, value in fields.items():
+        if value:
+            values[name] = html_escape(str(value))
+        else:
+            fixed[name] = value
+    prerendered = _prerender(template, app_name, tagline, datetime.now().year, tuple(fixed.items()), tuple(values))
+    return prerendered.fill(values)
+
+
+# ─────────────────────────────────────────────
+def smtp_configured() -> bool:
+    return bool(settings.SMTP_HOST) and settings.SMTP_HOST != "localhost"
+
+
+def build_message(
+    recipient: str,
+    subject: str,
+    html_body: str,
+    text_body: Optional[str] = None,
+    attachment: Optional[bytes] = None,
+    attachment_filename: Optional[str] = None,
+) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = settings.SMTP_FROM
+    msg["To"] = recipient
+
+    if text_body:
+        msg.attach(MIMEText(text_body, "plain", "utf-8"))
+    msg.attach(MIMEText(html_body, "html", "utf-8"))
+
+    if attachment and attachment_filename:
+        part = MIMEApplication(attachment, Name=attachment_filename)
+        part["Content-Disposition"] = f'attachment; filename="{attachment_filename}"'
+        msg.attach(part)
+    return msg
+
+
+async def send_email(
+    db: AsyncSession,
+    recipient: str,
+    subject: str,
+    html_body: str,
+    text_body: Optional[str] = None,
+    attachment: Optional[bytes] = None,
+    attachment_filename: Optional[str] = None,
+    payment_reminder_id: Optional[int] = None,
+) -> EmailLog:
+    """Queue an email in the outbox and commit; the outbox worker delivers it."""
+    from app.services import email_outbox
+
+    log_entry = EmailLog(
+        recipient=recipient,
+        subject=subject,
+        status="pending",
+        html_body=html_body,
+        text_body=text_body,
+        attachment=attachment,
+        attachment_filename=attachment_filename,
+        payment_reminder_id=payment_reminder_id,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(log_entry)
+    await db.commit()
+    email_outbox.notify()
+    return log_entry
+
+
+async def queue_emails(db: AsyncSession, messages: list[dict]) -> None:
+    """Queue several emails (send_email keyword arguments without db) with one INSERT and commit."""
+    from app.services import email_outbox
+
+    if not messages:
+        return
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(EmailLog), [{"status": "pending", "next_attempt_at": now, **m} for m in messages])
+    await db.commit()
+    email_outbox.notify()
+
+
+class SmtpPool:
+    """
+    A few persistent SMTP sessions shared by concurrent senders. Each session is opened
+    on first use, reused for every following message and paced by send_interval seconds.
+    """
+
+    def __init__(self, size: int, send_interval: float = 0.0):
+        self.send_interval = send_interval
+        self.connects = 0
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for _ in range(max(size, 1)):
+            self._idle.put_nowait(None)  # a free slot, connected lazily
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USER if settings.SMTP_USER else None,
+            password=settings.SMTP_PASSWORD if settings.SMTP_PASSWORD else None,
+            use_tls=False,
+            start_tls=settings.SMTP_TLS,
+        )
+        await smtp.connect()
+        self.connects += 1
+        return smtp
+
+    async def send(self, msg: MIMEMultipart) -> None:
+        smtp = await self._idle.get()
+        try:
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            try:
+                await smtp.send_message(msg)
+            except aiosmtplib.SMTPServerDisconnected:
+                # Idle sessions get dropped by the server; retry once on a fresh one
+                smtp = await self._connect()
+                await smtp.send_message(msg)
+            if self.send_interval:
+                await asyncio.sleep(self.send_interval)
+        except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+            # The server refused this message and aiosmtplib already reset the
+            # envelope; the session stays usable for the next one
+            # (smtp is still None if the very first connect was refused, e.g. a 535 on login)
+            if smtp is not None and not smtp.is_connected:
+                smtp = None
+            raise
+        except BaseException:
+            if smtp is not None:
+                smtp.close()
+            smtp = None
+            raise
+        finally:
+            self._idle.put_nowait(smtp)
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            smtp = self._idle.get_nowait()
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except Exception:
+                    smtp.close()
+
+
+# ─────────────────────────────────────────────
+# Template: Willkommen
+# ─────────────────────────────────────────────
+def build_welcome_email(name: str, organization: str) -> tuple[str, str]:
+    html = _render("welcome.html", {"name": name, "organization": organization})
+    text = f"Willkommen bei VereinsKasse, {name}! Ihr Konto fuer {organization} ist bereit. Login: {settings.FRONTEND_URL}/dashboard"
+    return html, text
+
+
+# ─────────────────────────────────────────────
+# Template: E-Mail verifizieren
+# ─────────────────────────────────────────────
+def build_verification_email(name: str, verify_url: str) -> tuple[str, str]:
+    html = _render("verification.html", {"name": name, "verify_url": verify_url})
+    text = f"Hallo {name}, bitte bestaetigen Sie Ihre E-Mail: {verify_url} (gueltig fuer 48 Stunden)."
+    return html, text
+
+
+# ─────────────────────────────────────────────
+# Template: Passwort zurücksetzen
+# ─────────────────────────────────────────────
+def build_password_reset_email(name: str, reset_url: str) -> tuple[str, str]:
+    html = _render("password_reset.html", {"name": name, "reset_url": reset_url})
+    text = f"Hallo {name}, setzen Sie Ihr Passwort zurueck: {reset_url} (gueltig fuer 1 Stunde). Falls Sie diese Anfrage nicht gestellt haben, ignorieren Sie diese E-Mail."
+    return html, text
+
+
+# ─────────────────────────────────────────────
+# Template: Zahlungserinnerung
+# ─────────────────────────────────────────────
+def build_payment_reminder_email(
+    member_name: str,
+    organization: str,
+    amount: float,
+    due_date: str,
+    notes: Optional[str] = None,
+) -> tuple[str, str]:
+    html = _render(
+        "payment_reminder.html",
+        {"member_name": member_name, "amount": f"{amount:.2f}", "due_date": due_date, "notes": notes},
+        fixed={"organization": organization},
+        app_name=organization,
+        tagline="Zahlungserinnerung",
+    )
+    text = f"Zahlungserinnerung von {organization} an {member_name}: {amount:.2f} EUR faellig am {due_date}."
+    return html, text
+
+
+# ─────────────────────────────────────────────
+# Template: Feedback-Antwort
+# ─────────────────────────────────────────────
+def build_feedback_response_email(
+    user_name: str,
+    feedback_title: str,
+    feedback_type: str,
+    admin_response: str,
+    status: str,
+) -> tuple[str, str]:
+    status_cfg = {
+        "approved":  {"label": "Angenommen",     "color": "#16a34a", "bg": "#f0fdf4", "border": "#bbf7d0", "icon": "✅"},
+        "rejected":  {"label": "Abgelehnt",      "color": "#dc2626", "bg": "#fef2f2", "border": "#fecaca", "icon": "❌"},
+        "in_review": {"label": "In Bearbeitung", "color": "#d97706", "bg": "#fffbeb", "border": "#fde68a", "icon": "🔍"},
+    }
+    cfg = status_cfg.get(status, {"label": status, "color": TEXT_MUTED, "bg": "#f8fafc", "border": BORDER, "icon": "📋"})
+
+    type_labels = {"bug": "Fehlermeldung", "feature": "Feature-Wunsch", "general": "Allgemeines Feedback"}
+    type_label = type_labels.get(feedback_type, feedback_type)
 
-    html = _email_wrapper(content)
+    html = _render(
+        "feedback_response.html",
+        {"user_name": user_name, "feedback_title": feedback_title, "admin_response": admin_response},
+        fixed={"type_label": type_label, **{f"status_{key}": value for key, value in cfg.items()}},
+    )
     text = f"Hallo {user_name}, Ihr Feedback '{feedback_title}' wurde bearbeitet. Status: {cfg['label']}. Antwort: {admin_response}"
     return html, text
@@ -0,0 +1,65 @@
+"""
+Wartungsjobs für den Scheduler (siehe services/scheduler).
+
+- Zahlungserinnerungen, deren Fälligkeit überschritten ist, wechseln von
+  ``pending``/``sent`` auf ``overdue``.
+- Premium-Abos, deren ``subscription_expires_at`` abgelaufen ist, fallen auf
+  ``free`` zurück (Stripe verlängert über den Webhook wieder auf ``premium``).
+
+Beide ändern Zeilen in Blöcken von SCHEDULER_BATCH_SIZE mit je einem UPDATE
+und Commit, damit lange Läufe keine großen Sperren halten.
+"""
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.payment_reminder import PaymentReminder
+from app.models.user import User
+
+
+async def _update_in_batches(db: AsyncSession, model, conditions: list, values: dict, batch_size: int) -> int:
+    """UPDATE the rows matching conditions, at most batch_size per statement; returns the number changed."""
+    changed = 0
+    while True:
+        batch = select(model.id).where(*conditions).limit(batch_size).scalar_subquery()
+        result = await db.execute(
+            update(model)
+            .where(model.id.in_(batch))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        changed += result.rowcount
+        if result.rowcount < batch_size:
+            return changed
+
+
+async def sweep_overdue_reminders(db: AsyncSession, today: Optional[date] = None) -> int:
+    """Mark pending and sent reminders past their due date as overdue."""
+    return await _update_in_batches(
+        db,
+        PaymentReminder,
+        [
+            PaymentReminder.status.in_(["pending", "sent"]),
+            PaymentReminder.due_date < (today or date.today()),
+        ],
+        {"status": "overdue"},
+        settings.SCHEDULER_BATCH_SIZE,
+    )
+
+
+async def expire_premium_subscriptions(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Downgrade premium accounts whose subscription ran out."""
+    return await _update_in_batches(
+        db,
+        User,
+        [
+            User.subscription_tier == "premium",
+            User.subscription_expires_at < (now or datetime.now(timezone.utc)),
+        ],
+        {"subscription_tier": "free"},
+        settings.SCHEDULER_BATCH_SIZE,
+    )
@@ -0,0 +1,125 @@
+"""
+Unscharfe Zuordnung von Auftraggebernamen zu Mitgliedern.
+
+Namen werden vor dem Vergleich normalisiert (``normalize_member_name``:
+Umlaute transliteriert, Akzente und Satzzeichen entfernt), damit "Mueller"
+und "Müller" gleich aussehen. Verglichen wird über Trigramme wie bei
+PostgreSQLs ``pg_trgm``. Die Reihenfolge der Wörter spielt dabei keine Rolle,
+"Mustermann, Erika" passt also auf "Erika Mustermann".
+
+Unter PostgreSQL mit ``pg_trgm`` beantwortet der GIN-Index
+``ix_members_search_name_trgm`` alle Namen eines Blocks in einer Abfrage (eine
+Index-Suche pro Name über ``LATERAL``). Fehlt die Erweiterung (oder unter
+SQLite), wird ein invertierter Trigramm-Index im Speicher aufgebaut; auch dort
+werden pro Name nur Mitglieder mit gemeinsamen Trigrammen betrachtet.
+
+Ergebnis pro Name: bis zu BANK_FUZZY_MATCH_CANDIDATES Kandidaten als
+(member_id, score), absteigend nach Ähnlichkeit (0.0 – 1.0).
+"""
+from collections import Counter, defaultdict
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.member import Member, normalize_member_name
+
+# Set once per process; the index only exists where migration 018 found pg_trgm
+_trgm_index_available: Optional[bool] = None
+
+_TRGM_SEARCH = text(
+    """
+    SELECT q.n, m.id, similarity(m.search_name, q.name) AS score
+    FROM unnest(CAST(:names AS text[])) WITH ORDINALITY AS q(name, n)
+    CROSS JOIN LATERAL (
+        SELECT id, search_name FROM members
+        WHERE user_id = :user_id AND status = 'active' AND search_name % q.name
+        ORDER BY similarity(search_name, q.name) DESC, id
+        LIMIT :limit
+    ) m
+    """
+)
+
+
+def trigrams(normalized: str) -> set[str]:
+    """Trigram set as computed by pg_trgm: every word padded with two leading and one trailing blank."""
+    grams: set[str] = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Inverted trigram index over member names, used when pg_trgm is not available."""
+
+    def __init__(self, members: list[Member]):
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        self._sizes: dict[int, int] = {}
+        for member in members:
+            grams = trigrams(normalize_member_name(member.full_name))
+            self._sizes[member.id] = len(grams)
+            for gram in grams:
+                self._postings[gram].append(member.id)
+
+    def search(self, name: str, threshold: float, limit: int) -> list[tuple[int, float]]:
+        grams = trigrams(normalize_member_name(name))
+        if not grams:
+            return []
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        candidates = []
+        for member_id, count in shared.items():
+            score = count / (len(grams) + self._sizes[member_id] - count)
+            if score >= threshold:
+                candidates.append((member_id, round(score, 3)))
+        candidates.sort(key=lambda c: (-c[1], c[0]))
+        return candidates[:limit]
+
+
+async def _has_trgm_index(db: AsyncSession) -> bool:
+    global _trgm_index_available
+    if _trgm_index_available is None:
+        if db.get_bind().dialect.name != "postgresql":
+            _trgm_index_available = False
+        else:
+            result = await db.execute(
+                text("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_members_search_name_trgm'")
+            )
+            _trgm_index_available = result.scalar() is not None
+    return _trgm_index_available
+
+
+class FuzzyMemberIndex:
+    def __init__(self, user_id: int, index: Optional[TrigramIndex]):
+        self._user_id = user_id
+        self._index = index  # None: ask PostgreSQL
+        self.threshold = settings.BANK_FUZZY_MATCH_THRESHOLD
+        self.limit = settings.BANK_FUZZY_MATCH_CANDIDATES
+
+    @classmethod
+    async def load(cls, db: AsyncSession, user_id: int, active_members: list[Member]) -> "FuzzyMemberIndex":
+        if await _has_trgm_index(db):
+            return cls(user_id, None)
+        return cls(user_id, TrigramIndex(active_members))
+
+    async def search_many(self, db: AsyncSession, names: list[str]) -> list[list[tuple[int, float]]]:
+        """Ranked (member_id, score) candidates for every name, in input order."""
+        if self._index is not None:
+            return [self._index.search(name, self.threshold, self.limit) for name in names]
+
+        normalized = [normalize_member_name(name) for name in names]
+        results: list[list[tuple[int, float]]] = [[] for _ in names]
+        if not any(normalized):
+            return results
+        # Transaction-local; lets the % operator (and thus the index) apply our threshold
+        await db.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {"threshold": str(self.threshold)},
+        )
+        rows = await db.execute(_TRGM_SEARCH, {"names": normalized, "user_id": self._user_id, "limit": self.limit})
+        for n, member_id, score in rows:
+            results[n - 1].append((member_id, round(float(score), 3)))
+        return results
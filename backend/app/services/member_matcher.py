@@ -0,0 +1,155 @@
+"""
+Zuordnung von Bankbuchungen zu Mitgliedern.
+
+Der ``MemberMatcher`` wird einmal pro Import mit einer einzigen Abfrage
+aufgebaut: eine IBAN-Hashtabelle über alle Mitglieder des Vereins und ein
+Aho-Corasick-Automat über die (kleingeschriebenen) Nachnamen der aktiven
+Mitglieder. Jede Bankzeile wird danach in einem Durchlauf über Auftraggeber
+und Verwendungszweck zugeordnet, ohne weitere Datenbankabfragen.
+
+Regeln (unverändert gegenüber dem früheren Einzelabgleich):
+1. IBAN stimmt exakt überein → "iban" (Status egal)
+2. Nachname (mind. 3 Zeichen) kommt in Auftraggeber/Verwendungszweck vor
+   → "name"; bei mehreren Treffern gewinnt das zuerst angelegte Mitglied.
+   Der volle Name enthält den Nachnamen, ein eigener Vergleich ist unnötig.
+3. Sonst: unscharfer Vergleich des Auftraggebers mit den Namen der aktiven
+   Mitglieder (siehe member_fuzzy) → "fuzzy", wenn der beste Kandidat
+   mindestens BANK_FUZZY_MATCH_THRESHOLD erreicht. Dafür ist ``match_lines``
+   da: eine Abfrage pro Block statt einer pro Zeile.
+"""
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.member import Member
+from app.services.member_fuzzy import FuzzyMemberIndex
+
+MIN_NAME_LENGTH = 3
+
+# (member, match_type, confidence, ranked fuzzy candidates as (member_id, score))
+LineMatch = tuple[Optional[Member], str, Optional[float], list[tuple[int, float]]]
+
+
+class NameAutomaton:
+    """Aho-Corasick automaton that reports the lowest rank of any pattern found in a text."""
+
+    def __init__(self, patterns: dict[str, int]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._best: list[Optional[int]] = [None]
+        for pattern, rank in patterns.items():
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._best.append(None)
+                node = nxt
+            if self._best[node] is None or rank < self._best[node]:
+                self._best[node] = rank
+        self._fail = [0] * len(self._goto)
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        # Breadth-first, so a node's failure target is final before its children are visited
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Fold the suffix outputs in: best[child] covers every pattern ending here
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+                queue.append(child)
+
+    def best_match(self, text: str) -> Optional[int]:
+        goto, fail, best = self._goto, self._fail, self._best
+        node = 0
+        found: Optional[int] = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            rank = best[node]
+            if rank is not None and (found is None or rank < found):
+                found = rank
+                if found == 0:
+                    break
+        return found
+
+
+class MemberMatcher:
+    def __init__(self, members: list[Member], fuzzy: Optional[FuzzyMemberIndex] = None):
+        self._by_id: dict[int, Member] = {member.id: member for member in members}
+        self._by_iban: dict[str, Member] = {}
+        self._ranked: list[Member] = []
+        self._fuzzy = fuzzy
+        patterns: dict[str, int] = {}
+        for member in members:
+            if member.iban:
+                self._by_iban.setdefault(member.iban, member)
+            if member.status != "active":
+                continue
+            last = member.last_name.lower()
+            if len(last) < MIN_NAME_LENGTH:
+                continue
+            rank = len(self._ranked)
+            self._ranked.append(member)
+            patterns.setdefault(last, rank)
+        self._names = NameAutomaton(patterns)
+
+    @classmethod
+    async def load(cls, db: AsyncSession, user_id: int) -> "MemberMatcher":
+        result = await db.execute(select(Member).where(Member.user_id == user_id).order_by(Member.id))
+        members = list(result.scalars().all())
+        fuzzy = await FuzzyMemberIndex.load(db, user_id, [m for m in members if m.status == "active"])
+        return cls(members, fuzzy)
+
+    def match(
+        self,
+        iban: Optional[str],
+        counterparty: Optional[str],
+        purpose: Optional[str],
+    ) -> tuple[Optional[Member], str]:
+        """Returns (member, "iban" | "name") or (None, "")."""
+        if iban:
+            member = self._by_iban.get(iban)
+            if member:
+                return member, "iban"
+
+        search_text = " ".join(filter(None, [counterparty, purpose])).lower()
+        rank = self._names.best_match(search_text)
+        if rank is not None:
+            return self._ranked[rank], "name"
+        return None, ""
+
+    async def match_lines(self, db: AsyncSession, lines: list[dict]) -> list[LineMatch]:
+        """
+        Match a chunk of bank lines. Exact rules score 1.0; lines they miss are looked up
+        by counterparty name in the fuzzy index, all in one query.
+        """
+        matches: list[LineMatch] = []
+        misses: list[int] = []
+        for i, line in enumerate(lines):
+            member, match_type = self.match(line["iban"], line["counterparty"], line["purpose"])
+            matches.append((member, match_type, 1.0 if member else None, []))
+            if not member and line["counterparty"] and self._fuzzy is not None:
+                misses.append(i)
+
+        if misses:
+            found = await self._fuzzy.search_many(db, [lines[i]["counterparty"] for i in misses])
+            for i, candidates in zip(misses, found):
+                candidates = [(member_id, score) for member_id, score in candidates if member_id in self._by_id]
+                if candidates:
+                    member_id, score = candidates[0]
+                    matches[i] = (self._by_id[member_id], "fuzzy", score, candidates)
+        return matches
+
+    def member_name(self, member_id: int) -> str:
+        return self._by_id[member_id].full_name
@@ -0,0 +1,110 @@
+"""
+Festplatten-Cache für erzeugte PDFs (Jahresabschluss, Zuwendungsbestätigungen).
+
+Der Schlüssel ist ein SHA-256 über Verein, Dokumentart, Parameter und einen
+Daten-Fingerprint der zugrunde liegenden Buchungen (Anzahl, Summe, höchste ID,
+letzte Änderung). Ändert sich eine Buchung im abgedeckten Zeitraum, ändert sich
+der Fingerprint und damit der Schlüssel – alte Einträge werden nie wieder
+getroffen und per LRU (Zugriffszeit = mtime) verdrängt, sobald die
+Gesamtgröße PDF_CACHE_MAX_BYTES übersteigt.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+async def transactions_fingerprint(db: AsyncSession, *conditions) -> str:
+    """Data version of all transactions matching `conditions`, in a single query."""
+    result = await db.execute(
+        select(
+            func.count(Transaction.id),
+            func.max(Transaction.id),
+            func.sum(Transaction.amount),
+            func.max(Transaction.updated_at),
+        ).where(*conditions)
+    )
+    return "|".join(str(value) for value in result.one())
+
+
+class PdfCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, user_id: int, kind: str, params: dict[str, Any], fingerprint: str) -> str:
+        payload = json.dumps(
+            {"user_id": user_id, "kind": kind, "params": params, "fingerprint": fingerprint},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, pdf: bytes) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_name, self._path(key))
+            self._evict()
+        except OSError as e:
+            # The cache is an optimization only; never fail the request because of it
+            logger.warning(f"PDF cache write failed: {e}")
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pdf"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+pdf_cache = PdfCache(settings.PDF_CACHE_DIR, settings.PDF_CACHE_MAX_BYTES)
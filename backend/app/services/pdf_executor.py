@@ -0,0 +1,154 @@
+"""
+PDF-Rendering außerhalb des Event-Loops.
+
+Die ReportLab-Generatoren in ``pdf_service`` sind synchron und CPU-lastig. Alle
+PDF-Endpunkte rendern deshalb über einen Prozess-Pool: die Warteschlange ist
+begrenzt (volle Queue → 503), jeder Job hat ein Zeitlimit (→ 504), und
+Queue-Tiefe sowie Renderzeiten werden für ``/admin/pdf-metrics`` mitgeschrieben.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PdfRenderError(Exception):
+    status_code = 500
+    detail = "PDF konnte nicht erstellt werden"
+
+
+class PdfQueueFull(PdfRenderError):
+    status_code = 503
+    detail = "PDF-Erstellung ausgelastet, bitte in Kürze erneut versuchen"
+
+
+class PdfRenderTimeout(PdfRenderError):
+    status_code = 504
+    detail = "PDF-Erstellung hat zu lange gedauert"
+
+
+def _timed_render(func: Callable[..., bytes], kwargs: dict) -> tuple[bytes, float]:
+    """Runs inside the worker process; returns the PDF and the pure render time."""
+    started = time.perf_counter()
+    pdf = func(**kwargs)
+    return pdf, time.perf_counter() - started
+
+
+class PdfRenderPool:
+    def __init__(self, workers: int, queue_limit: int, timeout: float):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._jobs: dict[str, dict[str, Any]] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _job_stats(self, kind: str) -> dict[str, Any]:
+        return self._jobs.setdefault(kind, {
+            "rendered": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "render_seconds_total": 0.0,
+            "render_seconds_max": 0.0,
+            "wait_seconds_total": 0.0,
+        })
+
+    async def render(self, kind: str, func: Callable[..., bytes], **kwargs) -> bytes:
+        """Render func(**kwargs) in a worker process. func must be a module-level function."""
+        if self._in_flight >= self.queue_limit:
+            self._rejected += 1
+            raise PdfQueueFull()
+
+        stats = self._job_stats(kind)
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        job = None
+        try:
+            job = self._get_executor().submit(_timed_render, func, kwargs)
+            # The slot stays taken until the worker is done, even if the request gives up first
+            job.add_done_callback(lambda _: self._release_from_worker(loop))
+            pdf, render_seconds = await asyncio.wait_for(asyncio.wrap_future(job), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # The worker keeps running until ReportLab returns; only the request is released.
+            stats["timed_out"] += 1
+            logger.warning(f"PDF render '{kind}' exceeded {self.timeout}s")
+            raise PdfRenderTimeout()
+        except BrokenProcessPool:
+            stats["failed"] += 1
+            logger.error("PDF render pool broken, restarting")
+            self._executor = None
+            raise PdfRenderError()
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error(f"PDF render '{kind}' failed: {e}")
+            raise PdfRenderError()
+        finally:
+            if job is None:
+                self._in_flight -= 1
+
+        stats["rendered"] += 1
+        stats["render_seconds_total"] += render_seconds
+        stats["render_seconds_max"] = max(stats["render_seconds_max"], render_seconds)
+        stats["wait_seconds_total"] += max(time.perf_counter() - submitted - render_seconds, 0.0)
+        return pdf
+
+    def _release_from_worker(self, loop: asyncio.AbstractEventLoop) -> None:
+        def release() -> None:
+            self._in_flight -= 1
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            pass  # the loop is already closed
+
+    def metrics(self) -> dict[str, Any]:
+        jobs = {}
+        for kind, stats in self._jobs.items():
+            rendered = stats["rendered"]
+            jobs[kind] = {
+                **stats,
+                "render_seconds_avg": stats["render_seconds_total"] / rendered if rendered else 0.0,
+                "wait_seconds_avg": stats["wait_seconds_total"] / rendered if rendered else 0.0,
+            }
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "timeout_seconds": self.timeout,
+            "in_flight": self._in_flight,
+            "queued": max(self._in_flight - self.workers, 0),
+            "rejected": self._rejected,
+            "jobs": jobs,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pdf_pool = PdfRenderPool(
+    workers=settings.PDF_RENDER_WORKERS,
+    queue_limit=settings.PDF_RENDER_QUEUE_LIMIT,
+    timeout=settings.PDF_RENDER_TIMEOUT,
+)
+
+
+async def render_pdf(kind: str, func: Callable[..., bytes], **kwargs) -> bytes:
+    return await pdf_pool.render(kind, func, **kwargs)
@@ -0,0 +1,168 @@
+"""
+Periodische Jobs im App-Prozess.
+
+Jeder uvicorn-Worker startet im Lifespan eine Schleife, die alle
+SCHEDULER_TICK_SECONDS die fälligen Jobs prüft. Damit ein Job trotzdem nur
+einmal läuft, holt sich ein Worker vorher per atomarem UPDATE auf
+``scheduled_jobs`` einen Lease: nur wer die Zeile mit fälligem
+``next_run_at`` und ohne gültigen Lease ändern konnte, führt den Job aus.
+Stirbt der Worker mittendrin, übernimmt nach SCHEDULER_LEASE_SECONDS ein
+anderer.
+
+Jeder Lauf wird mit Dauer, geänderten Zeilen und Fehler in
+``scheduled_job_runs`` festgehalten; die letzten Werte stehen zusätzlich in
+``scheduled_jobs``.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal, dialect_insert
+from app.models.scheduled_job import ScheduledJob, ScheduledJobRun
+from app.services import maintenance
+
+logger = logging.getLogger(__name__)
+
+worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_task: Optional[asyncio.Task] = None
+
+
+class PeriodicJob:
+    def __init__(self, name: str, interval_seconds: int, run: Callable[[AsyncSession], Awaitable[int]]):
+        self.name = name
+        self.interval = timedelta(seconds=interval_seconds)
+        self.run = run  # returns the number of rows changed
+
+
+JOBS = [
+    PeriodicJob("overdue_reminders", settings.OVERDUE_SWEEP_INTERVAL_SECONDS, maintenance.sweep_overdue_reminders),
+    PeriodicJob("premium_expiry", settings.PREMIUM_EXPIRY_INTERVAL_SECONDS, maintenance.expire_premium_subscriptions),
+]
+
+
+async def ensure_jobs(db: AsyncSession, jobs: list[PeriodicJob]) -> None:
+    """Create missing schedule rows; new jobs are due immediately."""
+    await db.execute(
+        dialect_insert(db, ScheduledJob).values([{"name": job.name} for job in jobs]).on_conflict_do_nothing()
+    )
+    await db.commit()
+
+
+async def acquire_lease(db: AsyncSession, job: PeriodicJob, now: datetime) -> bool:
+    """Take the job's lease if it is due and nobody holds a valid lease."""
+    result = await db.execute(
+        update(ScheduledJob)
+        .where(
+            ScheduledJob.name == job.name,
+            ScheduledJob.next_run_at <= now,
+            or_(ScheduledJob.lease_expires_at.is_(None), ScheduledJob.lease_expires_at < now),
+        )
+        .values(lease_owner=worker_id, lease_expires_at=now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def _run(db: AsyncSession, job: PeriodicJob, started_at: datetime) -> None:
+    started = time.perf_counter()
+    rows, error = 0, None
+    try:
+        rows = await job.run(db)
+    except Exception as e:
+        await db.rollback()
+        logger.exception(f"Scheduled job {job.name} failed")
+        error = f"{type(e).__name__}: {e}"[:2000]
+    duration_ms = int((time.perf_counter() - started) * 1000)
+
+    await db.execute(
+        update(ScheduledJob)
+        .where(ScheduledJob.name == job.name, ScheduledJob.lease_owner == worker_id)
+        .values(
+            next_run_at=started_at + job.interval,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_started_at=started_at,
+            last_duration_ms=duration_ms,
+            last_rows=rows,
+            last_error=error,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(insert(ScheduledJobRun).values(
+        job_name=job.name,
+        worker=worker_id,
+        started_at=started_at,
+        duration_ms=duration_ms,
+        rows=rows,
+        error=error,
+    ))
+    await db.execute(
+        delete(ScheduledJobRun).where(
+            ScheduledJobRun.job_name == job.name,
+            ScheduledJobRun.started_at < started_at - timedelta(days=settings.SCHEDULER_RUN_RETENTION_DAYS),
+        )
+    )
+    await db.commit()
+
+
+async def run_due_jobs(
+    session_factory: async_sessionmaker[AsyncSession],
+    jobs: Optional[list[PeriodicJob]] = None,
+) -> list[str]:
+    """Run every due job this worker can lease; returns the names of the jobs it ran."""
+    ran = []
+    for job in jobs or JOBS:
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            if await acquire_lease(db, job, now):
+                await _run(db, job, now)
+                ran.append(job.name)
+    return ran
+
+
+async def _loop(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    while True:
+        try:
+            async with session_factory() as db:
+                await ensure_jobs(db, JOBS)
+            break
+        except Exception:
+            logger.exception("Scheduler could not register its jobs")
+            await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+
+    while True:
+        try:
+            await run_due_jobs(session_factory)
+        except Exception:
+            logger.exception("Scheduler tick failed")
+        await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+
+
+def start(session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal) -> None:
+    global _task
+    if settings.SCHEDULER_ENABLED and _task is None:
+        _task = asyncio.create_task(_loop(session_factory))
+
+
+async def shutdown() -> None:
+    """Stop the loop; a job cancelled mid-run keeps its lease until it expires."""
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
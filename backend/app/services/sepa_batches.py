@@ -0,0 +1,104 @@
+"""
+Aufteilung eines SEPA-Lastschrifteinzugs auf mehrere Dateien.
+
+Erstlastschriften (FRST) und Folgelastschriften (RCUR) dürfen nicht im selben
+``PmtInf`` stehen und können unterschiedliche Fälligkeitsdaten haben. Der
+``BatchPlanner`` bildet daher je Gruppe (Sequenztyp, Fälligkeitsdatum) Dateien
+mit höchstens ``max_transactions`` Lastschriften und ``max_amount`` Euro –
+viele Banken lehnen größere Dateien ab.
+
+Die Lastschriften kommen nach Gruppe sortiert aus dem Datenbank-Cursor; eine
+Datei ist fertig, sobald die nächste nicht mehr hineinpasst. ``stream_zip``
+rendert fertige Dateien in Worker-Threads, während der Cursor weiterliest, und
+schreibt sie in Planungsreihenfolge in ein gestreamtes ZIP.
+"""
+import asyncio
+import zipfile
+from collections import deque
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Hashable, Optional
+
+
+class BatchPlanner:
+    """Cuts a group-sorted sequence of debits into files within the count and amount limits."""
+
+    def __init__(self, max_transactions: int, max_amount: Optional[Decimal] = None):
+        self.max_transactions = max_transactions
+        self.max_amount = max_amount or None
+        self._current: Optional[dict] = None
+        self._numbers: dict[Hashable, int] = {}
+
+    def _fits(self, key: Hashable, amount: Decimal) -> bool:
+        batch = self._current
+        if batch["key"] != key or batch["nb_txs"] >= self.max_transactions:
+            return False
+        return self.max_amount is None or batch["ctrl_sum"] + amount <= self.max_amount
+
+    def add(self, key: Hashable, item, amount: Decimal) -> Optional[dict]:
+        """Add one debit; returns the previous batch if this debit started a new one."""
+        completed = None
+        if self._current is not None and not self._fits(key, amount):
+            completed, self._current = self._current, None
+        if self._current is None:
+            # A single debit above max_amount still gets a file of its own
+            self._numbers[key] = self._numbers.get(key, 0) + 1
+            self._current = {"key": key, "number": self._numbers[key], "items": [], "nb_txs": 0, "ctrl_sum": Decimal("0")}
+        self._current["items"].append(item)
+        self._current["nb_txs"] += 1
+        self._current["ctrl_sum"] += amount
+        return completed
+
+    def finish(self) -> Optional[dict]:
+        """The last, partly filled batch."""
+        completed, self._current = self._current, None
+        return completed
+
+
+class _ZipBuffer:
+    """Write-only sink for zipfile; the written bytes are collected and handed out in pieces."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+async def stream_zip(
+    files: AsyncIterator[tuple[str, Callable[[], bytes]]],
+    concurrency: int,
+) -> AsyncIterator[bytes]:
+    """
+    Render (name, render) pairs in worker threads, at most `concurrency` ahead of the
+    writer, and yield a ZIP archive containing them in the order they were produced.
+    """
+    buffer = _ZipBuffer()
+    archive = zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED)
+    pending: deque[tuple[str, asyncio.Future]] = deque()
+
+    async def write_next() -> bytes:
+        name, rendered = pending.popleft()
+        await asyncio.to_thread(archive.writestr, name, await rendered)
+        return buffer.take()
+
+    try:
+        async for name, render in files:
+            pending.append((name, asyncio.ensure_future(asyncio.to_thread(render))))
+            if len(pending) >= max(concurrency, 1):
+                yield await write_next()
+        while pending:
+            yield await write_next()
+        archive.close()
+        yield buffer.take()
+    finally:
+        for _, rendered in pending:
+            rendered.cancel()
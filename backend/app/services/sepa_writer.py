@@ -0,0 +1,180 @@
+"""
+SEPA-Lastschriftdatei (pain.008.003.02) als Stream.
+
+Statt eines ElementTree mit allen Transaktionen schreibt ``Pain008Writer`` das
+Dokument in drei Teilen: Kopf (GrpHdr und PmtInf bis zum Gläubiger), je eine
+``DrctDbtTxInf`` pro Mitglied und den Abschluss. Anzahl und Kontrollsumme im
+Kopf kommen vorab aus einer Aggregat-Abfrage, die Transaktionen danach direkt
+aus dem Datenbank-Cursor (siehe api/sepa.py).
+
+Die Ausgabe ist zeichengleich mit dem früheren ``ET.indent``/``ET.tostring``:
+zwei Leerzeichen Einrückung, leere Elemente als ``<Tag />``.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from xml.sax.saxutils import escape
+
+NAMESPACE = "urn:iso:std:iso:20022:tech:xsd:pain.008.003.02"
+INDENT = "  "
+
+_ALLOWED = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 /-?:().,'+äöüÄÖÜß")
+
+
+def clean_sepa_string(s: str) -> str:
+    """Remove characters not allowed in SEPA XML."""
+    return "".join(c for c in s if c in _ALLOWED).strip()[:140]
+
+
+def format_amount(amount: Decimal) -> str:
+    return f"{float(amount):.2f}"
+
+
+def _leaf(level: int, tag: str, text: Optional[str], attrs: str = "") -> str:
+    pad = INDENT * level
+    if not text:
+        return f"{pad}<{tag}{attrs} />\n"
+    return f"{pad}<{tag}{attrs}>{escape(text)}</{tag}>\n"
+
+
+def _open(level: int, tag: str, attrs: str = "") -> str:
+    return f"{INDENT * level}<{tag}{attrs}>\n"
+
+
+def _close(level: int, tag: str) -> str:
+    return f"{INDENT * level}</{tag}>\n"
+
+
+class Pain008Writer:
+    """Renders one pain.008 document with a single PmtInf block, piece by piece."""
+
+    def __init__(
+        self,
+        creditor_name: str,
+        creditor_iban: str,
+        creditor_bic: str,
+        creditor_id: str,
+        collection_date: date,
+        msg_id: str,
+        creation_dt: str,
+        sequence_type: str = "RCUR",
+    ):
+        self.creditor_name = clean_sepa_string(creditor_name)
+        self.creditor_iban = creditor_iban.replace(" ", "")
+        self.creditor_bic = creditor_bic
+        self.creditor_id = creditor_id
+        self.collection_date = collection_date
+        self.msg_id = msg_id
+        self.creation_dt = creation_dt
+        self.sequence_type = sequence_type
+        self._period = collection_date.strftime("%Y%m")
+        self._month_label = collection_date.strftime("%B %Y")
+        # Identical in every transaction
+        self._scheme_id = "".join([
+            _open(5, "CdtrSchmeId"),
+            _open(6, "Id"),
+            _open(7, "PrvtId"),
+            _open(8, "Othr"),
+            _leaf(9, "Id", creditor_id),
+            _open(9, "SchmeNm"),
+            _leaf(10, "Prtry", "SEPA"),
+            _close(9, "SchmeNm"),
+            _close(8, "Othr"),
+            _close(7, "PrvtId"),
+            _close(6, "Id"),
+            _close(5, "CdtrSchmeId"),
+        ])
+
+    def start(self, nb_txs: int, ctrl_sum: Decimal) -> str:
+        """XML declaration, group header and payment information up to the creditor agent."""
+        return "".join([
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            _open(0, "Document", f' xmlns="{NAMESPACE}"'),
+            _open(1, "CstmrDrctDbtInitn"),
+            _open(2, "GrpHdr"),
+            _leaf(3, "MsgId", self.msg_id),
+            _leaf(3, "CreDtTm", self.creation_dt),
+            _leaf(3, "NbOfTxs", str(nb_txs)),
+            _leaf(3, "CtrlSum", format_amount(ctrl_sum)),
+            _open(3, "InitgPty"),
+            _leaf(4, "Nm", self.creditor_name),
+            _close(3, "InitgPty"),
+            _close(2, "GrpHdr"),
+            _open(2, "PmtInf"),
+            _leaf(3, "PmtInfId", f"{self.msg_id}-PMT"),
+            _leaf(3, "PmtMtd", "DD"),
+            _leaf(3, "NbOfTxs", str(nb_txs)),
+            _leaf(3, "CtrlSum", format_amount(ctrl_sum)),
+            _open(3, "PmtTpInf"),
+            _open(4, "SvcLvl"),
+            _leaf(5, "Cd", "SEPA"),
+            _close(4, "SvcLvl"),
+            _open(4, "LclInstrm"),
+            _leaf(5, "Cd", "CORE"),
+            _close(4, "LclInstrm"),
+            _leaf(4, "SeqTp", self.sequence_type),
+            _close(3, "PmtTpInf"),
+            _leaf(3, "ReqdColltnDt", self.collection_date.isoformat()),
+            _open(3, "Cdtr"),
+            _leaf(4, "Nm", self.creditor_name),
+            _close(3, "Cdtr"),
+            _open(3, "CdtrAcct"),
+            _open(4, "Id"),
+            _leaf(5, "IBAN", self.creditor_iban),
+            _close(4, "Id"),
+            _close(3, "CdtrAcct"),
+            _open(3, "CdtrAgt"),
+            _open(4, "FinInstnId"),
+            _leaf(5, "BIC", self.creditor_bic),
+            _close(4, "FinInstnId"),
+            _close(3, "CdtrAgt"),
+        ])
+
+    def transaction(
+        self,
+        member_id: int,
+        full_name: str,
+        iban: str,
+        amount: Decimal,
+        member_since: Optional[date],
+        member_number: Optional[str],
+    ) -> str:
+        """One DrctDbtTxInf block."""
+        return "".join([
+            _open(3, "DrctDbtTxInf"),
+            _open(4, "PmtId"),
+            _leaf(5, "EndToEndId", f"BEITRAG-{member_id}-{self._period}"),
+            _close(4, "PmtId"),
+            _leaf(4, "InstdAmt", format_amount(amount), ' Ccy="EUR"'),
+            _open(4, "DrctDbtTx"),
+            _open(5, "MndtRltdInf"),
+            _leaf(6, "MndtId", f"MANDAT-{member_id}"),
+            _leaf(6, "DtOfSgntr", (member_since or self.collection_date).isoformat()),
+            _close(5, "MndtRltdInf"),
+            self._scheme_id,
+            _close(4, "DrctDbtTx"),
+            # Debtor Agent (no BIC needed for IBAN-only SEPA)
+            _open(4, "DbtrAgt"),
+            _open(5, "FinInstnId"),
+            _leaf(6, "Othr", None),
+            _close(5, "FinInstnId"),
+            _close(4, "DbtrAgt"),
+            _open(4, "Dbtr"),
+            _leaf(5, "Nm", clean_sepa_string(full_name)),
+            _close(4, "Dbtr"),
+            _open(4, "DbtrAcct"),
+            _open(5, "Id"),
+            _leaf(6, "IBAN", iban.replace(" ", "")),
+            _close(5, "Id"),
+            _close(4, "DbtrAcct"),
+            _open(4, "Purp"),
+            _leaf(5, "Cd", "MSVC"),
+            _close(4, "Purp"),
+            _open(4, "RmtInf"),
+            _leaf(5, "Ustrd", f"Mitgliedsbeitrag {self._month_label} {member_number or ''}"),
+            _close(4, "RmtInf"),
+            _close(3, "DrctDbtTxInf"),
+        ])
+
+    def end(self) -> str:
+        return _close(2, "PmtInf") + _close(1, "CstmrDrctDbtInitn") + "</Document>"
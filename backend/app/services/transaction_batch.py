@@ -0,0 +1,114 @@
+"""
+Sammelbuchungen: viele Anlagen, Änderungen und Löschungen in einem Request.
+
+Die Operationen werden zuerst in Reihenfolge gegen einen Schnappschuss der
+betroffenen Buchungen ausgewertet (eine Abfrage). Danach wird pro Art genau
+ein Statement abgesetzt – INSERT ... RETURNING, UPDATE (executemany), DELETE
+... IN –, dazu ein Audit-INSERT und ein Aggregat-Upsert, alles in einer
+Datenbank-Transaktion. Fehlerhafte Einzeloperationen (unbekannte ID,
+geleertes Pflichtfeld) werden im Ergebnis gemeldet, die übrigen trotzdem
+gebucht.
+"""
+from sqlalchemy import select, insert, update, delete, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionUpdate
+from app.services.aggregate_service import AggregateDelta
+from app.services.audit_service import audit_many
+
+UPDATABLE_FIELDS = tuple(TransactionUpdate.model_fields)
+NOT_FOUND = "Buchung nicht gefunden"
+REQUIRED_FIELD = "Pflichtfeld darf nicht leer sein"
+
+
+async def _load_snapshot(db: AsyncSession, user_id: int, ids: set[int]) -> dict[int, dict]:
+    if not ids:
+        return {}
+    columns = [Transaction.id] + [getattr(Transaction, f) for f in UPDATABLE_FIELDS]
+    result = await db.execute(
+        select(*columns).where(Transaction.user_id == user_id, Transaction.id.in_(ids))
+    )
+    return {row.id: {f: getattr(row, f) for f in UPDATABLE_FIELDS} for row in result}
+
+
+async def apply_batch(db: AsyncSession, user_id: int, operations: list) -> dict:
+    """Apply create/update/delete operations in order and commit once."""
+    snapshot = await _load_snapshot(db, user_id, {op.id for op in operations if op.op != "create"})
+    totals_delta = AggregateDelta(user_id)
+    results: list[dict] = []
+    creates: list[tuple[dict, dict]] = []  # (values, result)
+    updated: dict[int, dict] = {}
+    deleted: set[int] = set()
+    audit_entries: list[tuple[str, str, int, str]] = []
+
+    for index, op in enumerate(operations):
+        result = {"index": index, "op": op.op, "id": None, "success": True, "error": None}
+        results.append(result)
+
+        if op.op == "create":
+            values = {"user_id": user_id, **op.data.model_dump()}
+            creates.append((values, result))
+            totals_delta.add(values["transaction_date"], values["type"], values["amount"])
+            continue
+
+        result["id"] = op.id
+        current = snapshot.get(op.id)
+        if current is None:
+            result.update(success=False, error=NOT_FOUND)
+            continue
+        cleared = op.op == "update" and op.data.cleared_required_fields()
+        if cleared:
+            result.update(success=False, error=f"{REQUIRED_FIELD}: {', '.join(cleared)}")
+            continue
+
+        totals_delta.add(current["transaction_date"], current["type"], -current["amount"], count=-1)
+        if op.op == "update":
+            current.update(op.data.model_dump(exclude_unset=True))
+            totals_delta.add(current["transaction_date"], current["type"], current["amount"])
+            updated[op.id] = current
+            audit_entries.append(("update", "transaction", op.id, current["description"]))
+        else:
+            # Later operations on the same id see it as gone
+            del snapshot[op.id]
+            updated.pop(op.id, None)
+            deleted.add(op.id)
+            audit_entries.append(("delete", "transaction", op.id, current["description"]))
+
+    if creates:
+        table = Transaction.__table__
+        new_ids = (await db.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            [values for values, _ in creates],
+        )).scalars().all()
+        for (values, result), new_id in zip(creates, new_ids):
+            result["id"] = new_id
+            audit_entries.append(("create", "transaction", new_id, f"{values['description']} ({values['amount']}€)"))
+
+    if updated:
+        table = Transaction.__table__
+        # updated_at is set by the column's onupdate, which keeps PDF cache fingerprints honest
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values({f: bindparam(f) for f in UPDATABLE_FIELDS}),
+            [{"_id": tx_id, **values} for tx_id, values in updated.items()],
+        )
+
+    if deleted:
+        await db.execute(
+            delete(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_(deleted))
+        )
+
+    await totals_delta.apply(db)
+    await audit_many(db, user_id, audit_entries)
+    await db.commit()
+
+    failed = sum(1 for r in results if not r["success"])
+    return {
+        "created": len(creates),
+        "updated": len(updated),
+        "deleted": len(deleted),
+        "failed": failed,
+        "results": results,
+    }
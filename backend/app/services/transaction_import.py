@@ -0,0 +1,193 @@
+"""
+Massenimport von Kassenbuch-Buchungen aus CSV.
+
+Die Datei wird zeilenweise gelesen und validiert; gültige Zeilen werden in
+Blöcken von ``TRANSACTION_IMPORT_CHUNK_SIZE`` geschrieben – auf PostgreSQL per
+COPY, sonst als gebündeltes ``INSERT ... VALUES`` (executemany). Lesen und
+Validieren laufen blockweise in einem Thread, damit große Dateien den
+Event-Loop nicht blockieren; der Speicherbedarf bleibt unabhängig von der
+Dateigröße.
+
+Committet wird einmal am Ende samt Aggregat-Delta (siehe aggregate_service).
+Bricht der Import ab, wird nichts gebucht – ein erneuter Upload der Datei
+bucht damit keine Zeile doppelt.
+"""
+import asyncio
+import codecs
+import csv
+import io
+import itertools
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Iterator, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+from app.services.aggregate_service import AggregateDelta
+
+REQUIRED_FIELDS = {"type", "amount", "description", "transaction_date"}
+TYPE_ALIASES = {"income": "income", "expense": "expense", "einnahme": "income", "ausgabe": "expense"}
+DATE_FORMATS = ("%d.%m.%Y", "%d/%m/%Y")
+INSERT_COLUMNS = (
+    "user_id", "type", "amount", "description", "category",
+    "transaction_date", "receipt_number", "notes",
+)
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """The file as a whole cannot be imported (empty, missing columns)."""
+
+
+def detect_encoding(fileobj: BinaryIO, block_size: int = 64 * 1024) -> str:
+    """UTF-8 (with optional BOM) if the whole file decodes, else latin-1. Rewinds the file."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    encoding = "utf-8-sig"
+    try:
+        while block := fileobj.read(block_size):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        encoding = "latin-1"
+    fileobj.seek(0)
+    return encoding
+
+
+def _parse_date(raw: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def validate_row(row: dict, user_id: int) -> tuple[Optional[dict], Optional[str]]:
+    """Returns (insert values, None) for a valid row or (None, error message)."""
+    raw_type = row.get("type", "").lower()
+    type_val = TYPE_ALIASES.get(raw_type)
+    if type_val is None:
+        return None, f"Ungültiger Typ '{raw_type}'. Erlaubt: income, expense."
+
+    raw_amount = row.get("amount", "")
+    try:
+        amount = Decimal(raw_amount.replace(",", "."))
+        if not amount.is_finite() or amount <= 0:
+            raise ValueError
+    except (InvalidOperation, ValueError):
+        return None, f"Ungültiger Betrag '{raw_amount}'."
+
+    description = row.get("description", "")
+    if not description:
+        return None, "Beschreibung ist ein Pflichtfeld."
+
+    raw_date = row.get("transaction_date", "")
+    transaction_date = _parse_date(raw_date)
+    if transaction_date is None:
+        return None, f"Ungültiges Datum '{raw_date}'. Verwenden Sie YYYY-MM-DD oder DD.MM.YYYY."
+
+    return {
+        "user_id": user_id,
+        "type": type_val,
+        "amount": amount,
+        "description": description,
+        "category": row.get("category") or None,
+        "transaction_date": transaction_date,
+        "receipt_number": row.get("receipt_number") or None,
+        "notes": row.get("notes") or None,
+    }, None
+
+
+async def _write_chunk(db: AsyncSession, rows: list[dict]) -> None:
+    if db.get_bind().dialect.driver == "asyncpg":
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Transaction.__tablename__,
+            records=[tuple(row[c] for c in INSERT_COLUMNS) for row in rows],
+            columns=list(INSERT_COLUMNS),
+        )
+        return
+
+    # Core executemany: one cached compiled statement, batched by the dialect
+    # ("insertmanyvalues" renders multi-row VALUES where the driver supports it)
+    await db.execute(insert(Transaction.__table__), rows)
+
+
+def _open_reader(fileobj: BinaryIO) -> tuple[io.TextIOWrapper, csv.DictReader]:
+    """Detect the encoding and read the header (blocking, run in a thread)."""
+    text = io.TextIOWrapper(fileobj, encoding=detect_encoding(fileobj), newline="")
+    reader = csv.DictReader(text)
+    try:
+        if not reader.fieldnames:
+            raise ImportFormatError("CSV-Datei ist leer oder ungültig.")
+        reader.fieldnames = [(f or "").strip().lower() for f in reader.fieldnames]
+        missing = REQUIRED_FIELDS - set(reader.fieldnames)
+        if missing:
+            raise ImportFormatError(f"Pflichtfelder fehlen: {', '.join(sorted(missing))}")
+    except BaseException:
+        text.detach()
+        raise
+    return text, reader
+
+
+def _validated_rows(reader: csv.DictReader, user_id: int) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    for row_num, row in enumerate(reader, start=2):
+        values, error = validate_row({k: (v or "").strip() for k, v in row.items() if k}, user_id)
+        yield row_num, values, error
+
+
+async def import_transactions(
+    db: AsyncSession,
+    user_id: int,
+    fileobj: BinaryIO,
+    chunk_size: int,
+) -> dict:
+    """Stream-import a transactions CSV in chunks and commit once at the end; on error nothing is booked."""
+    text, reader = await asyncio.to_thread(_open_reader, fileobj)
+    try:
+        rows = _validated_rows(reader, user_id)
+        total = 0
+        created = 0
+        skipped = 0
+        errors: list[dict] = []
+        totals_delta = AggregateDelta(user_id)
+
+        while True:
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(rows, chunk_size)))
+            if not batch:
+                break
+            total += len(batch)
+            chunk: list[dict] = []
+            for row_num, values, error in batch:
+                if error:
+                    skipped += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"row": row_num, "error": error})
+                    continue
+                chunk.append(values)
+                totals_delta.add(values["transaction_date"], values["type"], values["amount"])
+            if chunk:
+                await _write_chunk(db, chunk)
+                created += len(chunk)
+
+        await totals_delta.apply(db)
+        await db.commit()
+    finally:
+        # Don't let the wrapper close the underlying upload file
+        text.detach()
+
+    return {
+        "success": True,
+        "total": total,
+        "created": created,
+        "skipped": skipped,
+        "errors": errors,
+        "errors_truncated": skipped > len(errors),
+    }
@@ -12,6 +12,19 @@ from app.main import app
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="also run tests marked as benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_engine():
     engine = create_async_engine(
@@ -27,9 +40,14 @@ async def db_engine():
     await engine.dispose()
 
 
+@pytest.fixture
+def session_factory(db_engine):
+    """Sessions on the test engine, for background workers that open their own."""
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
 @pytest_asyncio.fixture(scope="function")
-async def db_session(db_engine):
-    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+async def db_session(session_factory):
     async with session_factory() as session:
         yield session
 
@@ -0,0 +1,99 @@
+"""Tests for idempotent bank statement imports."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.models.bank_line import BankLineFingerprint
+from app.core.security import create_access_token, get_password_hash
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def statement(lines: list[str]) -> bytes:
+    return ("Buchungstag;Auftraggeber;IBAN;Verwendungszweck;Betrag\n" + "\n".join(lines) + "\n").encode()
+
+
+async def upload(client: AsyncClient, token: str, content: bytes, add_to_kassenbuch: bool = True) -> dict:
+    res = await client.post(
+        "/api/v1/bank/import",
+        params={"add_to_kassenbuch": add_to_kassenbuch},
+        files={"file": ("auszug.csv", content, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    return res.json()
+
+
+MARCH = [
+    "01.03.2026;Anna;DE02120300000000202051;Beitrag März;10,00",
+    "01.03.2026;Anna;DE02120300000000202051;Beitrag März;10,00",  # second identical payment
+    "05.03.2026;Stadtwerke;DE44500105175407324931;Strom;-80,00",
+    "09.03.2026;Bernd;;Spende   Sommerfest;25,00",
+]
+APRIL = [
+    "01.04.2026;Anna;DE02120300000000202051;Beitrag April;10,00",
+]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_reimport_books_only_new_lines(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+
+    first = await upload(client, token, statement(MARCH))
+    assert first["kassenbuch_added"] == 3
+    assert first["skipped"] == 0
+
+    # Same lines again plus one new, with a differently spaced/cased purpose
+    overlap = MARCH[:3] + ["09.03.2026;Bernd;;spende sommerfest;25,00"] + APRIL
+    second = await upload(client, token, statement(overlap))
+    assert second["kassenbuch_added"] == 1
+    assert second["skipped"] == 3  # the expense line was never booked
+    assert [t["duplicate"] for t in second["transactions"]] == [True, True, False, True, False]
+    assert second["transactions"][4]["transaction_created"] is True
+
+    count = await db_session.scalar(select(func.count(Transaction.id)).where(Transaction.user_id == user.id))
+    assert count == 4
+    linked = await db_session.scalar(
+        select(func.count(BankLineFingerprint.id)).where(BankLineFingerprint.transaction_id.is_not(None))
+    )
+    assert linked == 4
+
+    stats = (await client.get("/api/v1/transactions/stats", headers={"Authorization": f"Bearer {token}"})).json()
+    assert float(stats["total_income"]) == 55.0
+
+
+@pytest.mark.asyncio
+async def test_preview_import_does_not_reserve_lines(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+
+    preview = await upload(client, token, statement(MARCH), add_to_kassenbuch=False)
+    assert preview["kassenbuch_added"] == 0
+    booked = await upload(client, token, statement(MARCH))
+    assert booked["kassenbuch_added"] == 3
+    again = await upload(client, token, statement(MARCH), add_to_kassenbuch=False)
+    assert [t["duplicate"] for t in again["transactions"]] == [True, True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_fingerprints_are_per_tenant(client: AsyncClient, db_session: AsyncSession):
+    _, token_a = await create_verified_user(db_session, "a@test.de")
+    _, token_b = await create_verified_user(db_session, "b@test.de")
+    assert (await upload(client, token_a, statement(APRIL)))["kassenbuch_added"] == 1
+    assert (await upload(client, token_b, statement(APRIL)))["kassenbuch_added"] == 1
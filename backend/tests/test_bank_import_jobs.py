@@ -0,0 +1,120 @@
+"""Tests for background bank statement imports with progress polling."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.models.bank_import_job import BankImportJob
+from app.core.security import create_access_token, get_password_hash
+from app.services import bank_import_jobs
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+@pytest.fixture(autouse=True)
+def job_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BANK_IMPORT_DIR", str(tmp_path))
+
+
+def statement(count: int) -> bytes:
+    lines = [f"{i % 28 + 1:02d}.03.2026;Mitglied {i};;Beitrag {i};{i + 1},00" for i in range(count)]
+    return ("Buchungstag;Auftraggeber;IBAN;Verwendungszweck;Betrag\n" + "\n".join(lines) + "\n").encode()
+
+
+async def start(client: AsyncClient, token: str, filename: str, content: bytes) -> dict:
+    res = await client.post(
+        "/api/v1/bank/import-jobs",
+        params={"add_to_kassenbuch": True},
+        files={"file": (filename, content, "application/octet-stream")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 202
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_job_imports_in_chunks_and_reports_lines(
+    client: AsyncClient, db_session: AsyncSession, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "BANK_IMPORT_CHUNK_SIZE", 4)
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    job = await start(client, token, "auszug.csv", statement(10))
+    assert job["status"] == "queued"
+    await bank_import_jobs.wait_for_jobs()
+
+    res = await client.get(f"/api/v1/bank/jobs/{job['id']}", headers=headers)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["status"] == "completed"
+    assert data["format"] == "csv"
+    assert data["progress"] == 1.0
+    assert (data["imported"], data["kassenbuch_added"], data["skipped"]) == (10, 10, 0)
+    assert [line["counterparty"] for line in data["transactions"]] == [f"Mitglied {i}" for i in range(10)]
+
+    res = await client.get(f"/api/v1/bank/jobs/{job['id']}", params={"offset": 8, "limit": 5}, headers=headers)
+    assert [line["counterparty"] for line in res.json()["transactions"]] == ["Mitglied 8", "Mitglied 9"]
+
+    count = await db_session.scalar(select(func.count()).select_from(Transaction).where(Transaction.user_id == user.id))
+    assert count == 10
+    assert list(tmp_path.iterdir()) == []  # upload removed
+
+    # Re-uploading the same statement books nothing twice
+    again = await start(client, token, "auszug.csv", statement(10))
+    await bank_import_jobs.wait_for_jobs()
+    data = (await client.get(f"/api/v1/bank/jobs/{again['id']}", headers=headers)).json()
+    assert (data["kassenbuch_added"], data["skipped"]) == (0, 10)
+
+
+@pytest.mark.asyncio
+async def test_job_reports_format_errors(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    job = await start(client, token, "camt053.xml", b'<?xml version="1.0"?><Document><BkToCstmrStmt><Ntry>')
+    await bank_import_jobs.wait_for_jobs()
+
+    data = (await client.get(f"/api/v1/bank/jobs/{job['id']}", headers={"Authorization": f"Bearer {token}"})).json()
+    assert data["status"] == "failed"
+    assert data["error"]
+    assert data["finished_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_isolated_per_user(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    _, other_token = await create_verified_user(db_session, "other@test.de")
+    job = await start(client, token, "auszug.csv", statement(2))
+    await bank_import_jobs.wait_for_jobs()
+
+    res = await client.get(f"/api/v1/bank/jobs/{job['id']}", headers={"Authorization": f"Bearer {other_token}"})
+    assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stale_job_is_reported_failed(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    job = BankImportJob(user_id=user.id, status="running", filename="auszug.csv", total_bytes=100)
+    db_session.add(job)
+    await db_session.commit()
+    monkeypatch.setattr(settings, "BANK_IMPORT_JOB_STALE_SECONDS", -1)
+
+    data = (await client.get(f"/api/v1/bank/jobs/{job.id}", headers={"Authorization": f"Bearer {token}"})).json()
+    assert data["status"] == "failed"
+    assert "unterbrochen" in data["error"]
@@ -0,0 +1,217 @@
+"""Tests for per-tenant CSV bank format profiles and the profile-based fast path."""
+import csv
+import io
+import time
+from datetime import date
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.core.security import create_access_token, get_password_hash
+from app.services.bank_profiles import load_profiles, remember_profile
+from app.services.bank_statements import CsvStatementParser, parse_booking_date, parse_german_decimal, _detect_columns
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+# Header, row template (i -> cells) and encoding of typical exports
+BANK_FORMATS = {
+    "dkb": (
+        '"Kontonummer:";"DE89370400440532013000"\n\n'
+        '"Buchungstag";"Wertstellung";"Buchungstext";"Auftraggeber / Begünstigter";"Verwendungszweck";'
+        '"Kontonummer";"BLZ";"Betrag (EUR)";"Gläubiger-ID";"Mandatsreferenz";"Kundenreferenz";\n',
+        lambda i: f'"{i % 28 + 1:02d}.03.2026";"{i % 28 + 1:02d}.03.2026";"Gutschrift";"Mitglied {i}";'
+                  f'"Beitrag {i}";"DE02120300000000202051";"12030000";"{i % 900 + 100},{i % 100:02d}";"";"";"";\n',
+        "latin-1",
+    ),
+    "sparkasse": (
+        '"Auftragskonto";"Buchungstag";"Valutadatum";"Buchungstext";"Verwendungszweck";"Beguenstigter/Zahlungspflichtiger";'
+        '"Kontonummer/IBAN";"BIC (SWIFT-Code)";"Betrag";"Waehrung";"Info"\n',
+        lambda i: f'"DE89370400440532013000";"{i % 28 + 1:02d}.03.26";"{i % 28 + 1:02d}.03.26";"GUTSCHR. UEBERWEISUNG";'
+                  f'"Beitrag {i}";"Mitglied {i}";"DE02120300000000202051";"COBADEFFXXX";"{i % 900 + 100},50";"EUR";"Umsatz gebucht"\n',
+        "latin-1",
+    ),
+    "comdirect": (
+        '"Umsätze Girokonto";"Zeitraum: 30 Tage";\n\n'
+        '"Buchungstag";"Wertstellung (Valuta)";"Vorgang";"Buchungstext";"Umsatz in EUR";\n',
+        lambda i: f'"{i % 28 + 1:02d}.03.2026";"{i % 28 + 1:02d}.03.2026";"Übertrag / Überweisung";'
+                  f'"Auftraggeber: Mitglied {i} Buchungstext: Beitrag {i}";"1.{i % 900 + 100},00";\n',
+        "utf-8",
+    ),
+    "generic_en": (
+        "Date,Payee,IBAN,Reference,Amount,Currency\n",
+        lambda i: f'2026-03-{i % 28 + 1:02d},Member {i},DE02120300000000202051,Fee {i},"1,{i % 900 + 100}.25",EUR\n',
+        "utf-8",
+    ),
+}
+
+
+def statement(bank: str, rows: int) -> bytes:
+    header, row, encoding = BANK_FORMATS[bank]
+    return (header + "".join(row(i) for i in range(rows))).encode(encoding)
+
+
+def legacy_parse(content: bytes) -> list[dict]:
+    """The former per-cell generic parsing (sniffing done once, fallback chains per cell)."""
+    text = content.decode("latin-1" if b"\xe4" in content or b"\xfc" in content else "utf-8")
+    lines = text.splitlines(keepends=True)
+    header_idx = next(i for i, line in enumerate(lines) if "buchungstag" in line.lower() or "date" in line.lower())
+    dialect = csv.Sniffer().sniff(lines[header_idx], delimiters=";,\t")
+    reader = csv.reader(lines[header_idx:], dialect=dialect)
+    cols = _detect_columns(next(reader))
+    result = []
+    for row in reader:
+        booking_date = parse_booking_date(row[cols["date"]])
+        amount = parse_german_decimal(row[cols["amount"]].replace("+", ""))
+        if booking_date and amount is not None:
+            result.append({"booking_date": booking_date, "amount": amount})
+    return result
+
+
+def test_profile_is_detected_once_and_reused(monkeypatch):
+    content = statement("dkb", 50)
+    first = CsvStatementParser()
+    lines = list(first.iter_lines(io.BytesIO(content)))
+    assert first.profile_is_new
+    profile = first.profile
+    assert (profile["encoding"], profile["delimiter"], profile["date_format"], profile["decimal_style"]) == (
+        "latin-1", ";", "%d.%m.%Y", "de",
+    )
+    assert lines[1]["amount"] == Decimal("101.01")
+    assert lines[1]["counterparty"] == "Mitglied 1"
+
+    def no_sniffing(*args, **kwargs):
+        raise AssertionError("format detection ran despite a stored profile")
+
+    monkeypatch.setattr(csv.Sniffer, "sniff", no_sniffing)
+    again = CsvStatementParser([profile])
+    assert list(again.iter_lines(io.BytesIO(content))) == lines
+    assert not again.profile_is_new
+
+
+@pytest.mark.parametrize("bank", ["dkb", "sparkasse", "comdirect"])
+def test_bank_formats_parse_like_the_generic_parser(bank):
+    content = statement(bank, 200)
+    lines = list(CsvStatementParser().iter_lines(io.BytesIO(content)))
+    expected = legacy_parse(content)
+    assert [(l["booking_date"], l["amount"]) for l in lines] == [(e["booking_date"], e["amount"]) for e in expected]
+    assert len(lines) == 200
+
+
+def test_english_decimal_style():
+    parser = CsvStatementParser()
+    lines = list(parser.iter_lines(io.BytesIO(statement("generic_en", 3))))
+    assert parser.profile["decimal_style"] == "en"
+    # The generic fallback reads "1,100.25" as 1.10025
+    assert [l["amount"] for l in lines] == [Decimal("1100.25"), Decimal("1101.25"), Decimal("1102.25")]
+    assert lines[0]["counterparty"] == "Member 0"
+
+
+def test_profile_falls_back_for_unusual_cells():
+    content = statement("comdirect", 3) + '"04.03.2026";"04.03.2026";"Bar";"Kasse";"1.000,00 €";\n'.encode("utf-8")
+    parser = CsvStatementParser()
+    lines = list(parser.iter_lines(io.BytesIO(content)))
+    assert lines[-1]["amount"] == Decimal("1000.00")
+    assert lines[-1]["booking_date"] == date(2026, 3, 4)
+
+
+@pytest.mark.benchmark
+def test_parsing_throughput_per_bank_format():
+    rows = 20_000
+    for bank in BANK_FORMATS:
+        content = statement(bank, rows)
+        detecting = CsvStatementParser()
+        started = time.perf_counter()
+        assert sum(1 for _ in detecting.iter_lines(io.BytesIO(content))) == rows
+        detect_rate = rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        assert sum(1 for _ in CsvStatementParser([detecting.profile]).iter_lines(io.BytesIO(content))) == rows
+        profile_rate = rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        legacy_parse(content)
+        legacy_rate = rows / (time.perf_counter() - started)
+
+        assert profile_rate > 20_000, (
+            f"{bank}: {profile_rate:,.0f} lines/s with profile, "
+            f"{detect_rate:,.0f} detecting, {legacy_rate:,.0f} generic"
+        )
+
+
+@pytest.mark.asyncio
+async def test_import_stores_profile_per_tenant(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    _, other_token = await create_verified_user(db_session, "other@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for _ in range(2):
+        res = await client.post(
+            "/api/v1/bank/import",
+            files={"file": ("umsaetze.csv", statement("sparkasse", 5), "text/csv")},
+            headers=headers,
+        )
+        assert res.status_code == 200
+        assert res.json()["imported"] == 5
+
+    profiles = (await client.get("/api/v1/bank/profiles", headers=headers)).json()
+    assert len(profiles) == 1
+    assert (profiles[0]["date_format"], profiles[0]["use_count"]) == ("%d.%m.%y", 2)
+    other = await client.get("/api/v1/bank/profiles", headers={"Authorization": f"Bearer {other_token}"})
+    assert other.json() == []
+
+    res = await client.delete(f"/api/v1/bank/profiles/{profiles[0]['id']}", headers={"Authorization": f"Bearer {other_token}"})
+    assert res.status_code == 404
+    res = await client.delete(f"/api/v1/bank/profiles/{profiles[0]['id']}", headers=headers)
+    assert res.status_code == 204
+    assert (await client.get("/api/v1/bank/profiles", headers=headers)).json() == []
+
+
+@pytest.mark.parametrize("cell, amount", [
+    ("12.50", Decimal("12.50")),
+    ("1.234,56", Decimal("1234.56")),
+    ("-19.99", Decimal("-19.99")),
+    ("7.5", Decimal("7.5")),
+    ("12,50", Decimal("12.50")),
+    ("+1.000", Decimal("1000")),
+])
+def test_de_profile_keeps_dot_decimals(cell, amount):
+    header = '"Buchungstag";"Auftraggeber";"Betrag"\n'
+    content = (header + '"01.03.2026";"Mitglied";"1,00"\n' + f'"02.03.2026";"Mitglied";"{cell}"\n').encode("utf-8")
+    parser = CsvStatementParser()
+    lines = list(parser.iter_lines(io.BytesIO(content)))
+    assert parser.profile["decimal_style"] == "de"
+    assert lines[1]["amount"] == amount
+    # The stored profile reads the same way
+    again = CsvStatementParser([parser.profile])
+    assert list(again.iter_lines(io.BytesIO(content)))[1]["amount"] == amount
+
+
+@pytest.mark.asyncio
+async def test_integer_only_sample_is_not_stored(db_session: AsyncSession):
+    user, _ = await create_verified_user(db_session, "owner@test.de")
+    content = '"Buchungstag";"Auftraggeber";"Betrag"\n"01.03.2026";"Mitglied";"12"\n"02.03.2026";"Mitglied";"-40"\n'
+    parser = CsvStatementParser()
+    lines = list(parser.iter_lines(io.BytesIO(content.encode("utf-8"))))
+    assert [l["amount"] for l in lines] == [Decimal("12"), Decimal("-40")]
+    assert parser.profile["decimal_style"] is None
+
+    await remember_profile(db_session, user.id, parser)
+    await db_session.commit()
+    assert await load_profiles(db_session, user.id) == []
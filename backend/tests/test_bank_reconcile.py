@@ -0,0 +1,149 @@
+"""Tests for reconciling bank statements with the Kassenbuch."""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.core.security import create_access_token, get_password_hash
+from app.services.bank_reconcile import reconcile
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def line(day: date, amount: str) -> dict:
+    return {"booking_date": day, "amount": Decimal(amount), "counterparty": None, "iban": None,
+            "purpose": None, "currency": "EUR"}
+
+
+def booking(id: int, day: date, type: str, amount: str) -> dict:
+    return {"id": id, "transaction_date": day, "type": type, "amount": Decimal(amount),
+            "description": "", "member_id": None}
+
+
+def max_matching(lines: list[dict], bookings: list[dict], window_days: int) -> int:
+    """Maximum bipartite matching by augmenting paths, as a reference for small inputs."""
+    def compatible(l, b):
+        signed = b["amount"] if b["type"] == "income" else -b["amount"]
+        return signed == l["amount"] and abs((b["transaction_date"] - l["booking_date"]).days) <= window_days
+
+    owner: dict[int, int] = {}
+
+    def augment(i: int, visited: set[int]) -> bool:
+        for j, b in enumerate(bookings):
+            if j in visited or not compatible(lines[i], b):
+                continue
+            visited.add(j)
+            if j not in owner or augment(owner[j], visited):
+                owner[j] = i
+                return True
+        return False
+
+    return sum(augment(i, set()) for i in range(len(lines)))
+
+
+def test_reconcile_pairs_on_signed_amount_within_window():
+    d = date(2026, 3, 10)
+    lines = [line(d, "10.00"), line(d, "10.00"), line(d, "-80.00"), line(d, "25.00")]
+    bookings = [
+        booking(1, d + timedelta(days=2), "income", "10.00"),
+        booking(2, d - timedelta(days=9), "income", "10.00"),    # outside the window
+        booking(3, d, "expense", "80.00"),
+        booking(4, d, "income", "80.00"),                        # wrong sign
+    ]
+    result = reconcile(lines, bookings, window_days=3)
+
+    assert sorted((l["amount"], b["id"]) for l, b in result["matched"]) == [(Decimal("-80.00"), 3), (Decimal("10.00"), 1)]
+    assert sorted(l["amount"] for l in result["bank_only"]) == [Decimal("10.00"), Decimal("25.00")]
+    assert sorted(b["id"] for b in result["kassenbuch_only"]) == [2, 4]
+
+
+def test_reconcile_finds_a_maximum_matching():
+    rnd = random.Random(3)
+    start = date(2026, 1, 1)
+    for _ in range(200):
+        lines = [line(start + timedelta(days=rnd.randint(0, 12)), rnd.choice(["5.00", "10.00", "-10.00"]))
+                 for _ in range(rnd.randint(0, 8))]
+        bookings = [booking(j, start + timedelta(days=rnd.randint(0, 12)), rnd.choice(["income", "expense"]),
+                            rnd.choice(["5.00", "10.00"]))
+                    for j in range(rnd.randint(0, 8))]
+        window = rnd.randint(0, 3)
+        result = reconcile(lines, bookings, window)
+
+        assert len(result["matched"]) == max_matching(lines, bookings, window)
+        assert len(result["matched"]) + len(result["bank_only"]) == len(lines)
+        assert len(result["matched"]) + len(result["kassenbuch_only"]) == len(bookings)
+        for l, b in result["matched"]:
+            assert abs((b["transaction_date"] - l["booking_date"]).days) <= window
+
+
+def test_reconcile_handles_large_statements_quickly():
+    rnd = random.Random(11)
+    start = date(2026, 1, 1)
+    lines = [line(start + timedelta(days=rnd.randint(0, 364)), f"{rnd.randint(1, 3000)}.{rnd.randint(0, 99):02d}")
+             for _ in range(20_000)]
+    bookings = [booking(j, l["booking_date"] + timedelta(days=rnd.randint(-2, 2)), "income", str(l["amount"]))
+                for j, l in enumerate(lines[:15_000])]
+
+    started = time.perf_counter()
+    result = reconcile(lines, bookings, window_days=3)
+    elapsed = time.perf_counter() - started
+
+    assert len(result["matched"]) == 15_000
+    assert elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_endpoint(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    other, _ = await create_verified_user(db_session, "other@test.de")
+    db_session.add_all([
+        Transaction(user_id=user.id, type="income", amount=Decimal("10.00"), description="Beitrag Anna",
+                    transaction_date=date(2026, 3, 3)),
+        Transaction(user_id=user.id, type="expense", amount=Decimal("80.00"), description="Strom",
+                    transaction_date=date(2026, 3, 5)),
+        Transaction(user_id=user.id, type="income", amount=Decimal("50.00"), description="Barspende",
+                    transaction_date=date(2026, 3, 4)),
+        Transaction(user_id=user.id, type="income", amount=Decimal("50.00"), description="Vormonat",
+                    transaction_date=date(2026, 2, 1)),
+        Transaction(user_id=other.id, type="income", amount=Decimal("25.00"), description="Fremder Verein",
+                    transaction_date=date(2026, 3, 9)),
+    ])
+    await db_session.commit()
+
+    content = (
+        "Buchungstag;Auftraggeber;IBAN;Verwendungszweck;Betrag\n"
+        "01.03.2026;Anna;;Beitrag;10,00\n"
+        "05.03.2026;Stadtwerke;;Strom;-80,00\n"
+        "09.03.2026;Bernd;;Spende;25,00\n"
+    )
+    res = await client.post(
+        "/api/v1/bank/reconcile",
+        params={"window_days": 2},
+        files={"file": ("auszug.csv", content.encode(), "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["date_from"], data["date_to"]) == ("2026-03-01", "2026-03-09")
+    assert [(m["booking"]["description"], m["days_apart"]) for m in data["matched"]] == [("Strom", 0), ("Beitrag Anna", 2)]
+    assert [l["counterparty"] for l in data["bank_only"]] == ["Bernd"]
+    assert [b["description"] for b in data["kassenbuch_only"]] == ["Barspende"]
@@ -0,0 +1,199 @@
+"""Tests for the streaming bank statement parsers (CSV, CAMT.053, MT940)."""
+import io
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.member import Member
+from app.core.security import create_access_token, get_password_hash
+from app.services.bank_statements import (
+    CsvStatementParser, Camt053StatementParser, Mt940StatementParser, StatementFormatError, detect_parser,
+)
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+CAMT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>'
+    "<Id>1</Id><Acct><Id><IBAN>DE89370400440532013000</IBAN></Id></Acct>"
+)
+CAMT_TAIL = "</Stmt></BkToCstmrStmt></Document>"
+
+
+def camt_entry(amount: str, indicator: str, day: str, name: str, iban: str, purpose: str) -> str:
+    role = "Dbtr" if indicator == "CRDT" else "Cdtr"
+    return (
+        f'<Ntry><Amt Ccy="EUR">{amount}</Amt><CdtDbtInd>{indicator}</CdtDbtInd><Sts>BOOK</Sts>'
+        f"<BookgDt><Dt>{day}</Dt></BookgDt><ValDt><Dt>{day}</Dt></ValDt>"
+        f"<NtryDtls><TxDtls><RltdPties><{role}><Nm>{name}</Nm></{role}>"
+        f"<{role}Acct><Id><IBAN>{iban}</IBAN></Id></{role}Acct></RltdPties>"
+        f"<RmtInf><Ustrd>{purpose}</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>"
+    )
+
+
+def test_camt053_entries_and_batch_bookings():
+    batch = (
+        '<Ntry><Amt Ccy="EUR">30.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2026-03-03</Dt></BookgDt>'
+        "<NtryDtls>"
+        '<TxDtls><AmtDtls><TxAmt><Amt Ccy="EUR">10.00</Amt></TxAmt></AmtDtls>'
+        "<RltdPties><Dbtr><Pty><Nm>Anna Alt</Nm></Pty></Dbtr></RltdPties><RmtInf><Ustrd>Beitrag</Ustrd><Ustrd>Anna</Ustrd></RmtInf></TxDtls>"
+        '<TxDtls><AmtDtls><TxAmt><Amt Ccy="EUR">20.00</Amt></TxAmt></AmtDtls>'
+        "<RltdPties><Dbtr><Nm>Bernd Bau</Nm></Dbtr></RltdPties></TxDtls>"
+        "</NtryDtls></Ntry>"
+    )
+    xml = (
+        CAMT_HEAD
+        + camt_entry("12.50", "CRDT", "2026-03-01", "Erika Mustermann", "DE02 1203 0000 0000 2020 51", "Beitrag März")
+        + camt_entry("80.00", "DBIT", "2026-03-02", "Stadtwerke", "DE44500105175407324931", "Strom")
+        + batch
+        + CAMT_TAIL
+    )
+    lines = list(Camt053StatementParser().iter_lines(io.BytesIO(xml.encode())))
+    assert lines[0] == {
+        "booking_date": date(2026, 3, 1), "counterparty": "Erika Mustermann", "iban": "DE02120300000000202051",
+        "purpose": "Beitrag März", "amount": Decimal("12.50"), "currency": "EUR",
+    }
+    assert lines[1]["amount"] == Decimal("-80.00")
+    assert lines[1]["counterparty"] == "Stadtwerke"
+    assert [(line["counterparty"], line["amount"], line["purpose"]) for line in lines[2:]] == [
+        ("Anna Alt", Decimal("10.00"), "Beitrag Anna"), ("Bernd Bau", Decimal("20.00"), None),
+    ]
+
+
+def test_camt053_rejects_broken_xml():
+    with pytest.raises(StatementFormatError):
+        list(Camt053StatementParser().iter_lines(io.BytesIO((CAMT_HEAD + "<Ntry><Amt>").encode())))
+
+
+MT940 = (
+    "{1:F01DEUTDEFFAXXX0000000000}{2:O940}{4:\r\n"
+    ":20:STARTUMSE\r\n"
+    ":25:37040044/0532013000\r\n"
+    ":28C:00001/001\r\n"
+    ":60F:C251230EUR1000,00\r\n"
+    ":61:2512311231CR12,50NTRFNONREF\r\n"
+    ":86:166?00GUTSCHRIFT?20EREF+NOTPROVIDED?21Beitrag Dezem?22ber?30COBADEFFXXX\r\n"
+    "?31DE02120300000000202051?32Erika Muster?33mann\r\n"
+    ":61:2601020102D80,00NDDTNONREF\r\n"
+    ":86:Lastschrift Stadtwerke Strom\r\n"
+    ":61:2601030103RC5,00NTRFNONREF\r\n"
+    ":62F:C260103EUR927,50\r\n"
+    "-}\r\n"
+).encode("latin-1")
+
+
+def test_mt940_structured_and_free_text_details():
+    lines = list(Mt940StatementParser().iter_lines(io.BytesIO(MT940)))
+    assert len(lines) == 3
+    assert lines[0] == {
+        "booking_date": date(2025, 12, 31), "counterparty": "Erika Mustermann", "iban": "DE02120300000000202051",
+        "purpose": "EREF+NOTPROVIDEDBeitrag Dezember", "amount": Decimal("12.50"), "currency": "EUR",
+    }
+    assert lines[1]["amount"] == Decimal("-80.00")
+    assert lines[1]["purpose"] == "Lastschrift Stadtwerke Strom"
+    assert lines[2]["amount"] == Decimal("-5.00")  # reversal of a credit
+    assert lines[2]["purpose"] is None
+
+
+def test_csv_parser_skips_preamble():
+    content = (
+        "Kontonummer:;DE89370400440532013000\n"
+        "Zeitraum:;01.03.2026 - 31.03.2026\n"
+        "\n"
+        "Buchungstag;Wertstellung;Auftraggeber / Begünstigter;IBAN;Verwendungszweck;Betrag (EUR)\n"
+        "01.03.2026;01.03.2026;Erika Mustermann;DE02120300000000202051;Beitrag;1.234,50\n"
+        "02.03.2026;02.03.2026;Stadtwerke;DE44500105175407324931;Strom;-80,00\n"
+    ).encode("latin-1")
+    lines = list(CsvStatementParser().iter_lines(io.BytesIO(content)))
+    assert [(line["counterparty"], line["amount"]) for line in lines] == [
+        ("Erika Mustermann", Decimal("1234.50")), ("Stadtwerke", Decimal("-80.00")),
+    ]
+
+
+def test_detect_parser_by_content():
+    assert detect_parser("auszug.txt", io.BytesIO(MT940)).name == "mt940"
+    assert detect_parser("export.dat", io.BytesIO(CAMT_HEAD.encode())).name == "camt053"
+    assert detect_parser("umsaetze.csv", io.BytesIO(b"Buchungstag;Betrag\n")).name == "csv"
+
+
+def test_camt053_parsing_memory_stays_bounded(tmp_path):
+    path = tmp_path / "jahresauszug.xml"
+    entries = 20_000
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(CAMT_HEAD)
+        for i in range(entries):
+            f.write(camt_entry(f"{i % 500 + 1}.00", "CRDT", "2026-01-02", f"Mitglied {i}", "DE02120300000000202051", f"Beitrag {i}"))
+        f.write(CAMT_TAIL)
+    assert path.stat().st_size > 6 * 1024 * 1024
+
+    tracemalloc.start()
+    with open(path, "rb") as f:
+        count = sum(1 for _ in Camt053StatementParser().iter_lines(f))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count == entries
+    assert peak < 2 * 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_import_camt053_into_kassenbuch(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add(Member(user_id=user.id, first_name="Erika", last_name="Mustermann", status="active",
+                          iban="DE02120300000000202051"))
+    await db_session.commit()
+
+    xml = (
+        CAMT_HEAD
+        + camt_entry("12.50", "CRDT", "2026-03-01", "E. Mustermann", "DE02120300000000202051", "Beitrag März")
+        + camt_entry("80.00", "DBIT", "2026-03-02", "Stadtwerke", "DE44500105175407324931", "Strom")
+        + CAMT_TAIL
+    )
+    res = await client.post(
+        "/api/v1/bank/import",
+        params={"add_to_kassenbuch": True},
+        files={"file": ("camt053.xml", xml.encode(), "application/xml")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["imported"], data["member_matches"], data["kassenbuch_added"]) == (2, 1, 1)
+    assert data["transactions"][0]["match_type"] == "iban"
+    assert data["transactions_truncated"] is False
+
+
+@pytest.mark.asyncio
+async def test_import_reports_format_errors(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    res = await client.post(
+        "/api/v1/bank/import",
+        files={"file": ("camt053.xml", (CAMT_HEAD + "<Ntry>").encode(), "application/xml")},
+        headers=headers,
+    )
+    assert res.status_code == 422
+    res = await client.post(
+        "/api/v1/bank/import",
+        files={"file": ("auszug.pdf", b"%PDF-1.4", "application/pdf")},
+        headers=headers,
+    )
+    assert res.status_code == 400
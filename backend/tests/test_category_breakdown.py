@@ -0,0 +1,89 @@
+"""Tests for the server-side category breakdown."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.category import Category
+from app.core.security import create_access_token, get_password_hash
+from app.services.category_breakdown import breakdown_cache
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+@pytest.mark.asyncio
+async def test_by_category_groups_and_invalidates(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    material = Category(user_id=user.id, name="Material", type="expense", color="#ec4899")
+    db_session.add(material)
+    await db_session.commit()
+    breakdown_cache.clear()
+
+    operations = [
+        {"op": "create", "data": {"type": "expense", "amount": "10.00", "description": "Farbe",
+                                  "category_id": material.id, "transaction_date": f"2026-04-{day:02d}"}}
+        for day in range(1, 4)
+    ] + [
+        {"op": "create", "data": {"type": "expense", "amount": "50.00", "description": "Miete",
+                                  "category": "Miete", "transaction_date": "2026-04-01"}},
+        {"op": "create", "data": {"type": "expense", "amount": "1.00", "description": "Porto",
+                                  "transaction_date": "2025-04-01"}},
+        {"op": "create", "data": {"type": "income", "amount": "99.00", "description": "Beitrag",
+                                  "transaction_date": "2026-04-01"}},
+    ]
+    res = await client.post("/api/v1/transactions/batch", json={"operations": operations}, headers=headers)
+    ids = [r["id"] for r in res.json()["results"]]
+
+    res = await client.get("/api/v1/transactions/by-category", params={"type": "expense"}, headers=headers)
+    assert res.status_code == 200
+    assert [(c["name"], c["total"], c["count"]) for c in res.json()] == [
+        ("Miete", 50.0, 1), ("Material", 30.0, 3), ("Sonstiges", 1.0, 1),
+    ]
+    assert res.json()[1]["color"] == "#ec4899"
+
+    res = await client.get(
+        "/api/v1/transactions/by-category",
+        params={"type": "expense", "date_from": "2026-01-01", "date_to": "2026-12-31"},
+        headers=headers,
+    )
+    assert [c["name"] for c in res.json()] == ["Miete", "Material"]
+
+    hits = breakdown_cache.hits
+    await client.get("/api/v1/transactions/by-category", params={"type": "expense"}, headers=headers)
+    assert breakdown_cache.hits == hits + 1
+
+    # A category-only change leaves every total untouched but must still invalidate
+    res = await client.put(f"/api/v1/transactions/{ids[3]}", json={"category_id": material.id}, headers=headers)
+    assert res.status_code == 200
+    res = await client.get("/api/v1/transactions/by-category", params={"type": "expense"}, headers=headers)
+    assert breakdown_cache.hits == hits + 1
+    assert [(c["name"], c["total"]) for c in res.json()] == [("Material", 80.0), ("Sonstiges", 1.0)]
+
+
+@pytest.mark.asyncio
+async def test_by_category_is_tenant_scoped(client: AsyncClient, db_session: AsyncSession):
+    _, token_a = await create_verified_user(db_session, "a@test.de")
+    _, token_b = await create_verified_user(db_session, "b@test.de")
+    await client.post(
+        "/api/v1/transactions",
+        json={"type": "income", "amount": "12.00", "description": "Spende", "category": "Spenden",
+              "transaction_date": "2026-04-01"},
+        headers={"Authorization": f"Bearer {token_a}"},
+    )
+    res = await client.get("/api/v1/transactions/by-category", headers={"Authorization": f"Bearer {token_b}"})
+    assert res.json() == []
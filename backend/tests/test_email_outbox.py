@@ -0,0 +1,242 @@
+"""Tests for the email outbox and its delivery worker."""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.models.member import Member
+from app.models.payment_reminder import PaymentReminder
+from app.models.email_log import EmailLog
+from app.core.security import create_access_token, get_password_hash
+from app.services import email_outbox
+from app.services.maintenance import sweep_overdue_reminders
+from app.services.email_service import send_email
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+class FakeSmtpServer:
+    """Just enough SMTP to accept mail; RCPT answers can be set per address."""
+
+    def __init__(self, replies=None):
+        self.replies = replies or {}
+        self.connections = 0
+        self.recipients = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        writer.write(b"220 fake ESMTP\r\n")
+        recipient = None
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].split(":", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250-fake\r\n250 8BITMIME\r\n")
+            elif verb == "RCPT":
+                recipient = command.split("<", 1)[1].rstrip(">")
+                writer.write(self.replies.get(recipient, b"250 ok") + b"\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                while (await reader.readline()) != b".\r\n":
+                    pass
+                self.recipients.append(recipient)
+                writer.write(b"250 queued\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:  # MAIL, RSET, NOOP
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def smtp_server(monkeypatch):
+    fake = FakeSmtpServer({"kaputt@test.de": b"550 no such user", "spaeter@test.de": b"451 try again later"})
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.sockets[0].getsockname()[1])
+    monkeypatch.setattr(settings, "SMTP_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "SMTP_BULK_SEND_INTERVAL", 0)
+    yield fake
+    server.close()
+    await server.wait_closed()
+
+
+async def outbox(db: AsyncSession) -> list[EmailLog]:
+    db.expire_all()
+    return list((await db.execute(select(EmailLog).order_by(EmailLog.id))).scalars())
+
+
+@pytest.mark.asyncio
+async def test_requests_only_queue_mail(client: AsyncClient, db_session: AsyncSession, smtp_server):
+    res = await client.post("/api/v1/auth/register", json={
+        "email": "neu@test.de", "name": "Neu", "password": "password123",
+    })
+    assert res.status_code == 201
+    assert smtp_server.connections == 0
+
+    [queued] = await outbox(db_session)
+    assert (queued.recipient, queued.status, queued.attempts) == ("neu@test.de", "pending", 0)
+    assert "verify-email?token=" in queued.html_body
+
+    assert await email_outbox.deliver_batch(db_session) == 1
+    [delivered] = await outbox(db_session)
+    assert (delivered.status, delivered.attempts, delivered.html_body) == ("sent", 1, None)
+    assert delivered.sent_at is not None
+    assert smtp_server.recipients == ["neu@test.de"]
+
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_backoff(db_session: AsyncSession, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 3)
+    for recipient in ("ok@test.de", "kaputt@test.de", "spaeter@test.de"):
+        await send_email(db_session, recipient, "Betreff", "<p>Hallo</p>", "Hallo")
+
+    assert await email_outbox.deliver_batch(db_session) == 3
+    ok, broken, later = await outbox(db_session)
+    assert (ok.status, broken.status, later.status) == ("sent", "failed", "pending")
+    assert broken.attempts == 1 and "550" in broken.error
+    assert later.attempts == 1 and "451" in later.error
+    delay = later.next_attempt_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+    assert timedelta(seconds=50) < delay <= timedelta(seconds=60)
+
+    # Not due yet
+    assert await email_outbox.deliver_batch(db_session) == 0
+
+    now = datetime.now(timezone.utc) + timedelta(days=1)
+    assert await email_outbox.deliver_batch(db_session, now) == 1
+    later = (await outbox(db_session))[2]
+    assert (later.status, later.attempts) == ("pending", 2)
+    assert await email_outbox.deliver_batch(db_session, now + timedelta(days=1)) == 1
+    later = (await outbox(db_session))[2]
+    assert (later.status, later.attempts) == ("failed", 3)
+    assert smtp_server.recipients == ["ok@test.de"]
+
+
+@pytest.mark.asyncio
+async def test_reminder_is_sent_once_its_email_is_delivered(
+    client: AsyncClient, db_session: AsyncSession, smtp_server,
+):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    anna = Member(user_id=user.id, first_name="Anna", last_name="A", email="anna@test.de")
+    broken = Member(user_id=user.id, first_name="Kaputt", last_name="K", email="kaputt@test.de")
+    db_session.add_all([anna, broken])
+    await db_session.flush()
+    due = date(2026, 4, 1)
+    delivered = PaymentReminder(member_id=anna.id, amount=Decimal("10.00"), due_date=due)
+    paid_meanwhile = PaymentReminder(member_id=anna.id, amount=Decimal("5.00"), due_date=due)
+    refused = PaymentReminder(member_id=broken.id, amount=Decimal("10.00"), due_date=due)
+    db_session.add_all([delivered, paid_meanwhile, refused])
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    for reminder in (delivered, paid_meanwhile, refused):
+        res = await client.post(f"/api/v1/members/{reminder.member_id}/reminders/{reminder.id}/send", headers=headers)
+        assert res.status_code == 200
+        # Only queued so far
+        assert (res.json()["status"], res.json()["sent_at"]) == ("pending", None)
+    paid_meanwhile.status = "paid"
+    await db_session.commit()
+
+    assert await email_outbox.deliver_batch(db_session) == 3
+    db_session.expire_all()
+    rows = {r.id: r for r in (await db_session.execute(select(PaymentReminder))).scalars()}
+    assert rows[delivered.id].status == "sent" and rows[delivered.id].sent_at is not None
+    assert rows[paid_meanwhile.id].status == "paid" and rows[paid_meanwhile.id].sent_at is not None
+    assert (rows[refused.id].status, rows[refused.id].sent_at) == ("pending", None)
+
+
+@pytest.mark.asyncio
+async def test_reminder_swept_overdue_before_delivery_is_sent(
+    client: AsyncClient, db_session: AsyncSession, smtp_server,
+):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    anna = Member(user_id=user.id, first_name="Anna", last_name="A", email="anna@test.de")
+    db_session.add(anna)
+    await db_session.flush()
+    reminder = PaymentReminder(member_id=anna.id, amount=Decimal("10.00"), due_date=date(2026, 4, 1))
+    db_session.add(reminder)
+    await db_session.commit()
+    reminder_id = reminder.id
+
+    res = await client.post(
+        f"/api/v1/members/{anna.id}/reminders/{reminder_id}/send", headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.json()["status"] == "pending"
+    # Due date passes while the email still waits in the outbox
+    assert await sweep_overdue_reminders(db_session, today=date(2026, 4, 2)) == 1
+
+    assert await email_outbox.deliver_batch(db_session) == 1
+    db_session.expire_all()
+    delivered = await db_session.get(PaymentReminder, reminder_id)
+    assert delivered.status == "sent" and delivered.sent_at is not None
+
+
+def test_retry_delay_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60)
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_RETRY_MAX_SECONDS", 600)
+    assert [email_outbox.retry_delay(n).total_seconds() for n in range(1, 6)] == [60, 120, 240, 480, 600]
+
+
+@pytest.mark.asyncio
+async def test_worker_wakes_up_on_new_mail(db_session: AsyncSession, session_factory, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_POLL_SECONDS", 60)
+    email_outbox.start(session_factory)
+    try:
+        await asyncio.sleep(0.1)  # the first, empty poll
+        await send_email(db_session, "anna@test.de", "Betreff", "<p>Hallo</p>")
+        for _ in range(50):
+            if smtp_server.recipients:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await email_outbox.shutdown()
+    assert smtp_server.recipients == ["anna@test.de"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_skip_locked_rows(
+    db_session: AsyncSession, db_engine, session_factory, monkeypatch,
+):
+    if db_engine.dialect.name != "postgresql":
+        pytest.skip("SKIP LOCKED needs PostgreSQL")
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 3)
+    for i in range(5):
+        await send_email(db_session, f"m{i}@test.de", "Betreff", "<p>Hallo</p>")
+
+    async with session_factory() as first, session_factory() as second:
+        claim = (
+            select(EmailLog.id).where(EmailLog.status == "pending").order_by(EmailLog.id)
+            .limit(3).with_for_update(skip_locked=True)
+        )
+        locked = (await first.execute(claim)).scalars().all()
+        assert len(locked) == 3
+        # The second worker only gets what the first one did not lock
+        assert await email_outbox.deliver_batch(second) == 2
+        await first.rollback()
+
+    rows = await outbox(db_session)
+    assert [row.status for row in rows] == ["pending"] * 3 + ["sent"] * 2
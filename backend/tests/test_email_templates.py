@@ -0,0 +1,61 @@
+"""Tests for the precompiled, cached email templates."""
+import time
+import pytest
+from app.services import email_service
+from app.services.email_service import (
+    build_feedback_response_email, build_payment_reminder_email, build_verification_email, build_welcome_email,
+)
+
+BENCHMARK_MESSAGES = 20_000
+MIN_MESSAGES_PER_SECOND = 10_000
+
+
+def test_recipient_fields_are_escaped():
+    html, text = build_payment_reminder_email(
+        member_name="Anna <b>Alt</b>", organization="Kegel & Co {0}", amount=12.5,
+        due_date="01.04.2026", notes='Bitte "bald" zahlen',
+    )
+    assert "Anna &lt;b&gt;Alt&lt;/b&gt;" in html
+    assert "Kegel &amp; Co {0}" in html
+    assert "Bitte &quot;bald&quot; zahlen" in html
+    assert "12.50&nbsp;€" in html
+    assert text == "Zahlungserinnerung von Kegel & Co {0} an Anna <b>Alt</b>: 12.50 EUR faellig am 01.04.2026."
+
+    html, _ = build_feedback_response_email("Bernd", "Export", "bug", "<i>Behoben</i>", "approved")
+    assert "&lt;i&gt;Behoben&lt;/i&gt;" in html
+    assert "Angenommen" in html and "Fehlermeldung" in html
+
+
+def test_layout_and_optional_blocks():
+    with_notes, _ = build_payment_reminder_email("Anna", "TSV Muster", 10, "01.04.2026", notes="Bis Monatsende")
+    without_notes, _ = build_payment_reminder_email("Anna", "TSV Muster", 10, "01.04.2026")
+    assert "Bis Monatsende" in with_notes
+    assert with_notes.count("<tr>") == without_notes.count("<tr>") + 1
+    assert "<title>TSV Muster</title>" in without_notes
+    assert without_notes.startswith("<!DOCTYPE html>") and without_notes.endswith("</html>")
+
+    html, _ = build_verification_email("Anna", "https://example.org/verify-email?token=a&b")
+    assert html.count('href="https://example.org/verify-email?token=a&amp;b"') == 2
+    html, _ = build_welcome_email("Anna", "TSV Muster")
+    assert "Einnahmen &amp; Ausgaben" in html and "<title>VereinsKasse</title>" in html
+
+
+def test_messages_of_one_organization_share_a_prerendered_template():
+    email_service._prerender.cache_clear()
+    for i in range(50):
+        build_payment_reminder_email(f"Mitglied {i}", "TSV Muster", 10 + i, "01.04.2026")
+    build_payment_reminder_email("Anna", "FC Beispiel", 10, "01.04.2026")
+    build_payment_reminder_email("Anna", "FC Beispiel", 10, "01.04.2026", notes="Hinweis")
+    info = email_service._prerender.cache_info()
+    assert (info.misses, info.hits) == (3, 49)
+
+
+@pytest.mark.benchmark
+def test_render_throughput():
+    started = time.perf_counter()
+    for i in range(BENCHMARK_MESSAGES):
+        build_payment_reminder_email(
+            f"Mitglied {i}", f"Verein {i % 100}", 10 + i % 7, "01.04.2026", notes="Hinweis" if i % 3 == 0 else None,
+        )
+    messages_per_second = BENCHMARK_MESSAGES / (time.perf_counter() - started)
+    assert messages_per_second > MIN_MESSAGES_PER_SECOND, f"{messages_per_second:,.0f} messages/s"
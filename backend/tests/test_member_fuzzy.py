@@ -0,0 +1,153 @@
+"""Tests for fuzzy (trigram) matching of bank counterparties to members."""
+import os
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.database import Base
+from app.models.user import User
+from app.models.member import Member, normalize_member_name
+from app.core.security import create_access_token, get_password_hash
+from app.services import member_fuzzy
+from app.services.member_fuzzy import FuzzyMemberIndex, TrigramIndex, trigrams
+from app.services.member_matcher import MemberMatcher
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+MEMBERS = [
+    Member(id=1, first_name="Hans", last_name="Müller", status="active"),
+    Member(id=2, first_name="Erika", last_name="Mustermann", status="active"),
+    Member(id=3, first_name="Erik", last_name="Mustermann", status="active"),
+    Member(id=4, first_name="José", last_name="Groß", status="active"),
+]
+
+
+def test_normalization_and_trigrams():
+    assert normalize_member_name("Müller, Hans-Jürgen") == "mueller hans juergen"
+    assert normalize_member_name("MUELLER") == normalize_member_name("Müller")
+    assert normalize_member_name(None) == ""
+    # Same trigram set as pg_trgm's show_trgm('cat')
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+
+
+def test_trigram_index_ranks_candidates():
+    index = TrigramIndex(MEMBERS)
+    assert index.search("Mueller, Hans", 0.5, 3) == [(1, 1.0)]
+    assert index.search("GROSS JOSE", 0.5, 3) == [(4, 1.0)]
+
+    ranked = index.search("Erika Musterman", 0.3, 3)
+    assert [member_id for member_id, _ in ranked] == [2, 3]
+    assert ranked[0][1] > ranked[1][1]
+    assert index.search("Stadtwerke Musterstadt", 0.5, 3) == []
+    assert index.search("", 0.5, 3) == []
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_rule_only_fills_in_missed_lines(db_session: AsyncSession):
+    matcher = MemberMatcher(MEMBERS, FuzzyMemberIndex(user_id=1, index=TrigramIndex(MEMBERS)))
+    lines = [
+        {"iban": None, "counterparty": "MUELLER HANS", "purpose": "Beitrag"},
+        {"iban": None, "counterparty": "E. Mustermann", "purpose": "Beitrag"},  # exact last-name rule
+        {"iban": None, "counterparty": "Stadtwerke", "purpose": "Strom"},
+        {"iban": None, "counterparty": None, "purpose": "Beitrag"},
+    ]
+    matches = await matcher.match_lines(db_session, lines)
+
+    member, match_type, confidence, candidates = matches[0]
+    assert (member.id, match_type, confidence) == (1, "fuzzy", 1.0)
+    assert candidates == [(1, 1.0)]
+    assert (matches[1][0].id, matches[1][1], matches[1][2]) == (2, "name", 1.0)
+    assert matches[2] == (None, "", None, [])
+    assert matches[3] == (None, "", None, [])
+
+
+@pytest.mark.asyncio
+async def test_search_name_is_kept_up_to_date(db_session: AsyncSession):
+    user, _ = await create_verified_user(db_session, "owner@test.de")
+    member = Member(user_id=user.id, first_name="Jürgen", last_name="Weiß", status="active")
+    db_session.add(member)
+    await db_session.commit()
+    assert member.search_name == "juergen weiss"
+
+    member.last_name = "Schäfer"
+    await db_session.commit()
+    assert member.search_name == "juergen schaefer"
+
+
+@pytest.mark.asyncio
+async def test_import_reports_fuzzy_matches(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add_all([
+        Member(user_id=user.id, first_name="Hans", last_name="Müller", status="active"),
+        Member(user_id=user.id, first_name="Hanna", last_name="Müller", status="active"),
+    ])
+    await db_session.commit()
+
+    content = "Buchungstag;Auftraggeber;IBAN;Verwendungszweck;Betrag\n01.03.2026;MUELLER, HANS;;Beitrag;10,00\n"
+    res = await client.post(
+        "/api/v1/bank/import",
+        files={"file": ("auszug.csv", content.encode(), "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    line = res.json()["transactions"][0]
+    assert line["match_type"] == "fuzzy"
+    assert line["matched_member_name"] == "Hans Müller"
+    assert line["match_confidence"] == 1.0
+    assert [c["member_name"] for c in line["match_candidates"]] == ["Hans Müller", "Hanna Müller"]
+    assert res.json()["member_matches"] == 1
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+@pytest.mark.asyncio
+async def test_pg_trgm_lookup_agrees_with_python_index(monkeypatch):
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        if not (await conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"))).scalar():
+            pytest.skip("pg_trgm not available")
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "CREATE INDEX ix_members_search_name_trgm ON members USING gin (search_name gin_trgm_ops)"
+        ))
+    monkeypatch.setattr(member_fuzzy, "_trgm_index_available", None)
+
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            user, _ = await create_verified_user(db, "owner@test.de")
+            other, _ = await create_verified_user(db, "other@test.de")
+            members = [
+                Member(user_id=user.id, first_name=m.first_name, last_name=m.last_name, status="active")
+                for m in MEMBERS
+            ]
+            db.add_all(members + [Member(user_id=other.id, first_name="Hans", last_name="Müller", status="active")])
+            await db.commit()
+
+            names = ["Mueller, Hans", "Erika Musterman", "GROSS JOSE", "Stadtwerke", ""]
+            fuzzy = await FuzzyMemberIndex.load(db, user.id, members)
+            assert fuzzy._index is None  # answered by PostgreSQL
+            expected = [TrigramIndex(members).search(name, fuzzy.threshold, fuzzy.limit) for name in names]
+            assert await fuzzy.search_many(db, names) == expected
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
@@ -0,0 +1,119 @@
+"""Tests for the precomputed bank-import member matcher."""
+import random
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.member import Member
+from app.core.security import create_access_token, get_password_hash
+from app.services.member_matcher import MemberMatcher, NameAutomaton
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def legacy_match(members: list[Member], iban, counterparty, purpose):
+    """The former per-row matcher (one IBAN query, then a linear name scan)."""
+    if iban:
+        for m in members:
+            if m.iban == iban:
+                return m, "iban"
+    search_text = " ".join(filter(None, [counterparty, purpose])).lower()
+    for member in members:
+        if member.status != "active":
+            continue
+        full = member.full_name.lower()
+        last = member.last_name.lower()
+        if len(last) >= 3 and (last in search_text or full in search_text):
+            return member, "name"
+    return None, ""
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = NameAutomaton({"meier": 2, "eier": 1, "ei": 0, "schmidt": 3})
+    assert automaton.best_match("zahlung meier") == 0
+    assert automaton.best_match("schmidt") == 3
+    assert automaton.best_match("schmid") is None
+    assert NameAutomaton({"she": 1, "he": 0, "hers": 2}).best_match("ushers") == 0
+    assert NameAutomaton({}).best_match("irgendwas") is None
+
+
+def test_matcher_agrees_with_legacy_scan():
+    rnd = random.Random(7)
+    syllables = ["mei", "er", "schu", "lz", "ko", "ch", "mül", "ler", "ba", "uer", "ß", "ö", "al", "i"]
+    members = []
+    for i in range(1500):
+        last = "".join(rnd.choice(syllables) for _ in range(rnd.randint(1, 3)))
+        members.append(Member(
+            id=i + 1,
+            first_name=rnd.choice(["Anna", "Jörg", "Eva", "Li"]),
+            last_name=last.capitalize() if rnd.random() < 0.8 else last.upper(),
+            status="active" if rnd.random() < 0.85 else "inactive",
+            iban=f"DE{rnd.randint(10, 99)}{i:018d}" if rnd.random() < 0.5 else None,
+        ))
+    matcher = MemberMatcher(members)
+
+    for _ in range(2000):
+        iban = rnd.choice([m.iban for m in members if m.iban] + [None, "DE00123"])
+        counterparty = " ".join(rnd.choice(syllables) for _ in range(rnd.randint(0, 4))).title() or None
+        purpose = rnd.choice([None, "Beitrag 2026", "Mitgliedsbeitrag " + rnd.choice(syllables) + rnd.choice(syllables)])
+        expected = legacy_match(members, iban, counterparty, purpose)
+        got = matcher.match(iban, counterparty, purpose)
+        assert (got[0].id if got[0] else None, got[1]) == (expected[0].id if expected[0] else None, expected[1])
+
+
+def test_matcher_handles_large_statement_quickly():
+    members = [
+        Member(id=i, first_name="Max", last_name=f"Nachname{i:05d}", status="active", iban=None)
+        for i in range(1500)
+    ]
+    matcher = MemberMatcher(members)
+    texts = [f"Überweisung Nachname{i % 3000:05d} Beitrag" for i in range(2000)]
+    started = time.perf_counter()
+    matched = sum(1 for t in texts if matcher.match(None, t, None)[0])
+    assert matched == 1000 + 500  # 0..1499 match, 1500..2999 don't
+    assert time.perf_counter() - started < 1.0
+
+
+@pytest.mark.asyncio
+async def test_bank_import_matches_by_iban_and_name(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add_all([
+        Member(user_id=user.id, first_name="Erika", last_name="Mustermann", status="active", iban="DE02120300000000202051"),
+        Member(user_id=user.id, first_name="Hans", last_name="Schulze", status="active"),
+        Member(user_id=user.id, first_name="Otto", last_name="Ex", status="active"),
+    ])
+    await db_session.commit()
+
+    csv_content = (
+        "Buchungstag;Auftraggeber;IBAN;Verwendungszweck;Betrag\n"
+        "01.03.2026;E. M.;DE02120300000000202051;Beitrag;10,00\n"
+        "02.03.2026;Familie Schulze;DE99000000000000000000;Beitrag Maerz;12,50\n"
+        "03.03.2026;Ex Otto;;Spende;5,00\n"
+    )
+    res = await client.post(
+        "/api/v1/bank/import",
+        files={"file": ("auszug.csv", csv_content.encode(), "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert data["member_matches"] == 3
+    # "Ex" is too short for the last-name rule; the reversed full name is found by the fuzzy rule
+    assert [t["match_type"] for t in data["transactions"]] == ["iban", "name", "fuzzy"]
+    assert data["transactions"][1]["matched_member_name"] == "Hans Schulze"
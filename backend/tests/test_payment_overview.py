@@ -0,0 +1,107 @@
+"""Tests for the set-based payment overview."""
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.member import Member
+from app.models.payment_reminder import PaymentReminder
+from app.core.security import create_access_token, get_password_hash
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+async def seed_members(db: AsyncSession, user_id: int, count: int) -> list[int]:
+    result = await db.execute(
+        insert(Member).returning(Member.id),
+        [{"user_id": user_id, "first_name": "Mitglied", "last_name": f"M{i:05d}", "status": "active",
+          "beitrag_monthly": Decimal("10.00")} for i in range(count)],
+    )
+    return list(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_overview_counts_open_and_overdue(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    other, _ = await create_verified_user(db_session, "other@test.de")
+    today = date.today()
+    anna = Member(user_id=user.id, first_name="Anna", last_name="A", email="anna@test.de", beitrag_monthly=Decimal("12"))
+    bernd = Member(user_id=user.id, first_name="Bernd", last_name="B")
+    ex = Member(user_id=user.id, first_name="Ex", last_name="E", status="inactive")
+    fremd = Member(user_id=other.id, first_name="Fremd", last_name="F")
+    db_session.add_all([anna, bernd, ex, fremd])
+    await db_session.flush()
+    db_session.add_all([
+        PaymentReminder(member_id=anna.id, amount=Decimal("10.00"), due_date=today - timedelta(days=3), status="sent"),
+        PaymentReminder(member_id=anna.id, amount=Decimal("5.50"), due_date=today + timedelta(days=3)),
+        PaymentReminder(member_id=anna.id, amount=Decimal("99.00"), due_date=today - timedelta(days=3), status="paid"),
+        PaymentReminder(member_id=ex.id, amount=Decimal("10.00"), due_date=today - timedelta(days=3)),
+        PaymentReminder(member_id=fremd.id, amount=Decimal("10.00"), due_date=today - timedelta(days=3)),
+    ])
+    await db_session.commit()
+
+    res = await client.get("/api/v1/members/payment-overview", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.json() == [
+        {"member_id": anna.id, "member_name": "Anna A", "email": "anna@test.de", "beitrag_monthly": 12.0,
+         "open_reminders": 2, "overdue_count": 1, "total_due": 15.5},
+        {"member_id": bernd.id, "member_name": "Bernd B", "email": None, "beitrag_monthly": None,
+         "open_reminders": 0, "overdue_count": 0, "total_due": 0.0},
+    ]
+
+    # A read: statuses are left to the scheduled sweep
+    statuses = (await db_session.execute(select(PaymentReminder.status).order_by(PaymentReminder.id))).scalars().all()
+    assert statuses == ["sent", "pending", "paid", "pending", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_overview_query_count_does_not_grow_with_members(
+    client: AsyncClient, db_session: AsyncSession, db_engine,
+):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    member_ids = await seed_members(db_session, user.id, 5000)
+    today = date.today()
+    await db_session.execute(insert(PaymentReminder), [
+        {"member_id": member_id, "amount": Decimal("10.00"), "due_date": today + timedelta(days=offset),
+         "status": "sent"}
+        for member_id in member_ids for offset in (-30, -1, 14)
+    ])
+    await db_session.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        started = time.perf_counter()
+        res = await client.get("/api/v1/members/payment-overview", headers={"Authorization": f"Bearer {token}"})
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", count)
+
+    data = res.json()
+    assert len(data) == 5000
+    assert (data[0]["open_reminders"], data[0]["overdue_count"], data[0]["total_due"]) == (3, 2, 30.0)
+    # User lookup and the overview SELECT
+    assert len([s for s in statements if not s.startswith(("BEGIN", "COMMIT"))]) <= 2
+    assert elapsed < 1.0
@@ -0,0 +1,211 @@
+"""
+Query-plan regression suite for tenant-scoped hot queries.
+
+Seeds a PostgreSQL database with several tenants, runs EXPLAIN on every hot
+query and fails if the planner falls back to a sequential scan on the queried
+table. Needs a disposable database: TEST_POSTGRES_URL=postgresql+asyncpg://...
+"""
+import json
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import Base
+from app.models.user import User
+from app.models.member import Member
+from app.models.transaction import Transaction
+from app.models.transaction_total import TransactionMonthlyTotal
+from app.models.payment_reminder import PaymentReminder
+from app.models.audit_log import AuditLog
+from app.models.event import Event
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+TENANTS = 40
+MEMBERS_PER_TENANT = 100
+TRANSACTIONS_PER_TENANT = 1000
+TENANT = 17
+
+
+async def seed(conn) -> None:
+    rnd = random.Random(42)
+    now = datetime.now(timezone.utc)
+    await conn.execute(insert(User.__table__), [
+        {"id": t, "email": f"verein{t}@test.de", "name": f"Verein {t}", "password_hash": "x",
+         "role": "member", "is_active": True, "is_verified": True, "subscription_tier": "free"}
+        for t in range(1, TENANTS + 1)
+    ])
+
+    members = []
+    for t in range(1, TENANTS + 1):
+        for m in range(MEMBERS_PER_TENANT):
+            members.append({
+                "id": (t - 1) * MEMBERS_PER_TENANT + m + 1, "user_id": t,
+                "first_name": f"Vorname{m}", "last_name": f"Nachname{rnd.randint(0, 10_000)}",
+                "status": "active" if m % 10 else "inactive",
+                "iban": f"DE{t:02d}{m:018d}" if m % 4 else None,
+            })
+    await conn.execute(insert(Member.__table__), members)
+
+    transactions = []
+    totals = {}
+    for t in range(1, TENANTS + 1):
+        for i in range(TRANSACTIONS_PER_TENANT):
+            tx_date = date(2020, 1, 1) + timedelta(days=rnd.randint(0, 6 * 365))
+            type_ = "income" if i % 3 else "expense"
+            amount = Decimal(rnd.randint(100, 10_000)) / 100
+            member_id = (t - 1) * MEMBERS_PER_TENANT + rnd.randint(1, MEMBERS_PER_TENANT) if i % 5 == 0 else None
+            transactions.append({
+                "user_id": t, "member_id": member_id, "type": type_, "amount": amount,
+                "description": f"Buchung {i}", "transaction_date": tx_date,
+            })
+            key = (t, date(tx_date.year, tx_date.month, 1), type_)
+            total, count = totals.get(key, (Decimal("0"), 0))
+            totals[key] = (total + amount, count + 1)
+    await conn.execute(insert(Transaction.__table__), transactions)
+    await conn.execute(insert(TransactionMonthlyTotal.__table__), [
+        {"user_id": t, "month": month, "type": type_, "total_amount": total, "transaction_count": count}
+        for (t, month, type_), (total, count) in totals.items()
+    ])
+
+    await conn.execute(insert(PaymentReminder.__table__), [
+        {"member_id": m["id"], "amount": Decimal("10.00"),
+         "due_date": date(2024, 1, 1) + timedelta(days=rnd.randint(0, 900)),
+         "status": "pending" if rnd.random() < 0.05 else "paid"}
+        for m in members for _ in range(3)
+    ])
+    await conn.execute(insert(AuditLog.__table__), [
+        {"user_id": rnd.randint(1, TENANTS), "action": "create",
+         "resource": rnd.choice(["transaction", "member", "member", "member", "category"]),
+         "resource_id": i, "created_at": now - timedelta(minutes=i)}
+        for i in range(40_000)
+    ])
+    await conn.execute(insert(Event.__table__), [
+        {"user_id": t, "title": f"Termin {e}", "is_public": True,
+         "event_date": now + timedelta(days=rnd.randint(-700, 90))}
+        for t in range(1, TENANTS + 1) for e in range(100)
+    ])
+    await conn.execute(text("ANALYZE"))
+
+
+def hot_queries() -> dict:
+    member_id = (TENANT - 1) * MEMBERS_PER_TENANT + 5
+    today = date.today()
+    return {
+        "kassenbuch_keyset_page": (
+            "transactions",
+            select(Transaction)
+            .where(
+                Transaction.user_id == TENANT,
+                tuple_(Transaction.transaction_date, Transaction.id) < tuple_(date(2023, 6, 1), 10**9),
+            )
+            .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+            .limit(101),
+        ),
+        "kassenbuch_type_period": (
+            "transactions",
+            select(Transaction.category, Transaction.amount).where(
+                Transaction.user_id == TENANT,
+                Transaction.type == "expense",
+                Transaction.transaction_date >= date(2024, 1, 1),
+                Transaction.transaction_date <= date(2024, 3, 31),
+            ),
+        ),
+        "portal_member_transactions": (
+            "transactions",
+            select(Transaction).where(Transaction.member_id == member_id).order_by(Transaction.transaction_date.desc()),
+        ),
+        "donation_receipt": (
+            "transactions",
+            select(Transaction).where(
+                Transaction.user_id == TENANT,
+                Transaction.member_id == member_id,
+                Transaction.type == "income",
+                Transaction.transaction_date >= date(2024, 1, 1),
+                Transaction.transaction_date <= date(2024, 12, 31),
+            ),
+        ),
+        "monthly_totals_range": (
+            "transaction_monthly_totals",
+            select(TransactionMonthlyTotal).where(
+                TransactionMonthlyTotal.user_id == TENANT,
+                TransactionMonthlyTotal.month >= date(2024, 1, 1),
+                TransactionMonthlyTotal.month <= date(2024, 12, 1),
+            ),
+        ),
+        "active_members_sorted": (
+            "members",
+            select(Member)
+            .where(Member.user_id == TENANT, Member.status == "active")
+            .order_by(Member.last_name, Member.first_name),
+        ),
+        "member_by_iban": (
+            "members",
+            select(Member).where(Member.user_id == TENANT, Member.iban == f"DE{TENANT:02d}{5:018d}"),
+        ),
+        "member_open_reminders": (
+            "payment_reminders",
+            select(PaymentReminder).where(
+                PaymentReminder.member_id == member_id,
+                PaymentReminder.status.in_(["pending", "sent", "overdue"]),
+            ),
+        ),
+        "overdue_sweep": (
+            "payment_reminders",
+            select(PaymentReminder.id).where(
+                PaymentReminder.status.in_(["pending", "sent"]),
+                PaymentReminder.due_date < today,
+            ),
+        ),
+        "audit_log_by_resource": (
+            "audit_log",
+            select(AuditLog).where(AuditLog.resource == "category").order_by(AuditLog.created_at.desc()).limit(100),
+        ),
+        "upcoming_events": (
+            "events",
+            select(Event)
+            .where(Event.user_id == TENANT, Event.event_date >= datetime.now(timezone.utc))
+            .order_by(Event.event_date),
+        ),
+    }
+
+
+def seq_scanned_relations(plan: dict) -> set[str]:
+    found = set()
+    if plan.get("Node Type") == "Seq Scan":
+        found.add(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found |= seq_scanned_relations(child)
+    return found
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes():
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await seed(conn)
+
+    regressions = {}
+    try:
+        async with engine.connect() as conn:
+            for name, (table, query) in hot_queries().items():
+                sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+                raw = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+                plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                if table in seq_scanned_relations(plan):
+                    regressions[name] = json.dumps(plan, indent=2)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    assert not regressions, "Sequential scan in: " + ", ".join(regressions) + "\n" + "\n".join(regressions.values())
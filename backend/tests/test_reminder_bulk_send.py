@@ -0,0 +1,209 @@
+"""Tests for queueing payment reminders in bulk and delivering them over pooled SMTP sessions."""
+import asyncio
+import aiosmtplib
+from datetime import date
+from decimal import Decimal
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.models.member import Member
+from app.models.payment_reminder import PaymentReminder
+from app.models.email_log import EmailLog
+from app.core.security import create_access_token, get_password_hash
+from app.services import email_outbox
+from app.services.email_service import SmtpPool, build_message
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+class FakeSmtpServer:
+    """Just enough SMTP to accept mail; RCPT for addresses in `reject` gets a 550."""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.connections = 0
+        self.recipients = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        writer.write(b"220 fake ESMTP\r\n")
+        recipient = None
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].split(":", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250-fake\r\n250 8BITMIME\r\n")
+            elif verb == "RCPT":
+                recipient = command.split("<", 1)[1].rstrip(">")
+                writer.write(b"550 no such user\r\n" if recipient in self.reject else b"250 ok\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                while (await reader.readline()) != b".\r\n":
+                    pass
+                self.recipients.append(recipient)
+                writer.write(b"250 queued\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:  # MAIL, RSET, NOOP
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def smtp_server(monkeypatch):
+    fake = FakeSmtpServer(reject={"kaputt@test.de"})
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.sockets[0].getsockname()[1])
+    monkeypatch.setattr(settings, "SMTP_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "SMTP_BULK_SEND_INTERVAL", 0)
+    yield fake
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_queues_and_outbox_delivers(client: AsyncClient, db_session: AsyncSession, smtp_server):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    members = [
+        Member(user_id=user.id, first_name="Mitglied", last_name=f"M{i:02d}", email=f"m{i:02d}@test.de")
+        for i in range(30)
+    ]
+    db_session.add_all(members)
+    await db_session.flush()
+    reminders = [
+        PaymentReminder(member_id=m.id, amount=Decimal("10.00"), due_date=date(2026, 4, 1)) for m in members
+    ]
+    db_session.add_all(reminders)
+    await db_session.commit()
+    ids = [r.id for r in reminders]
+
+    res = await client.post(
+        "/api/v1/members/reminders/send",
+        json={"reminder_ids": ids},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["queued"], data["skipped"]) == (30, 0)
+    assert [(r["reminder_id"], r["status"]) for r in data["results"]] == [(i, "queued") for i in ids]
+    # The request itself sends nothing
+    assert smtp_server.connections == 0
+    db_session.expire_all()
+    logs = (await db_session.execute(select(EmailLog.status, EmailLog.payment_reminder_id))).all()
+    assert sorted(logs) == [("pending", i) for i in ids]
+    statuses = (await db_session.execute(select(PaymentReminder.status))).scalars().all()
+    assert set(statuses) == {"pending"}
+
+    assert await email_outbox.deliver_batch(db_session) == 30
+    assert smtp_server.connections <= 2
+    assert sorted(smtp_server.recipients) == [f"m{i:02d}@test.de" for i in range(30)]
+    db_session.expire_all()
+    rows = (await db_session.execute(select(PaymentReminder.status, PaymentReminder.sent_at))).all()
+    assert {status for status, _ in rows} == {"sent"}
+    assert all(sent_at is not None for _, sent_at in rows)
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_reports_skipped_and_failed_delivery_stays_open(
+    client: AsyncClient, db_session: AsyncSession, smtp_server,
+):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    other, _ = await create_verified_user(db_session, "other@test.de")
+    ok = Member(user_id=user.id, first_name="Anna", last_name="A", email="anna@test.de")
+    broken = Member(user_id=user.id, first_name="Kaputt", last_name="K", email="kaputt@test.de")
+    silent = Member(user_id=user.id, first_name="Ohne", last_name="O")
+    fremd = Member(user_id=other.id, first_name="Fremd", last_name="F", email="fremd@test.de")
+    db_session.add_all([ok, broken, silent, fremd])
+    await db_session.flush()
+    due = date(2026, 4, 1)
+    first = PaymentReminder(member_id=ok.id, amount=Decimal("10.00"), due_date=due)
+    paid = PaymentReminder(member_id=ok.id, amount=Decimal("10.00"), due_date=due, status="paid")
+    refused = PaymentReminder(member_id=broken.id, amount=Decimal("10.00"), due_date=due)
+    no_email = PaymentReminder(member_id=silent.id, amount=Decimal("10.00"), due_date=due)
+    foreign = PaymentReminder(member_id=fremd.id, amount=Decimal("10.00"), due_date=due)
+    last = PaymentReminder(member_id=ok.id, amount=Decimal("5.00"), due_date=due)
+    db_session.add_all([first, paid, refused, no_email, foreign, last])
+    await db_session.commit()
+
+    ids = [first.id, paid.id, refused.id, no_email.id, foreign.id, last.id]
+    res = await client.post(
+        "/api/v1/members/reminders/send", json={"reminder_ids": ids + [first.id]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    data = res.json()
+    assert (data["queued"], data["skipped"]) == (3, 3)
+    assert [(r["reminder_id"], r["status"]) for r in data["results"]] == [
+        (first.id, "queued"), (paid.id, "skipped"), (refused.id, "queued"),
+        (no_email.id, "skipped"), (foreign.id, "skipped"), (last.id, "queued"),
+    ]
+    assert data["results"][1]["error"] == "Bereits bezahlt"
+
+    assert await email_outbox.deliver_batch(db_session) == 3
+    # The refused recipient did not cost a session
+    assert smtp_server.connections <= 2
+
+    db_session.expire_all()
+    statuses = dict((await db_session.execute(select(PaymentReminder.id, PaymentReminder.status))).all())
+    assert [statuses[i] for i in ids] == ["sent", "paid", "pending", "pending", "pending", "sent"]
+    logs = (await db_session.execute(select(EmailLog.recipient, EmailLog.status, EmailLog.error))).all()
+    assert sorted((r, s) for r, s, _ in logs) == [
+        ("anna@test.de", "sent"), ("anna@test.de", "sent"), ("kaputt@test.de", "failed"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_send_limit(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    monkeypatch.setattr(settings, "REMINDER_BULK_MAX", 2)
+    res = await client.post(
+        "/api/v1/members/reminders/send", json={"reminder_ids": [1, 2, 3]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_pool_reports_refused_connect_and_keeps_the_slot(smtp_server):
+    pool = SmtpPool(size=1)
+    connect = pool._connect
+    attempts = 0
+
+    async def refuse_first_login():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise aiosmtplib.SMTPAuthenticationError(535, "authentication failed")
+        return await connect()
+
+    pool._connect = refuse_first_login
+    msg = build_message("anna@test.de", "Betreff", "<p>Hallo</p>")
+    with pytest.raises(aiosmtplib.SMTPAuthenticationError):
+        await pool.send(msg)
+    # The slot went back to the pool and the next message connects afresh
+    await asyncio.wait_for(pool.send(msg), timeout=5)
+    await pool.close()
+    assert smtp_server.recipients == ["anna@test.de"]
@@ -0,0 +1,110 @@
+"""Tests for the periodic job runner and the maintenance jobs."""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.models.member import Member
+from app.models.payment_reminder import PaymentReminder
+from app.models.scheduled_job import ScheduledJob, ScheduledJobRun
+from app.services import maintenance, scheduler
+
+
+@pytest.fixture(autouse=True)
+def scheduler_environment(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_BATCH_SIZE", 3)
+
+
+def user(email: str, **kwargs) -> User:
+    return User(email=email, name="Test", password_hash="x", role="member", is_active=True, is_verified=True, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_overdue_sweep_updates_in_batches(db_session: AsyncSession):
+    owner = user("owner@test.de")
+    db_session.add(owner)
+    await db_session.flush()
+    member = Member(user_id=owner.id, first_name="Anna", last_name="A")
+    db_session.add(member)
+    await db_session.flush()
+    today = date(2026, 4, 10)
+    for days, status in [(-5, "pending")] * 4 + [(-1, "sent")] * 3 + [(0, "pending"), (3, "sent"), (-9, "paid")]:
+        db_session.add(PaymentReminder(member_id=member.id, amount=Decimal("5"), due_date=today + timedelta(days=days),
+                                       status=status))
+    await db_session.commit()
+
+    assert await maintenance.sweep_overdue_reminders(db_session, today) == 7
+    statuses = (await db_session.execute(select(PaymentReminder.status).order_by(PaymentReminder.id))).scalars().all()
+    assert statuses == ["overdue"] * 7 + ["pending", "sent", "paid"]
+    assert await maintenance.sweep_overdue_reminders(db_session, today) == 0
+
+
+@pytest.mark.asyncio
+async def test_premium_expiry(db_session: AsyncSession):
+    now = datetime(2026, 4, 10, 12, 0, tzinfo=timezone.utc)
+    db_session.add_all([
+        user("expired@test.de", subscription_tier="premium", subscription_expires_at=now - timedelta(minutes=1)),
+        user("running@test.de", subscription_tier="premium", subscription_expires_at=now + timedelta(days=1)),
+        user("lifetime@test.de", subscription_tier="premium"),
+    ])
+    await db_session.commit()
+
+    assert await maintenance.expire_premium_subscriptions(db_session, now) == 1
+    tiers = dict((await db_session.execute(select(User.email, User.subscription_tier))).all())
+    assert tiers == {"expired@test.de": "free", "running@test.de": "premium", "lifetime@test.de": "premium"}
+
+
+@pytest.mark.asyncio
+async def test_job_runs_once_per_interval_under_a_lease(db_session: AsyncSession, session_factory, monkeypatch):
+    calls = []
+
+    async def count_rows(db: AsyncSession) -> int:
+        calls.append(scheduler.worker_id)
+        return 4
+
+    job = scheduler.PeriodicJob("test_job", 3600, count_rows)
+    await scheduler.ensure_jobs(db_session, [job])
+    await scheduler.ensure_jobs(db_session, [job])
+
+    # Another worker holds the lease
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(scheduler, "worker_id", "other-worker")
+    assert await scheduler.acquire_lease(db_session, job, now)
+    monkeypatch.setattr(scheduler, "worker_id", "this-worker")
+    assert await scheduler.run_due_jobs(session_factory, [job]) == []
+
+    # Its lease ran out without a release (crashed worker): this worker takes over
+    db_session.expire_all()
+    row = await db_session.get(ScheduledJob, "test_job")
+    row.lease_expires_at = now - timedelta(seconds=1)
+    await db_session.commit()
+    assert await scheduler.run_due_jobs(session_factory, [job]) == ["test_job"]
+    assert calls == ["this-worker"]
+
+    # Not due again until the interval has passed
+    assert await scheduler.run_due_jobs(session_factory, [job]) == []
+
+    db_session.expire_all()
+    row = await db_session.get(ScheduledJob, "test_job")
+    assert (row.lease_owner, row.last_rows, row.last_error) == (None, 4, None)
+    assert row.last_duration_ms >= 0
+    runs = (await db_session.execute(select(ScheduledJobRun))).scalars().all()
+    assert [(r.job_name, r.worker, r.rows) for r in runs] == [("test_job", "this-worker", 4)]
+
+
+@pytest.mark.asyncio
+async def test_failed_run_is_recorded_and_releases_the_lease(db_session: AsyncSession, session_factory):
+    async def broken(db: AsyncSession) -> int:
+        raise RuntimeError("kaputt")
+
+    job = scheduler.PeriodicJob("broken_job", 60, broken)
+    await scheduler.ensure_jobs(db_session, [job])
+    assert await scheduler.run_due_jobs(session_factory, [job]) == ["broken_job"]
+
+    row = await db_session.get(ScheduledJob, "broken_job")
+    assert row.lease_owner is None
+    assert row.last_error == "RuntimeError: kaputt"
+    run = (await db_session.execute(select(ScheduledJobRun))).scalar_one()
+    assert run.error == "RuntimeError: kaputt"
@@ -0,0 +1,186 @@
+"""Tests for splitting SEPA exports into several files."""
+import io
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import date
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.member import Member
+from app.core.security import create_access_token, get_password_hash
+from app.services.sepa_batches import BatchPlanner, stream_zip
+
+NS = {"p": "urn:iso:std:iso:20022:tech:xsd:pain.008.003.02"}
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def plan(debits, max_transactions, max_amount=None):
+    planner = BatchPlanner(max_transactions, max_amount)
+    batches = [b for key, amount in debits if (b := planner.add(key, amount, Decimal(amount)))]
+    batches.append(planner.finish())
+    return [(b["key"], b["number"], b["items"]) for b in batches]
+
+
+def test_planner_splits_by_group_count_and_amount():
+    debits = [("FRST", "10"), ("FRST", "10"), ("FRST", "10"), ("RCUR", "60"), ("RCUR", "50"), ("RCUR", "5")]
+    assert plan(debits, max_transactions=2) == [
+        ("FRST", 1, ["10", "10"]), ("FRST", 2, ["10"]), ("RCUR", 1, ["60", "50"]), ("RCUR", 2, ["5"]),
+    ]
+    assert plan(debits, max_transactions=10, max_amount=Decimal("100")) == [
+        ("FRST", 1, ["10", "10", "10"]), ("RCUR", 1, ["60"]), ("RCUR", 2, ["50", "5"]),
+    ]
+    # A debit above the limit cannot be split and gets a file of its own
+    assert plan([("RCUR", "500"), ("RCUR", "1")], 10, Decimal("100")) == [("RCUR", 1, ["500"]), ("RCUR", 2, ["1"])]
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_keeps_order():
+    async def files():
+        for i in range(7):
+            yield f"{i}.xml", lambda i=i: f"<n>{i}</n>".encode() * (1000 - i * 100)
+
+    content = b"".join([chunk async for chunk in stream_zip(files(), concurrency=3)])
+    archive = zipfile.ZipFile(io.BytesIO(content))
+    assert archive.namelist() == [f"{i}.xml" for i in range(7)]
+    assert archive.read("6.xml") == b"<n>6</n>" * 400
+
+
+EXPORT = {
+    "collection_date": "2026-04-01",
+    "first_collection_date": "2026-04-03",
+    "creditor_iban": "DE89370400440532013000",
+    "creditor_bic": "COBADEFFXXX",
+    "creditor_id": "DE98ZZZ09999999999",
+}
+
+
+@pytest.mark.asyncio
+async def test_export_returns_zip_with_one_file_per_batch(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add_all([Member(**row) for row in [
+        {"user_id": user.id, "first_name": "Neu", "last_name": f"Mitglied{i:02d}", "status": "active",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("10.00")}
+        for i in range(5)
+    ] + [
+        {"user_id": user.id, "first_name": "Alt", "last_name": f"Mitglied{i:02d}", "status": "active",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("20.00"),
+         "sepa_first_collection_date": date(2025, 1, 1)}
+        for i in range(3)
+    ]])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = await client.post("/api/v1/sepa/export", json={**EXPORT, "max_transactions_per_file": 2}, headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(res.content))
+    assert archive.namelist() == [
+        "SEPA-Lastschrift-2026-04-03-FRST-001.xml",
+        "SEPA-Lastschrift-2026-04-03-FRST-002.xml",
+        "SEPA-Lastschrift-2026-04-03-FRST-003.xml",
+        "SEPA-Lastschrift-2026-04-01-RCUR-001.xml",
+        "SEPA-Lastschrift-2026-04-01-RCUR-002.xml",
+    ]
+    msg_ids = set()
+    total = 0
+    for name in archive.namelist():
+        root = ET.fromstring(archive.read(name))
+        seq_type = root.findtext(".//p:SeqTp", namespaces=NS)
+        assert seq_type in name
+        assert root.findtext(".//p:ReqdColltnDt", namespaces=NS) in name
+        nb_txs = int(root.findtext(".//p:GrpHdr/p:NbOfTxs", namespaces=NS))
+        assert nb_txs == len(root.findall(".//p:DrctDbtTxInf", NS)) <= 2
+        total += nb_txs
+        msg_ids.add(root.findtext(".//p:MsgId", namespaces=NS))
+    assert total == 8
+    assert len(msg_ids) == 5
+
+    # Once the file is submitted, a later collection is RCUR for everyone, in one file
+    res = await client.post(
+        "/api/v1/sepa/submitted", json={k: EXPORT[k] for k in ("collection_date", "first_collection_date")},
+        headers=headers,
+    )
+    assert res.json() == {"marked": 5}
+    marked = (await db_session.execute(select(Member.sepa_first_collection_date).where(Member.first_name == "Neu"))).scalars()
+    assert set(marked) == {date(2026, 4, 3)}
+    res = await client.post(
+        "/api/v1/sepa/export",
+        json={**EXPORT, "collection_date": "2026-05-01", "first_collection_date": None},
+        headers=headers,
+    )
+    assert res.headers["content-type"].startswith("application/xml")
+    root = ET.fromstring(res.content)
+    assert root.findtext(".//p:SeqTp", namespaces=NS) == "RCUR"
+    assert root.findtext(".//p:GrpHdr/p:NbOfTxs", namespaces=NS) == "8"
+
+
+@pytest.mark.asyncio
+async def test_export_splits_by_amount(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add_all([Member(**row) for row in [
+        {"user_id": user.id, "first_name": "Alt", "last_name": f"Mitglied{i:02d}", "status": "active",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("40.00"),
+         "sepa_first_collection_date": date(2025, 1, 1)}
+        for i in range(5)
+    ]])
+    await db_session.commit()
+
+    res = await client.post(
+        "/api/v1/sepa/export", json={**EXPORT, "max_amount_per_file": "100"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    archive = zipfile.ZipFile(io.BytesIO(res.content))
+    sums = [ET.fromstring(archive.read(n)).findtext(".//p:GrpHdr/p:CtrlSum", namespaces=NS) for n in archive.namelist()]
+    assert sums == ["80.00", "80.00", "40.00"]
+
+
+@pytest.mark.asyncio
+async def test_only_submission_uses_up_first_debits(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add_all([
+        Member(user_id=user.id, first_name="Neu", last_name=f"Mitglied{i:02d}", status="active",
+               iban="DE02120300000000202051", beitrag_monthly=Decimal("10.00"))
+        for i in range(3)
+    ])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def sequence_types(collection_date: str) -> list[str]:
+        res = await client.post(
+            "/api/v1/sepa/export", json={**EXPORT, "collection_date": collection_date, "first_collection_date": None},
+            headers=headers,
+        )
+        assert res.status_code == 200
+        return [e.text for e in ET.fromstring(res.content).findall(".//p:SeqTp", NS)]
+
+    # Downloads alone change nothing, however often they are repeated
+    assert await sequence_types("2026-04-01") == ["FRST"]
+    assert await sequence_types("2026-05-01") == ["FRST"]
+    marked = (await db_session.execute(select(Member.sepa_first_collection_date))).scalars()
+    assert set(marked) == {None}
+
+    res = await client.post("/api/v1/sepa/submitted", json={"collection_date": "2026-04-01"}, headers=headers)
+    assert res.json() == {"marked": 3}
+    assert await sequence_types("2026-04-01") == ["FRST"]
+    assert await sequence_types("2026-05-01") == ["RCUR"]
+    res = await client.post("/api/v1/sepa/submitted", json={"collection_date": "2026-05-01"}, headers=headers)
+    assert res.json() == {"marked": 0}
@@ -0,0 +1,193 @@
+"""Tests for the streaming SEPA pain.008 export."""
+import re
+import time
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.member import Member
+from app.core.security import create_access_token, get_password_hash
+from app.services.sepa_writer import Pain008Writer, clean_sepa_string, format_amount
+
+NS = {"p": "urn:iso:std:iso:20022:tech:xsd:pain.008.003.02"}
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def legacy_generate_sepa_xml(user, members, creditor_iban, creditor_bic, creditor_id, collection_date) -> str:
+    """The former ElementTree implementation, for output comparison."""
+    now = datetime.now(timezone.utc)
+    msg_id = f"VK-{now.strftime('%Y%m%d%H%M%S')}"
+    total_amount = sum(m.beitrag_monthly for m in members)
+    creditor_name = clean_sepa_string(user.organization_name or user.name or "Verein")
+    root = ET.Element("Document", xmlns=NS["p"])
+    cdd = ET.SubElement(root, "CstmrDrctDbtInitn")
+    grp_hdr = ET.SubElement(cdd, "GrpHdr")
+    ET.SubElement(grp_hdr, "MsgId").text = msg_id
+    ET.SubElement(grp_hdr, "CreDtTm").text = now.strftime("%Y-%m-%dT%H:%M:%S")
+    ET.SubElement(grp_hdr, "NbOfTxs").text = str(len(members))
+    ET.SubElement(grp_hdr, "CtrlSum").text = format_amount(total_amount)
+    ET.SubElement(ET.SubElement(grp_hdr, "InitgPty"), "Nm").text = creditor_name
+    pmt_inf = ET.SubElement(cdd, "PmtInf")
+    ET.SubElement(pmt_inf, "PmtInfId").text = f"{msg_id}-PMT"
+    ET.SubElement(pmt_inf, "PmtMtd").text = "DD"
+    ET.SubElement(pmt_inf, "NbOfTxs").text = str(len(members))
+    ET.SubElement(pmt_inf, "CtrlSum").text = format_amount(total_amount)
+    pmt_tp_inf = ET.SubElement(pmt_inf, "PmtTpInf")
+    ET.SubElement(ET.SubElement(pmt_tp_inf, "SvcLvl"), "Cd").text = "SEPA"
+    ET.SubElement(ET.SubElement(pmt_tp_inf, "LclInstrm"), "Cd").text = "CORE"
+    ET.SubElement(pmt_tp_inf, "SeqTp").text = "RCUR"
+    ET.SubElement(pmt_inf, "ReqdColltnDt").text = collection_date.isoformat()
+    ET.SubElement(ET.SubElement(pmt_inf, "Cdtr"), "Nm").text = creditor_name
+    ET.SubElement(ET.SubElement(ET.SubElement(pmt_inf, "CdtrAcct"), "Id"), "IBAN").text = creditor_iban.replace(" ", "")
+    ET.SubElement(ET.SubElement(ET.SubElement(pmt_inf, "CdtrAgt"), "FinInstnId"), "BIC").text = creditor_bic
+    for member in members:
+        tx = ET.SubElement(pmt_inf, "DrctDbtTxInf")
+        ET.SubElement(ET.SubElement(tx, "PmtId"), "EndToEndId").text = f"BEITRAG-{member.id}-{collection_date.strftime('%Y%m')}"
+        ET.SubElement(tx, "InstdAmt", Ccy="EUR").text = format_amount(member.beitrag_monthly)
+        drct_dbt_tx = ET.SubElement(tx, "DrctDbtTx")
+        mndt = ET.SubElement(drct_dbt_tx, "MndtRltdInf")
+        ET.SubElement(mndt, "MndtId").text = f"MANDAT-{member.id}"
+        ET.SubElement(mndt, "DtOfSgntr").text = (member.member_since or collection_date).isoformat()
+        othr = ET.SubElement(ET.SubElement(ET.SubElement(ET.SubElement(drct_dbt_tx, "CdtrSchmeId"), "Id"), "PrvtId"), "Othr")
+        ET.SubElement(othr, "Id").text = creditor_id
+        ET.SubElement(ET.SubElement(othr, "SchmeNm"), "Prtry").text = "SEPA"
+        ET.SubElement(ET.SubElement(ET.SubElement(tx, "DbtrAgt"), "FinInstnId"), "Othr")
+        ET.SubElement(ET.SubElement(tx, "Dbtr"), "Nm").text = clean_sepa_string(member.full_name)
+        ET.SubElement(ET.SubElement(ET.SubElement(tx, "DbtrAcct"), "Id"), "IBAN").text = member.iban.replace(" ", "")
+        ET.SubElement(ET.SubElement(tx, "Purp"), "Cd").text = "MSVC"
+        ET.SubElement(ET.SubElement(tx, "RmtInf"), "Ustrd").text = (
+            f"Mitgliedsbeitrag {collection_date.strftime('%B %Y')} {member.member_number or ''}"
+        )
+    ET.indent(root, space="  ")
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding="unicode")
+
+
+def without_timestamps(xml: str) -> str:
+    return re.sub(r"VK-\d{14}", "VK-X", re.sub(r"<CreDtTm>[^<]*</CreDtTm>", "<CreDtTm />", xml))
+
+
+EXPORT = {
+    "collection_date": "2026-04-01",
+    "creditor_iban": "DE89 3704 0044 0532 0130 00",
+    "creditor_bic": "COBADEFFXXX",
+    "creditor_id": "DE98ZZZ09999999999",
+}
+
+
+def legacy_members(user: User) -> list[Member]:
+    return [
+        Member(user_id=user.id, first_name="Jürgen", last_name="Groß", status="active",
+               iban="DE02 1203 0000 0000 2020 51", beitrag_monthly=Decimal("12.50"), member_since=date(2020, 1, 1),
+               member_number="A&B<1>", sepa_first_collection_date=date(2025, 1, 1)),
+        Member(user_id=user.id, first_name="@@@", last_name="", status="active", iban="DE02120300000000202051",
+               beitrag_monthly=Decimal("5"), sepa_first_collection_date=date(2025, 1, 1)),
+    ]
+
+
+def test_writer_output_matches_elementtree():
+    user = User(name="Kassenwart", organization_name="TSV Grün-Weiß & Co.")
+    members = legacy_members(user)
+    for i, member in enumerate(members, start=1):
+        member.id = i
+    args = ("DE89 3704 0044 0532 0130 00", "COBADEFFXXX", "DE98ZZZ09999999999", date(2026, 4, 1))
+    writer = Pain008Writer(user.organization_name, *args, "VK-20260401000000", "2026-04-01T00:00:00")
+    parts = [writer.start(len(members), sum(m.beitrag_monthly for m in members))]
+    parts.extend(
+        writer.transaction(m.id, m.full_name, m.iban, m.beitrag_monthly, m.member_since, m.member_number)
+        for m in members
+    )
+    parts.append(writer.end())
+    assert without_timestamps("".join(parts)) == without_timestamps(legacy_generate_sepa_xml(user, members, *args))
+
+
+@pytest.mark.asyncio
+async def test_streamed_export_matches_elementtree(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    user.organization_name = "TSV Grün-Weiß & Co."
+    members = legacy_members(user)
+    db_session.add_all(members)
+    await db_session.commit()
+
+    res = await client.post("/api/v1/sepa/export", json=EXPORT, headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    # The export orders by last name
+    expected = legacy_generate_sepa_xml(user, members[::-1], EXPORT["creditor_iban"], EXPORT["creditor_bic"],
+                                        EXPORT["creditor_id"], date(2026, 4, 1))
+    assert without_timestamps(res.content.decode("utf-8")) == without_timestamps(expected)
+
+
+def test_writer_renders_large_collections_quickly():
+    writer = Pain008Writer("Verein", "DE89370400440532013000", "COBADEFFXXX", "DE98ZZZ09999999999",
+                           date(2026, 4, 1), "VK-1", "2026-04-01T00:00:00")
+    started = time.perf_counter()
+    parts = [writer.start(20_000, Decimal("200000"))]
+    parts.extend(
+        writer.transaction(i, f"Mitglied {i}", "DE02120300000000202051", Decimal("10.00"), None, str(i))
+        for i in range(20_000)
+    )
+    parts.append(writer.end())
+    elapsed = time.perf_counter() - started
+
+    root = ET.fromstring("".join(parts).encode("utf-8"))
+    assert len(root.findall(".//p:DrctDbtTxInf", NS)) == 20_000
+    assert elapsed < 2.0
+
+
+@pytest.mark.asyncio
+async def test_export_streams_eligible_members(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    other, _ = await create_verified_user(db_session, "other@test.de")
+    db_session.add_all([Member(**row) for row in [
+        {"user_id": user.id, "first_name": "Anna", "last_name": f"Beitrag{i:04d}", "status": "active",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("10.50")}
+        for i in range(2500)
+    ] + [
+        {"user_id": user.id, "first_name": "Ohne", "last_name": "Iban", "status": "active",
+         "iban": "", "beitrag_monthly": Decimal("10")},
+        {"user_id": user.id, "first_name": "Ohne", "last_name": "Beitrag", "status": "active",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("0")},
+        {"user_id": user.id, "first_name": "Ex", "last_name": "Mitglied", "status": "inactive",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("10")},
+        {"user_id": other.id, "first_name": "Fremd", "last_name": "Verein", "status": "active",
+         "iban": "DE02120300000000202051", "beitrag_monthly": Decimal("10")},
+    ]])
+    await db_session.commit()
+
+    res = await client.post("/api/v1/sepa/export", json=EXPORT, headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/xml")
+    root = ET.fromstring(res.content)
+    assert root.findtext(".//p:GrpHdr/p:NbOfTxs", namespaces=NS) == "2500"
+    assert root.findtext(".//p:GrpHdr/p:CtrlSum", namespaces=NS) == "26250.00"
+    names = [e.text for e in root.findall(".//p:DrctDbtTxInf/p:Dbtr/p:Nm", NS)]
+    assert len(names) == 2500
+    assert names[:2] == ["Anna Beitrag0000", "Anna Beitrag0001"]
+
+
+@pytest.mark.asyncio
+async def test_export_without_eligible_members(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    db_session.add(Member(user_id=user.id, first_name="Ohne", last_name="Iban", status="active",
+                          beitrag_monthly=Decimal("10")))
+    await db_session.commit()
+    res = await client.post("/api/v1/sepa/export", json=EXPORT, headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 400
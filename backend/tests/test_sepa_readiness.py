@@ -0,0 +1,149 @@
+"""Tests for the SEPA readiness stored on members."""
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.member import Member, normalize_iban
+from app.models.member_group import MemberGroup
+from app.core.security import create_access_token, get_password_hash
+
+NS = {"p": "urn:iso:std:iso:20022:tech:xsd:pain.008.003.02"}
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def test_normalize_iban():
+    assert normalize_iban("de89 3704 0044 0532 0130 00") == "DE89370400440532013000"
+    assert normalize_iban("AT61 1904 3002 3457 3201") == "AT611904300234573201"
+    assert normalize_iban("DE89370400440532013001") is None  # checksum
+    assert normalize_iban("DE8937040044053201300") is None  # length
+    assert normalize_iban("US12345678901234567890") is None  # not a SEPA country
+    assert normalize_iban("") is None
+    assert normalize_iban(None) is None
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_derived_on_save(db_session: AsyncSession):
+    user, _ = await create_verified_user(db_session, "owner@test.de")
+    group = MemberGroup(user_id=user.id, name="Jugend", beitrag_override=Decimal("4.00"))
+    db_session.add(group)
+    await db_session.flush()
+    member = Member(user_id=user.id, first_name="Anna", last_name="Alt", iban="DE89 3704 0044 0532 0130 00",
+                    beitrag_monthly=Decimal("10.00"))
+    db_session.add(member)
+    await db_session.commit()
+    assert (member.sepa_iban, member.beitrag_effective, member.sepa_ready) == (
+        "DE89370400440532013000", Decimal("10.00"), True,
+    )
+
+    member.group_id = group.id
+    await db_session.commit()
+    assert (member.beitrag_effective, member.sepa_ready) == (Decimal("4.00"), True)
+
+    member.iban = "DE89370400440532013001"
+    await db_session.commit()
+    assert (member.sepa_iban, member.sepa_ready) == (None, False)
+
+    member.iban = "DE89370400440532013000"
+    member.status = "inactive"
+    await db_session.commit()
+    assert member.sepa_ready is False
+
+
+@pytest.mark.asyncio
+async def test_group_override_changes_reach_members(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    group = (await client.post("/api/v1/member-groups", json={"name": "Familie"}, headers=headers)).json()
+    member = Member(user_id=user.id, first_name="Bernd", last_name="Beitrag", iban="DE02120300000000202051",
+                    beitrag_monthly=Decimal("10.00"), group_id=group["id"])
+    db_session.add(member)
+    await db_session.commit()
+    assert member.beitrag_effective == Decimal("10.00")
+
+    res = await client.put(f"/api/v1/member-groups/{group['id']}", json={"beitrag_override": 6.5}, headers=headers)
+    assert res.status_code == 200
+    await db_session.refresh(member)
+    assert member.beitrag_effective == Decimal("6.50")
+
+    res = await client.delete(f"/api/v1/member-groups/{group['id']}", headers=headers)
+    assert res.status_code == 204
+    await db_session.refresh(member)
+    assert member.beitrag_effective == Decimal("10.00")
+
+
+@pytest.mark.asyncio
+async def test_preview_and_export_use_stored_readiness(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    group = MemberGroup(user_id=user.id, name="Ermäßigt", beitrag_override=Decimal("3.00"))
+    db_session.add(group)
+    await db_session.flush()
+    db_session.add_all([
+        Member(user_id=user.id, first_name="Anna", last_name="A", iban="DE02 1203 0000 0000 2020 51",
+               beitrag_monthly=Decimal("10.00")),
+        Member(user_id=user.id, first_name="Carl", last_name="C", iban="DE02120300000000202051",
+               beitrag_monthly=Decimal("10.00"), group_id=group.id),
+        Member(user_id=user.id, first_name="Tippfehler", last_name="T", iban="DE02120300000000202052",
+               beitrag_monthly=Decimal("10.00")),
+        Member(user_id=user.id, first_name="Ohne", last_name="Z", beitrag_monthly=Decimal("10.00")),
+    ])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    preview = (await client.get("/api/v1/sepa/preview", headers=headers)).json()
+    assert preview["total_members"] == 4
+    assert preview["ready_for_sepa"] == 2
+    by_name = {m["name"]: m for m in preview["members_with_iban"]}
+    assert (by_name["Tippfehler T"]["has_iban"], by_name["Tippfehler T"]["iban_valid"]) == (True, False)
+    assert by_name["Carl C"]["beitrag_monthly"] == 3.0
+
+    res = await client.post("/api/v1/sepa/export", json={
+        "collection_date": "2026-04-01",
+        "creditor_iban": "DE89370400440532013000",
+        "creditor_bic": "COBADEFFXXX",
+        "creditor_id": "DE98ZZZ09999999999",
+    }, headers=headers)
+    root = ET.fromstring(res.content)
+    debits = [
+        (tx.findtext("p:Dbtr/p:Nm", namespaces=NS), tx.findtext("p:DbtrAcct/p:Id/p:IBAN", namespaces=NS),
+         tx.findtext("p:InstdAmt", namespaces=NS))
+        for tx in root.findall(".//p:DrctDbtTxInf", NS)
+    ]
+    assert debits == [("Anna A", "DE02120300000000202051", "10.00"), ("Carl C", "DE02120300000000202051", "3.00")]
+    assert root.findtext(".//p:GrpHdr/p:CtrlSum", namespaces=NS) == "13.00"
+
+
+@pytest.mark.asyncio
+async def test_deleting_group_of_member_without_own_fee(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    group = MemberGroup(user_id=user.id, name="Familie", beitrag_override=Decimal("5.00"))
+    db_session.add(group)
+    await db_session.flush()
+    member = Member(user_id=user.id, first_name="Dora", last_name="Durchgruppe", iban="DE02120300000000202051",
+                    beitrag_monthly=None, group_id=group.id)
+    db_session.add(member)
+    await db_session.commit()
+    assert (member.beitrag_effective, member.sepa_ready) == (Decimal("5.00"), True)
+
+    res = await client.delete(f"/api/v1/member-groups/{group.id}", headers=headers)
+    assert res.status_code == 204
+    await db_session.refresh(member)
+    assert (member.group_id, member.beitrag_effective, member.sepa_ready) == (None, None, False)
@@ -0,0 +1,144 @@
+"""Tests for the incrementally maintained Kassenbuch aggregates."""
+import pytest
+from datetime import date
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.transaction_total import TransactionMonthlyTotal
+from app.core.security import create_access_token, get_password_hash
+from app.services.aggregate_service import verify_aggregates, add_months
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+async def post_transaction(client: AsyncClient, token: str, type: str, amount: str, tx_date: str) -> dict:
+    res = await client.post(
+        "/api/v1/transactions",
+        json={"type": type, "amount": amount, "description": "Test", "transaction_date": tx_date},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 201
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_stats_follow_create_update_delete(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await post_transaction(client, token, "income", "200.00", "2026-01-01")
+    expense = await post_transaction(client, token, "expense", "80.00", "2026-01-02")
+    to_delete = await post_transaction(client, token, "income", "15.50", "2025-12-31")
+
+    res = await client.put(
+        f"/api/v1/transactions/{expense['id']}",
+        json={"amount": "30.00", "type": "income"},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    res = await client.delete(f"/api/v1/transactions/{to_delete['id']}", headers=headers)
+    assert res.status_code == 204
+
+    data = (await client.get("/api/v1/transactions/stats", headers=headers)).json()
+    assert float(data["total_income"]) == 230.0
+    assert float(data["total_expense"]) == 0.0
+    assert data["transaction_count"] == 2
+
+    assert await verify_aggregates(db_session) == []
+
+
+@pytest.mark.asyncio
+async def test_csv_import_updates_stats(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    csv_content = (
+        "type,amount,description,transaction_date\n"
+        "income,10.00,Beitrag,2026-02-01\n"
+        "expense,4.50,Material,2026-02-03\n"
+        "income,-1,Ungültig,2026-02-03\n"
+    )
+    res = await client.post(
+        "/api/v1/transactions/import",
+        files={"file": ("buchungen.csv", csv_content.encode(), "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.json()["created"] == 2
+
+    data = (await client.get("/api/v1/transactions/stats", headers={"Authorization": f"Bearer {token}"})).json()
+    assert float(data["total_income"]) == 10.0
+    assert float(data["total_expense"]) == 4.5
+    assert data["transaction_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_verify_reports_and_repairs_drift(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    await post_transaction(client, token, "income", "100.00", "2026-03-10")
+
+    await db_session.execute(
+        update(TransactionMonthlyTotal)
+        .where(TransactionMonthlyTotal.user_id == user.id)
+        .values(total_amount=999, transaction_count=7)
+    )
+    await db_session.commit()
+
+    drift = await verify_aggregates(db_session, user_id=user.id)
+    assert len(drift) == 1
+    assert drift[0]["expected_total"] == 100.0
+    assert drift[0]["stored_count"] == 7
+
+    await verify_aggregates(db_session, user_id=user.id, repair=True)
+    await db_session.commit()
+    assert await verify_aggregates(db_session, user_id=user.id) == []
+
+
+@pytest.mark.asyncio
+async def test_monthly_chart_reads_rollup_for_long_ranges(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    current_month = date.today().replace(day=1)
+    two_years_ago = add_months(current_month, -24)
+    await post_transaction(client, token, "income", "50.00", current_month.isoformat())
+    await post_transaction(client, token, "expense", "20.00", two_years_ago.isoformat())
+
+    res = await client.get(
+        "/api/v1/transactions/monthly-chart",
+        params={"months": 36},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert len(data) == 36
+    assert data[-1]["income"] == 50.0
+    assert data[-25]["expense"] == 20.0
+    assert data[-25]["year"] == two_years_ago.year
+    assert sum(m["income"] + m["expense"] for m in data) == 70.0
+
+
+@pytest.mark.asyncio
+async def test_update_rejects_cleared_required_field(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    tx = await post_transaction(client, token, "income", "50.00", "2026-01-01")
+
+    res = await client.put(f"/api/v1/transactions/{tx['id']}", json={"amount": None}, headers=headers)
+    assert res.status_code == 400
+    assert "amount" in res.json()["detail"]
+
+    data = (await client.get("/api/v1/transactions/stats", headers=headers)).json()
+    assert float(data["total_income"]) == 50.0
+    assert await verify_aggregates(db_session) == []
@@ -0,0 +1,147 @@
+"""Tests for the batch transaction endpoint."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.audit_log import AuditLog
+from app.core.security import create_access_token, get_password_hash
+from app.services.aggregate_service import verify_aggregates
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def booking(amount: str, day: int, type: str = "expense") -> dict:
+    return {"type": type, "amount": amount, "description": f"Beleg {day}", "transaction_date": f"2026-03-{day:02d}"}
+
+
+@pytest.mark.asyncio
+async def test_batch_create_update_delete(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [{"op": "create", "data": booking(f"{day}.00", day)} for day in range(1, 31)]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert data["created"] == 30
+    ids = [r["id"] for r in data["results"]]
+    assert all(ids) and len(set(ids)) == 30
+
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [
+            {"op": "update", "id": ids[0], "data": {"amount": "100.00", "type": "income"}},
+            {"op": "delete", "id": ids[1]},
+            {"op": "update", "id": ids[1], "data": {"amount": "1.00"}},
+            {"op": "delete", "id": 999999},
+            {"op": "create", "data": booking("5.00", 31)},
+        ]},
+        headers=headers,
+    )
+    data = res.json()
+    assert (data["created"], data["updated"], data["deleted"], data["failed"]) == (1, 1, 1, 2)
+    assert [r["success"] for r in data["results"]] == [True, True, False, False, True]
+    assert data["results"][2]["error"] == "Buchung nicht gefunden"
+
+    res = await client.get(f"/api/v1/transactions/{ids[0]}", headers=headers)
+    assert res.json()["type"] == "income"
+    assert float(res.json()["amount"]) == 100.0
+    res = await client.get(f"/api/v1/transactions/{ids[1]}", headers=headers)
+    assert res.status_code == 404
+
+    stats = (await client.get("/api/v1/transactions/stats", headers=headers)).json()
+    assert stats["transaction_count"] == 30
+    assert float(stats["total_income"]) == 100.0
+    assert float(stats["total_expense"]) == sum(range(3, 31)) + 5
+    assert await verify_aggregates(db_session) == []
+
+    audit_count = await db_session.scalar(select(func.count(AuditLog.id)).where(AuditLog.resource == "transaction"))
+    assert audit_count == 30 + 3
+
+
+@pytest.mark.asyncio
+async def test_batch_cannot_touch_other_tenants(client: AsyncClient, db_session: AsyncSession):
+    _, token_a = await create_verified_user(db_session, "a@test.de")
+    _, token_b = await create_verified_user(db_session, "b@test.de")
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [{"op": "create", "data": booking("10.00", 1)}]},
+        headers={"Authorization": f"Bearer {token_a}"},
+    )
+    foreign_id = res.json()["results"][0]["id"]
+
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [{"op": "delete", "id": foreign_id}]},
+        headers={"Authorization": f"Bearer {token_b}"},
+    )
+    assert res.json()["failed"] == 1
+    res = await client.get(f"/api/v1/transactions/{foreign_id}", headers={"Authorization": f"Bearer {token_a}"})
+    assert res.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_invalid_and_oversized_requests(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = await client.post("/api/v1/transactions/batch", json={"operations": [{"op": "move", "id": 1}]}, headers=headers)
+    assert res.status_code == 422
+
+    from app.config import settings
+    monkeypatch.setattr(settings, "TRANSACTION_BATCH_MAX_OPERATIONS", 2)
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [{"op": "create", "data": booking("1.00", day)} for day in range(1, 4)]},
+        headers=headers,
+    )
+    assert res.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_cleared_required_fields_per_item(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [{"op": "create", "data": booking("10.00", 1)}]},
+        headers=headers,
+    )
+    tx_id = res.json()["results"][0]["id"]
+
+    res = await client.post(
+        "/api/v1/transactions/batch",
+        json={"operations": [
+            {"op": "update", "id": tx_id, "data": {"amount": None, "description": None}},
+            {"op": "update", "id": tx_id, "data": {"notes": None}},
+            {"op": "create", "data": booking("5.00", 2)},
+        ]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["created"], data["updated"], data["failed"]) == (1, 1, 1)
+    assert data["results"][0]["error"] == "Pflichtfeld darf nicht leer sein: amount, description"
+
+    res = await client.get(f"/api/v1/transactions/{tx_id}", headers=headers)
+    assert float(res.json()["amount"]) == 10.0
+    assert await verify_aggregates(db_session) == []
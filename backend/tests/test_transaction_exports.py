@@ -0,0 +1,171 @@
+"""Tests for Kassenbuch exports (DATEV CSV, Jahresabschluss PDF)."""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from datetime import date
+from decimal import Decimal
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.core.security import create_access_token, get_password_hash
+from app.api import transactions as transactions_api
+from app.services.pdf_executor import PdfRenderPool, PdfQueueFull, PdfRenderTimeout, pdf_pool
+from app.services.pdf_service import generate_jahresabschluss_pdf
+from app.services.pdf_cache import PdfCache, pdf_cache
+
+
+async def create_premium_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+        subscription_tier="premium",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+@pytest.mark.asyncio
+async def test_datev_export_streams_all_rows(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(transactions_api, "DATEV_BATCH_SIZE", 3)
+    user, token = await create_premium_user(db_session, "owner@test.de")
+    for i in range(8):
+        db_session.add(Transaction(
+            user_id=user.id,
+            type="income" if i % 2 else "expense",
+            amount=Decimal("12.50"),
+            description=f"Buchung {i}",
+            transaction_date=date(2026, 1, i + 1),
+            notes="Notiz; mit Trenner" if i == 0 else None,
+        ))
+    db_session.add(Transaction(
+        user_id=user.id, type="income", amount=Decimal("1.00"),
+        description="Anderes Jahr", transaction_date=date(2025, 12, 31),
+    ))
+    await db_session.commit()
+
+    res = await client.get(
+        "/api/v1/transactions/export/datev",
+        params={"year": 2026},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.content.startswith("\ufeff".encode("utf-8"))
+    lines = res.content.decode("utf-8-sig").strip().splitlines()
+    assert lines[0] == '"Datum";"Belegnummer";"Buchungstext";"Betrag";"Soll/Haben";"Kategorie";"Notiz"'
+    assert len(lines) == 9
+    assert lines[1] == '"01.01.2026";"";"Buchung 0";"12,50";"S";"";"Notiz; mit Trenner"'
+    assert lines[2].endswith('"H";"";""')
+
+
+@pytest.mark.asyncio
+async def test_jahresabschluss_renders_in_pdf_pool(client: AsyncClient, db_session: AsyncSession, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_cache, "directory", tmp_path)
+    user, token = await create_premium_user(db_session, "owner@test.de")
+    res = await client.post(
+        "/api/v1/transactions",
+        json={"type": "income", "amount": "100.00", "description": "Beitrag", "transaction_date": "2026-03-01"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 201
+
+    res = await client.get(
+        "/api/v1/transactions/export/jahresabschluss",
+        params={"year": 2026},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    assert res.content.startswith(b"%PDF")
+    assert pdf_pool.metrics()["jobs"]["jahresabschluss"]["rendered"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_pdf_pool_rejects_when_queue_is_full():
+    pool = PdfRenderPool(workers=1, queue_limit=0, timeout=5)
+    with pytest.raises(PdfQueueFull):
+        await pool.render("jahresabschluss", generate_jahresabschluss_pdf)
+    assert pool.metrics()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_jahresabschluss_served_from_cache_until_data_changes(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(pdf_cache, "directory", tmp_path)
+    _, token = await create_premium_user(db_session, "owner@test.de")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post(
+        "/api/v1/transactions",
+        json={"type": "income", "amount": "100.00", "description": "Beitrag", "transaction_date": "2026-03-01"},
+        headers=headers,
+    )
+
+    first = await client.get("/api/v1/transactions/export/jahresabschluss", params={"year": 2026}, headers=headers)
+    rendered = pdf_pool.metrics()["jobs"]["jahresabschluss"]["rendered"]
+    second = await client.get("/api/v1/transactions/export/jahresabschluss", params={"year": 2026}, headers=headers)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert pdf_pool.metrics()["jobs"]["jahresabschluss"]["rendered"] == rendered
+    assert len(list(tmp_path.glob("*.pdf"))) == 1
+
+    # A booking in the covered year invalidates the entry
+    await client.post(
+        "/api/v1/transactions",
+        json={"type": "expense", "amount": "5.00", "description": "Porto", "transaction_date": "2026-04-01"},
+        headers=headers,
+    )
+    await client.get("/api/v1/transactions/export/jahresabschluss", params={"year": 2026}, headers=headers)
+    assert pdf_pool.metrics()["jobs"]["jahresabschluss"]["rendered"] == rendered + 1
+
+
+@pytest.mark.asyncio
+async def test_timed_out_render_keeps_its_slot_until_the_worker_finishes():
+    pool = PdfRenderPool(workers=1, queue_limit=1, timeout=0.1)
+    pool._executor = ThreadPoolExecutor(max_workers=1)  # a thread is enough to hold a slot
+    finish = threading.Event()
+
+    def slow_render() -> bytes:
+        finish.wait(5)
+        return b"%PDF"
+
+    try:
+        with pytest.raises(PdfRenderTimeout):
+            await pool.render("slow", slow_render)
+        # Still rendering: the queue limit must hold
+        assert pool.metrics()["in_flight"] == 1
+        with pytest.raises(PdfQueueFull):
+            await pool.render("slow", slow_render)
+
+        finish.set()
+        for _ in range(50):
+            if pool.metrics()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert await pool.render("slow", slow_render) == b"%PDF"
+        assert pool.metrics()["in_flight"] == 0
+    finally:
+        finish.set()
+        pool.shutdown()
+
+
+def test_pdf_cache_evicts_least_recently_used(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=250)
+    cache.put("a", b"x" * 100)
+    cache.put("b", b"x" * 100)
+    os.utime(tmp_path / "a.pdf", (1, 1))
+    os.utime(tmp_path / "b.pdf", (2, 2))
+    assert cache.get("a") is not None  # touch: "b" is now the oldest
+    cache.put("c", b"x" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
@@ -0,0 +1,161 @@
+"""Tests and throughput benchmark for the bulk transaction CSV import."""
+import io
+import os
+import time
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from app.database import Base
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.core.security import create_access_token, get_password_hash
+from app.services.aggregate_service import verify_aggregates
+from app.services.transaction_import import import_transactions
+
+BENCHMARK_ROWS = 20_000
+MIN_ROWS_PER_SECOND = 5_000
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+def build_csv(rows: int) -> bytes:
+    lines = ["type,amount,description,category,transaction_date,receipt_number,notes"]
+    for i in range(rows):
+        lines.append(f"{'income' if i % 3 else 'expense'},{i % 97 + 1}.50,Buchung {i},Beiträge,2026-{i % 12 + 1:02d}-15,R{i},")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_import_collects_row_errors_and_writes_valid_rows(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    csv_content = (
+        "Type,Amount,Description,Transaction_Date,Notes\n"
+        "Einnahme,\"10,00\",Beitrag Müller,15.01.2026,\n"
+        "ausgabe,4.50,Material,2026-01-20,bar\n"
+        "spende,1.00,Falscher Typ,2026-01-20,\n"
+        "income,0,Null,2026-01-20,\n"
+        "income,1.00,,2026-01-20,\n"
+        "income,1.00,Datum,32.01.2026,\n"
+    ).encode("latin-1")
+    res = await client.post(
+        "/api/v1/transactions/import",
+        files={"file": ("buchungen.csv", csv_content, "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert data["total"] == 6
+    assert data["created"] == 2
+    assert data["skipped"] == 4
+    assert [e["row"] for e in data["errors"]] == [4, 5, 6, 7]
+
+    descriptions = (await db_session.execute(select(Transaction.description))).scalars().all()
+    assert sorted(descriptions) == ["Beitrag Müller", "Material"]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_missing_columns(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    res = await client.post(
+        "/api/v1/transactions/import",
+        files={"file": ("buchungen.csv", b"type,amount\nincome,1.00\n", "text/csv")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
+    assert "description" in res.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_import_spanning_several_chunks(db_session: AsyncSession):
+    user, _ = await create_verified_user(db_session, "owner@test.de")
+    result = await import_transactions(db_session, user.id, io.BytesIO(build_csv(250)), chunk_size=100)
+
+    assert result["created"] == 250
+    count = (await db_session.execute(select(func.count(Transaction.id)))).scalar()
+    assert count == 250
+    assert await verify_aggregates(db_session, user_id=user.id) == []
+
+
+@pytest.mark.asyncio
+async def test_failed_import_books_nothing(db_session: AsyncSession, monkeypatch):
+    user, _ = await create_verified_user(db_session, "owner@test.de")
+    from app.services import transaction_import
+    write_chunk = transaction_import._write_chunk
+    writes = 0
+
+    async def fail_on_third_chunk(db, rows):
+        nonlocal writes
+        writes += 1
+        if writes == 3:
+            raise OSError("connection lost")
+        await write_chunk(db, rows)
+
+    monkeypatch.setattr(transaction_import, "_write_chunk", fail_on_third_chunk)
+    with pytest.raises(OSError):
+        await import_transactions(db_session, user.id, io.BytesIO(build_csv(250)), chunk_size=100)
+
+    user_id = user.id
+    await db_session.rollback()
+    count = (await db_session.execute(select(func.count(Transaction.id)))).scalar()
+    assert count == 0
+    assert await verify_aggregates(db_session, user_id=user_id) == []
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_import_throughput_sqlite(db_session: AsyncSession):
+    user, _ = await create_verified_user(db_session, "owner@test.de")
+    payload = io.BytesIO(build_csv(BENCHMARK_ROWS))
+
+    started = time.perf_counter()
+    result = await import_transactions(db_session, user.id, payload, chunk_size=2000)
+    rows_per_second = BENCHMARK_ROWS / (time.perf_counter() - started)
+
+    assert result["created"] == BENCHMARK_ROWS
+    count = (await db_session.execute(select(func.count(Transaction.id)))).scalar()
+    assert count == BENCHMARK_ROWS
+    assert await verify_aggregates(db_session, user_id=user.id) == []
+    assert rows_per_second > MIN_ROWS_PER_SECOND, f"{rows_per_second:,.0f} rows/s"
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+@pytest.mark.asyncio
+async def test_import_throughput_postgres():
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            user, _ = await create_verified_user(db, "owner@test.de")
+            payload = io.BytesIO(build_csv(BENCHMARK_ROWS))
+
+            started = time.perf_counter()
+            result = await import_transactions(db, user.id, payload, chunk_size=2000)
+            rows_per_second = BENCHMARK_ROWS / (time.perf_counter() - started)
+
+            assert result["created"] == BENCHMARK_ROWS
+            assert await verify_aggregates(db, user_id=user.id) == []
+            assert rows_per_second > MIN_ROWS_PER_SECOND, f"{rows_per_second:,.0f} rows/s"
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
@@ -0,0 +1,96 @@
+"""Tests for keyset (cursor) pagination of the Kassenbuch list."""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.core.security import create_access_token, get_password_hash
+
+
+async def create_verified_user(db: AsyncSession, email: str) -> tuple[User, str]:
+    user = User(
+        email=email,
+        name="Test User",
+        password_hash=get_password_hash("password123"),
+        role="member",
+        is_active=True,
+        is_verified=True,
+        organization_name="Test Verein",
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    token = create_access_token({"sub": str(user.id), "role": user.role})
+    return user, token
+
+
+async def seed_transactions(db: AsyncSession, user_id: int, count: int) -> None:
+    # Several bookings per day so the date alone is not a stable sort key
+    for i in range(count):
+        db.add(Transaction(
+            user_id=user_id,
+            type="income",
+            amount=Decimal("1.00"),
+            description=f"Buchung {i}",
+            transaction_date=date(2026, 1, 1) + timedelta(days=i // 4),
+        ))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_cover_every_row_once(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    await seed_transactions(db_session, user.id, 23)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 5}
+        if cursor:
+            params["cursor"] = cursor
+        res = await client.get("/api/v1/transactions", params=params, headers=headers)
+        assert res.status_code == 200
+        seen.extend((t["transaction_date"], t["id"]) for t in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 23
+    assert len(set(seen)) == 23
+    assert seen == sorted(seen, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_stable_under_new_inserts(client: AsyncClient, db_session: AsyncSession):
+    user, token = await create_verified_user(db_session, "owner@test.de")
+    await seed_transactions(db_session, user.id, 10)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = await client.get("/api/v1/transactions", params={"limit": 4}, headers=headers)
+    cursor = first.headers["X-Next-Cursor"]
+    before = await client.get("/api/v1/transactions", params={"limit": 4, "cursor": cursor}, headers=headers)
+
+    # A new booking on the newest date must not shift the following page
+    db_session.add(Transaction(
+        user_id=user.id, type="income", amount=Decimal("5.00"),
+        description="Neu", transaction_date=date(2026, 12, 31),
+    ))
+    await db_session.commit()
+    after = await client.get("/api/v1/transactions", params={"limit": 4, "cursor": cursor}, headers=headers)
+
+    assert [t["id"] for t in after.json()] == [t["id"] for t in before.json()]
+    assert not {t["id"] for t in first.json()} & {t["id"] for t in after.json()}
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(client: AsyncClient, db_session: AsyncSession):
+    _, token = await create_verified_user(db_session, "owner@test.de")
+    res = await client.get(
+        "/api/v1/transactions",
+        params={"cursor": "not-a-cursor"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 400
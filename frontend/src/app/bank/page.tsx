@@ -30,7 +30,10 @@ interface BankTxn {
   matched_member_id: number | null
   matched_member_name: string | null
   match_type: string | null
+  match_confidence: number | null
+  match_candidates: { member_id: number; member_name: string; score: number }[]
   transaction_created: boolean
+  duplicate: boolean
 }
 
 interface ImportResult {
@@ -41,14 +44,54 @@ interface ImportResult {
   transactions: BankTxn[]
 }
 
+interface ImportJob extends ImportResult {
+  id: number
+  status: 'queued' | 'running' | 'completed' | 'failed'
+  progress: number
+  error: string | null
+}
+
+interface BankLine {
+  booking_date: string
+  counterparty: string | null
+  iban: string | null
+  purpose: string | null
+  amount: number
+  currency: string
+}
+
+interface Booking {
+  id: number
+  transaction_date: string
+  type: string
+  amount: number
+  description: string
+  member_id: number | null
+}
+
+interface Reconciliation {
+  date_from: string
+  date_to: string
+  window_days: number
+  matched: { bank_line: BankLine; booking: Booking; days_apart: number }[]
+  bank_only: BankLine[]
+  kassenbuch_only: Booking[]
+}
+
+const JOB_POLL_INTERVAL_MS = 1000
+const JOB_MAX_LINES = 5000
+
 function fmtEuro(val: number) {
   return new Intl.NumberFormat('de-DE', { style: 'currency', currency: 'EUR' }).format(val)
 }
 
 export default function BankPage() {
   const fileRef = useRef<HTMLInputElement>(null)
+  const reconcileRef = useRef<HTMLInputElement>(null)
+  const [reconciliation, setReconciliation] = useState<Reconciliation | null>(null)
   const [result, setResult] = useState<ImportResult | null>(null)
   const [importing, setImporting] = useState(false)
+  const [progress, setProgress] = useState(0)
   const [error, setError] = useState('')
   const [addToKassenbuch, setAddToKassenbuch] = useState(false)
   const [filter, setFilter] = useState<'all' | 'matched' | 'unmatched'>('all')
@@ -59,18 +102,52 @@ export default function BankPage() {
     setImporting(true)
     setError('')
     setResult(null)
+    setReconciliation(null)
+    setProgress(0)
     try {
-      const res = await bankApi.import(file, addToKassenbuch)
-      setResult(res.data as ImportResult)
+      // Large statements run as a background job; poll until it has finished
+      const started = await bankApi.startImport(file, addToKassenbuch)
+      let job = started.data as ImportJob
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+        const res = await bankApi.getJob(job.id, { limit: 0 })
+        job = res.data as ImportJob
+        setProgress(job.progress)
+      }
+      if (job.status === 'failed') {
+        setError(job.error || 'Fehler beim Import. Bitte Dateiformat prüfen.')
+        return
+      }
+      const res = await bankApi.getJob(job.id, { limit: JOB_MAX_LINES })
+      setResult(res.data as ImportJob)
     } catch (err: unknown) {
       const msg = (err as { response?: { data?: { detail?: string } } })?.response?.data?.detail
-      setError(msg || 'Fehler beim Import. Bitte CSV-Format prüfen.')
+      setError(msg || 'Fehler beim Import. Bitte Dateiformat prüfen.')
     } finally {
       setImporting(false)
       if (fileRef.current) fileRef.current.value = ''
     }
   }
 
+  async function handleReconcileFile(e: React.ChangeEvent<HTMLInputElement>) {
+    const file = e.target.files?.[0]
+    if (!file) return
+    setImporting(true)
+    setError('')
+    setReconciliation(null)
+    setResult(null)
+    try {
+      const res = await bankApi.reconcile(file)
+      setReconciliation(res.data as Reconciliation)
+    } catch (err: unknown) {
+      const msg = (err as { response?: { data?: { detail?: string } } })?.response?.data?.detail
+      setError(msg || 'Fehler beim Abgleich. Bitte Dateiformat prüfen.')
+    } finally {
+      setImporting(false)
+      if (reconcileRef.current) reconcileRef.current.value = ''
+    }
+  }
+
   const displayedTxns = result?.transactions.filter((t) => {
     if (filter === 'matched') return !!t.matched_member_id
     if (filter === 'unmatched') return !t.matched_member_id
@@ -98,22 +175,31 @@ export default function BankPage() {
                 ) : (
                   <Upload className="w-4 h-4" />
                 )}
-                {importing ? 'Importiert…' : 'CSV importieren'}
+                {importing
+                  ? `Importiert… ${Math.round(progress * 100)} %`
+                  : 'Kontoauszug importieren'}
               </button>
             }
           />
           <input
             ref={fileRef}
             type="file"
-            accept=".csv"
+            accept=".csv,.xml,.sta,.mt940,.940,.txt"
             className="hidden"
             onChange={handleFileChange}
           />
+          <input
+            ref={reconcileRef}
+            type="file"
+            accept=".csv,.xml,.sta,.mt940,.940,.txt"
+            className="hidden"
+            onChange={handleReconcileFile}
+          />
 
           <main className="flex-1 overflow-y-auto p-6">
 
             {/* Options */}
-            {!result && (
+            {!result && !reconciliation && (
               <div className="max-w-2xl space-y-4">
                 <div className="bg-card border border-border rounded-xl p-5">
                   <h3 className="font-medium text-foreground mb-3 flex items-center gap-2">
@@ -121,7 +207,7 @@ export default function BankPage() {
                     Kontoauszug importieren
                   </h3>
                   <p className="text-sm text-muted-foreground mb-4">
-                    Exportiere deinen Kontoauszug als CSV aus deinem Online-Banking und importiere ihn hier.
+                    Exportiere deinen Kontoauszug als CSV, CAMT.053 (XML) oder MT940 aus deinem Online-Banking und importiere ihn hier.
                     VereinsKasse erkennt automatisch Mitgliedsbeiträge anhand der IBAN oder des Namens im Verwendungszweck.
                   </p>
 
@@ -143,7 +229,26 @@ export default function BankPage() {
                     className="flex items-center gap-2 px-5 py-2.5 bg-primary text-primary-foreground rounded-lg text-sm font-medium hover:bg-primary/90 transition-colors disabled:opacity-60"
                   >
                     <Upload className="w-4 h-4" />
-                    CSV-Datei auswählen
+                    Datei auswählen
+                  </button>
+                </div>
+
+                <div className="bg-card border border-border rounded-xl p-5">
+                  <h3 className="font-medium text-foreground mb-3 flex items-center gap-2">
+                    <BookOpen className="w-4 h-4 text-primary" />
+                    Mit Kassenbuch abgleichen
+                  </h3>
+                  <p className="text-sm text-muted-foreground mb-4">
+                    Prüft, welche Bankbuchungen bereits im Kassenbuch stehen (gleicher Betrag, bis zu 3 Tage Abstand)
+                    und welche fehlen. Dabei wird nichts gebucht.
+                  </p>
+                  <button
+                    onClick={() => reconcileRef.current?.click()}
+                    disabled={importing}
+                    className="flex items-center gap-2 px-5 py-2.5 border border-border rounded-lg text-sm font-medium text-foreground hover:bg-accent transition-colors disabled:opacity-60"
+                  >
+                    <Upload className="w-4 h-4" />
+                    Auszug abgleichen
                   </button>
                 </div>
 
@@ -154,6 +259,7 @@ export default function BankPage() {
                     <li>• Sparkasse / VR-Bank (CSV)</li>
                     <li>• Comdirect (CSV)</li>
                     <li>• Die meisten deutschen Banken mit CSV-Export</li>
+                    <li>• CAMT.053 (XML) und MT940 aller Banken</li>
                   </ul>
                 </div>
               </div>
@@ -177,6 +283,62 @@ export default function BankPage() {
               )}
             </AnimatePresence>
 
+            {/* Reconciliation */}
+            {reconciliation && (
+              <motion.div initial={{ opacity: 0 }} animate={{ opacity: 1 }} className="space-y-6">
+                <div className="flex items-center gap-4">
+                  <p className="text-sm text-muted-foreground">
+                    Zeitraum {reconciliation.date_from} – {reconciliation.date_to}, ±{reconciliation.window_days} Tage
+                  </p>
+                  <button
+                    onClick={() => { setReconciliation(null); setError(''); }}
+                    className="ml-auto flex items-center gap-1.5 px-3 py-1.5 rounded-lg text-sm border border-border text-muted-foreground hover:bg-accent transition-colors"
+                  >
+                    <Upload className="w-3.5 h-3.5" />
+                    Neuer Abgleich
+                  </button>
+                </div>
+                <div className="grid grid-cols-1 sm:grid-cols-3 gap-4">
+                  {[
+                    { label: 'Im Kassenbuch gefunden', value: reconciliation.matched.length },
+                    { label: 'Nur auf dem Auszug', value: reconciliation.bank_only.length },
+                    { label: 'Nur im Kassenbuch', value: reconciliation.kassenbuch_only.length },
+                  ].map((s) => (
+                    <div key={s.label} className="bg-card border border-border rounded-xl p-4">
+                      <span className="text-xs text-muted-foreground">{s.label}</span>
+                      <p className="text-lg font-semibold text-foreground">{s.value}</p>
+                    </div>
+                  ))}
+                </div>
+                <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
+                  <div>
+                    <h3 className="font-medium text-foreground mb-2">Nur auf dem Auszug</h3>
+                    <div className="space-y-1">
+                      {reconciliation.bank_only.map((line, idx) => (
+                        <div key={idx} className="flex justify-between gap-3 bg-card border border-border rounded-lg px-3 py-2 text-sm">
+                          <span className="truncate">{line.booking_date} · {line.counterparty || line.purpose || '—'}</span>
+                          <span className={line.amount > 0 ? 'text-green-400' : 'text-red-400'}>{fmtEuro(line.amount)}</span>
+                        </div>
+                      ))}
+                    </div>
+                  </div>
+                  <div>
+                    <h3 className="font-medium text-foreground mb-2">Nur im Kassenbuch</h3>
+                    <div className="space-y-1">
+                      {reconciliation.kassenbuch_only.map((booking) => (
+                        <div key={booking.id} className="flex justify-between gap-3 bg-card border border-border rounded-lg px-3 py-2 text-sm">
+                          <span className="truncate">{booking.transaction_date} · {booking.description}</span>
+                          <span className={booking.type === 'income' ? 'text-green-400' : 'text-red-400'}>
+                            {fmtEuro(booking.type === 'income' ? booking.amount : -booking.amount)}
+                          </span>
+                        </div>
+                      ))}
+                    </div>
+                  </div>
+                </div>
+              </motion.div>
+            )}
+
             {/* Results */}
             {result && (
               <motion.div initial={{ opacity: 0 }} animate={{ opacity: 1 }}>
@@ -257,7 +419,11 @@ export default function BankPage() {
                                     ? 'bg-green-500/20 text-green-400 border-green-500/30'
                                     : 'bg-yellow-500/20 text-yellow-400 border-yellow-500/30'
                                 }`}>
-                                  {txn.match_type === 'iban' ? 'IBAN-Match' : 'Name-Match'}
+                                  {txn.match_type === 'iban'
+                                    ? 'IBAN-Match'
+                                    : txn.match_type === 'fuzzy'
+                                      ? `Ähnlicher Name (${Math.round((txn.match_confidence ?? 0) * 100)} %)`
+                                      : 'Name-Match'}
                                 </span>
                               )}
                               {txn.transaction_created && (
@@ -265,6 +431,11 @@ export default function BankPage() {
                                   Kassenbuch
                                 </span>
                               )}
+                              {txn.duplicate && (
+                                <span className="text-[10px] px-2 py-0.5 rounded-full border bg-secondary text-muted-foreground border-border font-medium">
+                                  Bereits importiert
+                                </span>
+                              )}
                             </div>
                             <p className="text-sm font-medium text-foreground truncate">
                               {txn.counterparty || '—'}
@@ -281,6 +452,14 @@ export default function BankPage() {
                                 {txn.matched_member_name}
                               </div>
                             )}
+                            {txn.match_candidates?.length > 1 && (
+                              <p className="mt-1 text-xs text-muted-foreground">
+                                Weitere Kandidaten:{' '}
+                                {txn.match_candidates.slice(1)
+                                  .map((c) => `${c.member_name} (${Math.round(c.score * 100)} %)`)
+                                  .join(', ')}
+                              </p>
+                            )}
                           </div>
                         </div>
                       </motion.div>
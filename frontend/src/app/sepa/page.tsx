@@ -16,7 +16,9 @@ interface MemberPreview {
   iban?: string
   beitrag_monthly?: number
   has_iban: boolean
+  iban_valid: boolean
   has_beitrag: boolean
+  ready: boolean
 }
 
 interface PreviewData {
@@ -33,6 +35,9 @@ function SepaContent() {
   const [isLoadingPreview, setIsLoadingPreview] = useState(true)
   const [isExporting, setIsExporting] = useState(false)
   const [exportError, setExportError] = useState('')
+  // Collection date of the last download; first debits are only used up once it is submitted
+  const [exportedDate, setExportedDate] = useState<string | null>(null)
+  const [submitNote, setSubmitNote] = useState('')
 
   const today = new Date()
   const defaultDate = new Date(today.getFullYear(), today.getMonth() + 1, 1).toISOString().split('T')[0]
@@ -73,14 +78,18 @@ function SepaContent() {
         throw new Error(err.detail || `Fehler ${res.status}`)
       }
 
+      // Several batches (FRST/RCUR, file limits) arrive as one ZIP
       const blob = await res.blob()
       const url = URL.createObjectURL(blob)
       const a = document.createElement('a')
       const date = form.collection_date.slice(0, 7)
+      const extension = res.headers.get('Content-Type')?.includes('zip') ? 'zip' : 'xml'
       a.href = url
-      a.download = `SEPA-Lastschrift-${date}.xml`
+      a.download = `SEPA-Lastschrift-${date}.${extension}`
       a.click()
       URL.revokeObjectURL(url)
+      setExportedDate(form.collection_date)
+      setSubmitNote('')
     } catch (err: any) {
       setExportError(err.message || 'Export fehlgeschlagen.')
     } finally {
@@ -88,8 +97,19 @@ function SepaContent() {
     }
   }
 
-  const readyMembers = preview?.members_with_iban.filter(m => m.has_iban && m.has_beitrag) || []
-  const missingMembers = preview?.members_with_iban.filter(m => !m.has_iban || !m.has_beitrag) || []
+  const handleSubmitted = async () => {
+    if (!exportedDate) return
+    try {
+      const res = await api.post('/sepa/submitted', { collection_date: exportedDate })
+      setSubmitNote(`${res.data.marked} Erstlastschriften vermerkt. Folgende Einzüge laufen als Folgelastschrift.`)
+      setExportedDate(null)
+    } catch (err: any) {
+      setExportError(err.response?.data?.detail || 'Einreichung konnte nicht vermerkt werden.')
+    }
+  }
+
+  const readyMembers = preview?.members_with_iban.filter(m => m.ready) || []
+  const missingMembers = preview?.members_with_iban.filter(m => !m.ready) || []
 
   return (
     <MobileNavProvider>
@@ -171,7 +191,8 @@ function SepaContent() {
                             <span className="text-foreground">{m.name}</span>
                             <span className="text-warning">
                               {!m.has_iban && 'Keine IBAN'}
-                              {!m.has_iban && !m.has_beitrag && ' · '}
+                              {m.has_iban && !m.iban_valid && 'IBAN ungültig'}
+                              {!m.iban_valid && !m.has_beitrag && ' · '}
                               {!m.has_beitrag && 'Kein Beitrag'}
                             </span>
                           </div>
@@ -249,6 +270,28 @@ function SepaContent() {
                 </div>
               )}
 
+              {exportedDate && (
+                <div className="flex items-center justify-between gap-3 p-3 rounded-lg border border-border text-sm">
+                  <span className="text-muted-foreground">
+                    Datei bei der Bank eingereicht? Erst dann gelten neue Mandate als genutzt.
+                  </span>
+                  <button
+                    type="button"
+                    onClick={handleSubmitted}
+                    className="flex-shrink-0 flex items-center gap-1.5 px-3 py-1.5 rounded-lg bg-secondary text-foreground text-sm font-medium hover:bg-secondary/80 transition-colors"
+                  >
+                    <CheckCircle className="w-4 h-4" /> Eingereicht
+                  </button>
+                </div>
+              )}
+
+              {submitNote && (
+                <div className="flex items-center gap-2 p-3 rounded-lg bg-success/10 text-success text-sm">
+                  <CheckCircle className="w-4 h-4 flex-shrink-0" />
+                  {submitNote}
+                </div>
+              )}
+
               <button
                 type="submit"
                 disabled={isExporting || (preview?.ready_for_sepa ?? 0) === 0}
@@ -20,24 +20,17 @@ export function CategoryChart({ type }: { type: 'income' | 'expense' }) {
   const [isLoading, setIsLoading] = useState(true)
 
   useEffect(() => {
-    transactionsApi.list({ type, limit: 500 })
+    transactionsApi.byCategory({ type })
       .then((r) => {
-        const transactions = r.data as Array<{ category: string | null; amount: string | number }>
-        const map = new Map<string, number>()
+        const rows = r.data as Array<{ name: string; total: number; color: string | null }>
 
-        for (const t of transactions) {
-          const name = t.category || 'Sonstiges'
-          const amount = typeof t.amount === 'string' ? parseFloat(t.amount) : t.amount
-          map.set(name, (map.get(name) || 0) + amount)
-        }
-
-        const sorted = Array.from(map.entries())
-          .sort((a, b) => b[1] - a[1])
+        // Sorted by total (desc) on the server
+        const sorted = rows
           .slice(0, 8)
-          .map(([name, amount], i) => ({
-            name,
-            amount,
-            color: COLORS[i % COLORS.length],
+          .map((row, i) => ({
+            name: row.name,
+            amount: row.total,
+            color: row.color || COLORS[i % COLORS.length],
           }))
 
         setCategories(sorted)
@@ -85,11 +85,15 @@ export const transactionsApi = {
   get: (id: number) => api.get(`/transactions/${id}`),
   update: (id: number, data: Record<string, unknown>) => api.put(`/transactions/${id}`, data),
   delete: (id: number) => api.delete(`/transactions/${id}`),
+  batch: (operations: Record<string, unknown>[]) => api.post('/transactions/batch', { operations }),
   stats: () => api.get('/transactions/stats'),
   exportDatev: (year?: number) => api.get('/transactions/export/datev', { params: { year }, responseType: 'blob' }),
   exportJahresabschluss: (year: number) =>
     api.get('/transactions/export/jahresabschluss', { params: { year }, responseType: 'blob' }),
   monthlyChart: (months?: number) => api.get('/transactions/monthly-chart', { params: { months } }),
+  yearlyChart: (years?: number) => api.get('/transactions/yearly-chart', { params: { years } }),
+  byCategory: (params?: { type?: string; date_from?: string; date_to?: string }) =>
+    api.get('/transactions/by-category', { params }),
   downloadTemplate: () => api.get('/transactions/template/csv', { responseType: 'blob' }),
   importCsv: (file: File) => {
     const formData = new FormData()
@@ -170,6 +174,8 @@ export const paymentRemindersApi = {
     api.delete(`/members/${memberId}/reminders/${reminderId}`),
   send: (memberId: number, reminderId: number) =>
     api.post(`/members/${memberId}/reminders/${reminderId}/send`),
+  sendBulk: (reminderIds: number[]) =>
+    api.post('/members/reminders/send', { reminder_ids: reminderIds }),
   paymentOverview: () => api.get('/members/payment-overview'),
 }
 
@@ -195,6 +201,22 @@ export const bankApi = {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
+  startImport: (file: File, addToKassenbuch: boolean = false) => {
+    const form = new FormData();
+    form.append('file', file);
+    return api.post(`/bank/import-jobs?add_to_kassenbuch=${addToKassenbuch}`, form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+  getJob: (id: number, params?: { offset?: number; limit?: number }) =>
+    api.get(`/bank/jobs/${id}`, { params }),
+  reconcile: (file: File, windowDays: number = 3) => {
+    const form = new FormData();
+    form.append('file', file);
+    return api.post(`/bank/reconcile?window_days=${windowDays}`, form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
   acceptTransaction: (data: {
     booking_date: string;
     amount: number;